@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Import Throughput Benchmark
+Generates synthetic registration CSVs and times the importers against a local mock backend
+
+The CSVs use the bilingual Google Forms headers read by
+import_tournament_players.py, with mixed date formats, Hindi/English gender
+strings, permission text and a configurable share of unparseable dates.
+Each importer is run against the SQLite stand-in from import_lib/backends.py
+with a simulated per-request latency, and the report shows rows/sec,
+round-trips per row, peak memory and parse time versus I/O time.
+
+Usage:
+    python scripts/benchmark_imports.py
+    python scripts/benchmark_imports.py --players 100 1000 10000 --latency-ms 30 --workers 4
+    python scripts/benchmark_imports.py --importers players complete-rpc --batch-size 200
+    python scripts/benchmark_imports.py --generate-only synthetic.csv --players 2000
+    python scripts/benchmark_imports.py --players 100000 --importers players --check-normalization
+
+Requirements:
+    pip install supabase python-dotenv
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from import_lib.backends import LocalBackend
+from import_lib.columns import PLAYER_FIELDS
+from import_lib.dates import DATE_FORMATS, TIMESTAMP_FORMATS, DateParser
+from import_lib.pipeline import read_csv_rows
+
+IMPORTERS = ('players', 'complete', 'complete-rpc')
+
+BENCHMARK_TOURNAMENT_ID = '00000000-0000-0000-0000-00000000be7c'
+
+# Values seen in real registration exports
+GENDERS = ['Male', 'Female', 'पुरुष (Male)', 'महिला (Female)', 'M', 'F', 'male', 'female', 'Other']
+PARTICIPATION_DAYS = ['Both Days (दोनो दिन)', 'Day 1 (दिन 1)', 'Day 2 (दिन 2)', 'Both days', '']
+PERMISSIONS = [
+    'I have permission from my parents to participate, I agree to photos and videos being used on social media',
+    'Parents permit participation',
+    'मैं माता-पिता की अनुमति से भाग ले रहा/रही हूँ (I have permission to participate)',
+    'Yes',
+    'Media and promotional use allowed',
+    '',
+]
+COMMUNITIES = ['Dharavi', 'Govandi', 'Kurla', 'Mankhurd', 'Bandra', 'Malvani']
+DOB_FORMATS = ['%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%m/%d/%Y']
+BAD_DATES = ['not sure', '31/02/2010', '2010', '??']
+
+class CaseResult(NamedTuple):
+    importer: str
+    players: int
+    wall_seconds: float
+    requests: int
+    io_seconds: float
+    parse_seconds: float
+    peak_bytes: Optional[int]
+
+def player_columns() -> List[str]:
+    """Registration export header: the full bilingual form of every player field"""
+    return [spec.aliases[0] for spec in PLAYER_FIELDS.values()]
+
+def generate_registration_csv(path: str, players: int, bad_date_rate: float = 0.02,
+                              players_per_team: int = 15, seed: int = 42) -> List[str]:
+    """Write a synthetic registration export. Returns the team names"""
+    rng = random.Random(seed)
+    team_count = max(1, players // players_per_team)
+    team_names = [f"Team {number + 1:03d}" for number in range(team_count)]
+    team_communities = {team: rng.choice(COMMUNITIES) for team in team_names}
+    submitted = datetime(2025, 1, 1, 9, 0, 0)
+    
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(player_columns())
+        
+        for number in range(players):
+            team = rng.choice(team_names)
+            submitted += timedelta(seconds=rng.randint(5, 900))
+            
+            if rng.random() < bad_date_rate:
+                dob = rng.choice(BAD_DATES)
+            else:
+                born = date(rng.randint(1990, 2012), rng.randint(1, 12), rng.randint(1, 28))
+                dob = born.strftime(rng.choice(DOB_FORMATS))
+            
+            phone = f"9{rng.randint(100000000, 999999999)}"
+            writer.writerow([
+                f"{submitted.month}/{submitted.day}/{submitted.year} {submitted.strftime('%H:%M:%S')}",
+                team,
+                team_communities[team],
+                f"Player {number + 1}",
+                rng.choice(GENDERS),
+                dob,
+                phone,
+                f"+91 {phone[:5]} {phone[5:]}" if rng.random() < 0.5 else '',
+                rng.choice(PARTICIPATION_DAYS),
+                rng.choice(PERMISSIONS),
+                '' if rng.random() < 0.9 else 'Need transport from the station',
+                'Google Drive Links' if rng.random() < 0.7 else f"https://drive.google.com/file/d/{number}",
+                '',
+            ])
+    
+    return team_names
+
+class _TimedRequest:
+    """Proxies a query builder and times its execute() through the mock backend"""
+    
+    def __init__(self, backend: 'MockBackend', request):
+        self._backend = backend
+        self._request = request
+    
+    def __getattr__(self, name: str):
+        method = getattr(self._request, name)
+        
+        def chain(*args, **kwargs):
+            self._request = method(*args, **kwargs)
+            return self
+        
+        return chain
+    
+    def execute(self):
+        return self._backend._execute(self._request)
+
+class MockBackend:
+    """LocalBackend with a simulated network delay per request, counting requests and I/O time"""
+    
+    def __init__(self, backend: LocalBackend, latency: float):
+        self.backend = backend
+        self.latency = latency
+        self.requests = 0
+        self.io_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def table(self, name: str) -> _TimedRequest:
+        return _TimedRequest(self, self.backend.table(name))
+    
+    def rpc(self, name: str, params: Dict) -> _TimedRequest:
+        return _TimedRequest(self, self.backend.rpc(name, params))
+    
+    def _execute(self, request):
+        start = time.perf_counter()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return request.execute()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.requests += 1
+                self.io_seconds += elapsed
+
+def time_parsing(parse_player_row: Callable, csv_path: str) -> float:
+    """Time reading and parsing every row with no database involved"""
+    start = time.perf_counter()
+    columns, rows = read_csv_rows(csv_path, PLAYER_FIELDS)
+    dates = DateParser(DATE_FORMATS)
+    timestamps = DateParser(TIMESTAMP_FORMATS)
+    for row_num, row in rows:
+        parse_player_row(row_num, row, columns, BENCHMARK_TOURNAMENT_ID,
+                         columns.get(row, 'community').strip(), dates, timestamps)
+    return time.perf_counter() - start
+
+def check_normalization(csv_path: str, log=print) -> int:
+    """Time both normalization engines on every row and compare them. Returns the number of mismatches"""
+    from import_lib.normalize import PARENTAL_CONSENT_KEYWORDS, ColumnNormalizer, keyword_pattern, pandas_available
+    
+    columns, rows = read_csv_rows(csv_path, PLAYER_FIELDS)
+    rows = [row for _, row in rows]
+    values = [[columns.get(row, field) for row in rows] for field in ('gender', 'participation_days', 'permissions')]
+    
+    if not pandas_available():
+        log("  ⚠️  pandas is not installed, skipping the normalization check")
+        return 0
+    
+    mismatches = 0
+    # Both importers' consent rules: with and without a bare "yes"
+    for extra in ((), ('yes',)):
+        results = {}
+        for engine in ('python', 'pandas'):
+            normalizer = ColumnNormalizer(keyword_pattern(PARENTAL_CONSENT_KEYWORDS + extra), engine)
+            start = time.perf_counter()
+            results[engine] = normalizer.normalize(*values)
+            results[engine + ' s'] = time.perf_counter() - start
+        mismatches += sum(1 for python, vectorized in zip(results['python'], results['pandas']) if python != vectorized)
+    
+    log(f"  🔬 normalization of {len(rows)} rows: python {results['python s']:.3f}s, "
+        f"pandas {results['pandas s']:.3f}s, {mismatches} mismatches")
+    return mismatches
+
+def run_importer(importer: str, csv_path: str, backend,
+                 batch_size: int, workers: int) -> None:
+    """Run one importer over the CSV with its output discarded"""
+    # Imported here so --generate-only works without the Supabase client installed
+    import import_tournament_complete
+    import import_tournament_players
+    
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        if importer == 'players':
+            import_tournament_players.import_csv_data(csv_path, BENCHMARK_TOURNAMENT_ID, backend, batch_size, workers)
+        else:
+            import_tournament_complete.import_csv_data(csv_path, backend, "Benchmark Tournament", None,
+                                                       batch_size, workers, use_rpc=(importer == 'complete-rpc'))
+
+def fresh_backend(importer: str, team_names: List[str]) -> LocalBackend:
+    local = LocalBackend(':memory:')
+    if importer == 'players':
+        # import_tournament_players.py only imports into existing teams
+        local.seed_placeholders(BENCHMARK_TOURNAMENT_ID, team_names)
+    return local
+
+def run_case(importer: str, csv_path: str, team_names: List[str], players: int, latency: float,
+             batch_size: int, workers: int, measure_memory: bool) -> CaseResult:
+    """Benchmark one importer on one file.
+    
+    Throughput is measured on its own run, since tracemalloc slows allocation
+    down; peak memory comes from a second run without simulated latency.
+    """
+    import import_tournament_complete
+    import import_tournament_players
+    
+    module = import_tournament_players if importer == 'players' else import_tournament_complete
+    parse_seconds = time_parsing(module.parse_player_row, csv_path)
+    
+    mock = MockBackend(fresh_backend(importer, team_names), latency)
+    start = time.perf_counter()
+    run_importer(importer, csv_path, mock, batch_size, workers)
+    wall_seconds = time.perf_counter() - start
+    
+    peak_bytes = None
+    if measure_memory:
+        memory_mock = MockBackend(fresh_backend(importer, team_names), 0)
+        tracemalloc.start()
+        try:
+            run_importer(importer, csv_path, memory_mock, batch_size, workers)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    
+    return CaseResult(importer, players, wall_seconds, mock.requests, mock.io_seconds, parse_seconds, peak_bytes)
+
+def print_results(results: List[CaseResult], workers: int) -> None:
+    print(f"\n{'='*96}")
+    print(f"{'importer':<14}{'players':>9}{'rows/sec':>11}{'trips/row':>11}{'peak MB':>10}"
+          f"{'parse s':>10}{'I/O s':>10}{'wall s':>10}")
+    print(f"{'='*96}")
+    for result in results:
+        peak = f"{result.peak_bytes / 1024 / 1024:.1f}" if result.peak_bytes is not None else '-'
+        print(f"{result.importer:<14}{result.players:>9}{result.players / result.wall_seconds:>11.0f}"
+              f"{result.requests / result.players:>11.3f}{peak:>10}{result.parse_seconds:>10.2f}"
+              f"{result.io_seconds:>10.2f}{result.wall_seconds:>10.2f}")
+    if workers > 1:
+        print(f"\nI/O s is summed over {workers} workers, so it can exceed wall time")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CSV importers against a local mock backend')
+    parser.add_argument('--players', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Players per synthetic CSV, one benchmark per size (default: 100 1000 10000)')
+    parser.add_argument('--importers', nargs='+', choices=IMPORTERS, default=list(IMPORTERS),
+                        help='Importers to benchmark (default: all)')
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='Simulated latency per database request in milliseconds (default: 20)')
+    parser.add_argument('--batch-size', type=int, default=100, help='Players per insert request (default: 100)')
+    parser.add_argument('--workers', type=int, default=1, help='Insert batches written in parallel (default: 1)')
+    parser.add_argument('--bad-date-rate', type=float, default=0.02,
+                        help='Share of rows with an unparseable date of birth (default: 0.02)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated CSVs')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the peak memory measurement run')
+    parser.add_argument('--check-normalization', action='store_true',
+                        help='Also check that the pandas normalization engine matches the row-by-row one')
+    parser.add_argument('--generate-only', metavar='CSV',
+                        help='Only write a synthetic CSV with the first --players size to this path')
+    
+    args = parser.parse_args()
+    
+    if min(args.players) < 1 or args.batch_size < 1 or args.workers < 1:
+        print("❌ Error: --players, --batch-size and --workers must be at least 1")
+        return 1
+    
+    if args.generate_only:
+        team_names = generate_registration_csv(args.generate_only, args.players[0], args.bad_date_rate, seed=args.seed)
+        print(f"✅ Wrote {args.players[0]} players in {len(team_names)} teams to {args.generate_only}")
+        return 0
+    
+    print(f"Latency {args.latency_ms:g} ms/request, batch size {args.batch_size}, {args.workers} worker(s)")
+    
+    results: List[CaseResult] = []
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for players in args.players:
+            csv_path = os.path.join(tmp_dir, f"registrations_{players}.csv")
+            team_names = generate_registration_csv(csv_path, players, args.bad_date_rate, seed=args.seed)
+            if args.check_normalization:
+                mismatches += check_normalization(csv_path)
+            
+            for importer in args.importers:
+                print(f"  ⏱️  {importer} × {players} players...", flush=True)
+                results.append(run_case(importer, csv_path, team_names, players, args.latency_ms / 1000,
+                                        args.batch_size, args.workers, not args.no_memory))
+    
+    print_results(results, args.workers)
+    if mismatches:
+        print(f"\n❌ The pandas normalization engine disagreed with the row-by-row one on {mismatches} rows")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
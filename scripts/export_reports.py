@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Export Reports
+
+This script exports the reporting views (participation, retention, coach effectiveness,
+spirit scores, attendance history, ...) straight from the database, instead of building
+them in the browser like the Reports page does. Each view is read page by page with
+keyset pagination and every page is written out as it arrives, so reports of any size
+export in constant memory and are not cut off at the PostgREST row cap. Several views
+are read concurrently (see import_lib/exports.py). Files only appear under their final
+names once every report has been exported.
+
+--format xlsx writes one workbook with a sheet per report; csv and parquet write one
+file per report into the output directory. Views not in --list can be exported as
+view:key_column[,key_column], where the key columns identify a row.
+
+Usage:
+    python scripts/export_reports.py
+    python scripts/export_reports.py --format xlsx --output funder_report.xlsx
+    python scripts/export_reports.py --reports child_attendance_history --format parquet --output exports/
+    python scripts/export_reports.py --all --format xlsx --workers 6
+    python scripts/export_reports.py --reports "leaderboard_view:team_id" --format csv
+    python scripts/export_reports.py --list
+
+Requirements:
+    pip install supabase python-dotenv
+    pip install openpyxl  # only for --format xlsx
+    pip install pyarrow   # only for --format parquet
+"""
+
+import argparse
+import os
+from datetime import date
+from typing import List
+
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.exports import (DEFAULT_REPORTS, FORMATS, REPORTS, CsvSink, ParquetSink, ReportSpec, XlsxWorkbook,
+                                output_path, parse_report, stream_reports)
+from import_lib.journal import PAGE_SIZE
+from import_lib import metrics
+
+def print_reports() -> None:
+    print("Known reports (key columns):")
+    for spec in REPORTS.values():
+        print(f"  {spec.view:<30} {', '.join(spec.key) or '(aggregate)'}")
+
+def default_output(export_format: str) -> str:
+    """reports_<date>.xlsx, or a reports_<date> directory for one file per report"""
+    name = f"reports_{date.today().isoformat()}"
+    return f"{name}.xlsx" if export_format == 'xlsx' else name
+
+def export_reports(supabase, specs: List[ReportSpec], export_format: str, output: str, page_size: int,
+                   workers: int) -> bool:
+    workbook = XlsxWorkbook(output) if export_format == 'xlsx' else None
+    if workbook is None:
+        os.makedirs(output, exist_ok=True)
+    
+    def open_sink(spec: ReportSpec):
+        if workbook is not None:
+            return workbook.sheet(spec.view)
+        if export_format == 'csv':
+            return CsvSink(output_path(output, spec, 'csv'))
+        return ParquetSink(output_path(output, spec, 'parquet'))
+    
+    print(f"📤 Exporting {len(specs)} reports to {output} ({export_format}, {min(workers, len(specs))} at a time)")
+    completed = False
+    try:
+        with metrics.stage('export'):
+            results = stream_reports(supabase, specs, open_sink, page_size, workers)
+        completed = True
+    finally:
+        # A workbook is only written to --output once every report is in it
+        if workbook is not None:
+            with metrics.stage('save_workbook'):
+                workbook.close(keep=completed)
+    
+    for result in results:
+        noun = 'page' if result.pages == 1 else 'pages'
+        if result.rows:
+            print(f"  ✓ {result.spec.view}: {result.rows} rows ({result.pages} {noun})")
+        else:
+            print(f"  ⚠️  {result.spec.view}: no rows")
+    total = sum(result.rows for result in results)
+    metrics.count_rows(total)
+    print(f"\n✅ Exported {total} rows")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Export reporting views to CSV, XLSX or Parquet')
+    selector = parser.add_mutually_exclusive_group()
+    selector.add_argument('--reports', nargs='+', metavar='REPORT',
+                          help=f"Reports to export, or view:key_column[,key_column] (default: {' '.join(DEFAULT_REPORTS)})")
+    selector.add_argument('--all', action='store_true', help='Export every known report')
+    selector.add_argument('--list', action='store_true', help='List the known reports and exit')
+    parser.add_argument('--format', dest='export_format', choices=FORMATS, default='csv',
+                        help='Output format (default: csv)')
+    parser.add_argument('--output',
+                        help='Workbook file for xlsx, directory for csv and parquet (default: reports_<date>)')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE,
+                        help=f'Rows per request, at most the server row cap (default: {PAGE_SIZE})')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Reports read at the same time (default: 4)')
+    parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
+    parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    metrics.add_arguments(parser)
+    
+    args = parser.parse_args()
+    if args.list:
+        print_reports()
+        return 0
+    metrics.enable('export_reports', args.profile, args.metrics_json, args.cprofile)
+    
+    if not 1 <= args.page_size <= PAGE_SIZE:
+        print(f"❌ --page-size must be between 1 and {PAGE_SIZE} (the server row cap)")
+        return 1
+    if args.workers < 1:
+        print("❌ --workers must be at least 1")
+        return 1
+    try:
+        names = list(REPORTS) if args.all else args.reports or list(DEFAULT_REPORTS)
+        specs = list({spec.view: spec for spec in map(parse_report, names)}.values())
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return 1
+    output = args.output or default_output(args.export_format)
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    url = args.supabase_url or os.getenv('SUPABASE_URL')
+    key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+    if not url or not key:
+        print("❌ Supabase credentials not provided")
+        print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
+        print("or pass as arguments: --supabase-url and --supabase-key")
+        return 1
+    supabase, transport = create_import_client(url, key, max_concurrency=args.workers, max_retries=args.max_retries)
+    
+    try:
+        return 0 if export_reports(supabase, specs, args.export_format, output, args.page_size, args.workers) else 1
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ Fatal error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        if transport is not None:
+            transport.report()
+
+if __name__ == '__main__':
+    exit(main())
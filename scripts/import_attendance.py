@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Import Historical Attendance from CSV
+
+Marking attendance in the app fires a streak trigger and an absence trigger for every
+row, and each firing costs several queries. Loading a term of history that way is slow,
+and streaks come out wrong when the rows are not written in date order. This script
+writes the attendance in chunks through import_attendance_bulk(), which holds both
+triggers off. It then recomputes current_streak, longest_streak and streak_started_date
+for every child in the file in one date-ordered pass, and writes them back in a batch,
+together with any milestone badges they reached. Historical rows do not raise absence
+alerts.
+
+--recompute-only skips the import and recomputes the streaks of every child with
+attendance, e.g. after attendance was edited or deleted in bulk.
+
+CSV Format:
+    child (name or id), present (yes/no, present/absent, P/A, 1/0), and either
+    session_id, or session date with time and/or location where a day has more
+    than one session
+
+Usage:
+    python scripts/import_attendance.py --csv "attendance.csv"
+    python scripts/import_attendance.py --csv "attendance.csv" --validate-only
+    python scripts/import_attendance.py --csv "attendance.csv" --chunk-size 500
+    python scripts/import_attendance.py --recompute-only
+
+Requirements:
+    pip install supabase python-dotenv
+"""
+
+import argparse
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.columns import ATTENDANCE_FIELDS
+from import_lib.dates import DATE_FORMATS, DateParser, parse_time_of_day
+from import_lib.journal import select_all
+from import_lib import metrics
+from import_lib.pipeline import batched, read_csv_rows
+from import_lib.streaks import SessionTimes, badge_rows, compute_streaks, session_times, streak_rows
+
+PRESENT_VALUES = {'1', 'true', 'yes', 'y', 'present', 'p'}
+ABSENT_VALUES = {'0', 'false', 'no', 'n', 'absent', 'a'}
+
+# Child ids per in_() filter when reading attendance back, to keep request URLs short
+CHILD_FILTER_SIZE = 200
+
+# (session_id, child_id)
+AttendanceKey = Tuple[str, str]
+
+class AttendanceMark(NamedTuple):
+    """One CSV row, before the child and session are looked up"""
+    row_num: int
+    child: str
+    session_id: str
+    session_date: Optional[str]
+    session_time: Optional[str]
+    location: str
+    present: bool
+
+def parse_present(value: str) -> Optional[bool]:
+    value = value.strip().lower()
+    if value in PRESENT_VALUES:
+        return True
+    if value in ABSENT_VALUES:
+        return False
+    return None
+
+@metrics.timed('parse_csv')
+def read_attendance(csv_path: str, dates: DateParser) -> Tuple[List[AttendanceMark], List[Tuple[int, str]]]:
+    """Parse the attendance CSV without a database. Returns (marks, row errors).
+    
+    Raises ValueError if the file is missing or its header lacks a required column.
+    """
+    if not os.path.isfile(csv_path):
+        raise ValueError(f"CSV file not found: {csv_path}")
+    
+    columns, rows = read_csv_rows(csv_path, ATTENDANCE_FIELDS)
+    missing = columns.missing(('child', 'present'))
+    if len(columns.missing(('session_id', 'session_date'))) == 2:
+        missing.append('session_id or session_date')
+    if missing:
+        raise ValueError(f"CSV has no column for: {', '.join(missing)}")
+    
+    marks = []
+    errors = []
+    for row_num, row in rows:
+        child = columns.get(row, 'child').strip()
+        present = parse_present(columns.get(row, 'present'))
+        session_id = columns.get(row, 'session_id').strip()
+        session_date = dates.parse(columns.get(row, 'session_date'), row_num)
+        raw_time = columns.get(row, 'session_time').strip()
+        session_time = parse_time_of_day(raw_time) if raw_time else None
+        
+        if not child:
+            errors.append((row_num, 'no child'))
+        elif present is None:
+            errors.append((row_num, f"present must be yes or no, not {columns.get(row, 'present')!r}"))
+        elif not session_id and not session_date:
+            errors.append((row_num, 'no session id or date'))
+        elif raw_time and not session_time:
+            errors.append((row_num, f"unreadable session time {raw_time!r}"))
+        else:
+            marks.append(AttendanceMark(row_num, child, session_id, session_date, session_time,
+                                        columns.get(row, 'location').strip().lower(), present))
+    return (marks, errors)
+
+class ChildIndex:
+    """Children by id and by lowercased name; a name shared by several children matches none of them"""
+    
+    def __init__(self, children: List[Dict]):
+        self.ids = {child['id'] for child in children}
+        self.by_name: Dict[str, Optional[str]] = {}
+        for child in children:
+            name = ' '.join(child['name'].lower().split())
+            self.by_name[name] = None if name in self.by_name else child['id']
+    
+    def resolve(self, value: str) -> Tuple[Optional[str], str]:
+        """(child_id, '') or (None, reason)"""
+        if value in self.ids:
+            return (value, '')
+        name = ' '.join(value.lower().split())
+        if name not in self.by_name:
+            return (None, f"no child named {value!r}")
+        if self.by_name[name] is None:
+            return (None, f"more than one child is named {value!r}, use the child id")
+        return (self.by_name[name], '')
+
+class SessionIndex:
+    """Sessions by id and by date"""
+    
+    def __init__(self, sessions: List[Dict]):
+        self.ids = {session['id'] for session in sessions}
+        self.by_date: Dict[str, List[Dict]] = {}
+        for session in sessions:
+            self.by_date.setdefault(session['date'], []).append(session)
+    
+    def resolve(self, mark: AttendanceMark) -> Tuple[Optional[str], str]:
+        """(session_id, '') or (None, reason)"""
+        if mark.session_id:
+            if mark.session_id in self.ids:
+                return (mark.session_id, '')
+            return (None, f"no session {mark.session_id}")
+        
+        candidates = [session for session in self.by_date.get(mark.session_date, [])
+                      if (not mark.session_time or session['time'] == mark.session_time)
+                      and (not mark.location or (session['location'] or '').lower() == mark.location)]
+        if len(candidates) == 1:
+            return (candidates[0]['id'], '')
+        if not candidates:
+            return (None, f"no session on {mark.session_date}")
+        return (None, f"{len(candidates)} sessions on {mark.session_date}, add a time or location column")
+
+@metrics.timed('resolve')
+def resolve_marks(marks: List[AttendanceMark], children: ChildIndex,
+                  sessions: SessionIndex) -> Tuple[Dict[AttendanceKey, bool], List[Tuple[int, str]], int]:
+    """Attendance by (session, child), the rows that could not be resolved, and the number of repeated rows.
+    
+    When a child is marked more than once for a session, the last row wins.
+    """
+    records: Dict[AttendanceKey, bool] = {}
+    errors = []
+    repeated = 0
+    for mark in marks:
+        child_id, reason = children.resolve(mark.child)
+        session_id = None
+        if child_id is not None:
+            session_id, reason = sessions.resolve(mark)
+        if session_id is None:
+            errors.append((mark.row_num, reason))
+            continue
+        key = (session_id, child_id)
+        repeated += key in records
+        records[key] = mark.present
+    return (records, errors, repeated)
+
+def print_errors(errors: List[Tuple[int, str]], limit: int = 20) -> None:
+    if not errors:
+        return
+    print(f"\n❌ {len(errors)} rows skipped:")
+    for row_num, message in errors[:limit]:
+        print(f"    Row {row_num}: {message}")
+    if len(errors) > limit:
+        print(f"    ... and {len(errors) - limit} more")
+
+def load_attendance(supabase, records: Dict[AttendanceKey, bool], chunk_size: int) -> int:
+    """Write the attendance through import_attendance_bulk(), one call per chunk"""
+    written = 0
+    for chunk in batched(records.items(), chunk_size):
+        payload = [{'session_id': session_id, 'child_id': child_id, 'present': present}
+                   for (session_id, child_id), present in chunk]
+        with metrics.stage('import_rpc'):
+            result = supabase.rpc('import_attendance_bulk', {'_rows': payload}).execute()
+        written += result.data or 0
+        metrics.count_rows(result.data or 0)
+        print(f"  ✓ {written}/{len(records)} attendance rows")
+    return written
+
+def read_child_attendance(supabase, child_ids: Optional[List[str]]) -> List[Dict]:
+    """Attendance of the children (of every child with None)"""
+    columns = 'child_id, session_id, present'
+    if child_ids is None:
+        return list(select_all(supabase, 'attendance', columns, 'id'))
+    attendance = []
+    for start in range(0, len(child_ids), CHILD_FILTER_SIZE):
+        attendance.extend(select_all(supabase, 'attendance', columns, 'id',
+                                     'child_id', child_ids[start:start + CHILD_FILTER_SIZE]))
+    return attendance
+
+def recompute_streaks(supabase, child_ids: Optional[List[str]], sessions: SessionTimes, chunk_size: int) -> None:
+    """Rebuild the attendance_streaks rows of the children from their whole attendance history"""
+    with metrics.stage('read_attendance'):
+        attendance = read_child_attendance(supabase, child_ids)
+    streaks = compute_streaks(attendance, sessions)
+    
+    rows = streak_rows(streaks)
+    for chunk in batched(rows, chunk_size):
+        with metrics.stage('upsert_streaks'):
+            supabase.table('attendance_streaks').upsert(chunk, on_conflict='child_id').execute()
+    badges = badge_rows(streaks)
+    for chunk in batched(badges, chunk_size):
+        with metrics.stage('upsert_badges'):
+            supabase.table('attendance_badges').upsert(chunk, on_conflict='child_id,badge_type',
+                                                       ignore_duplicates=True).execute()
+    
+    print(f"🔥 Recomputed the streaks of {len(rows)} children from {len(attendance)} attendance rows "
+          f"({sum(1 for streak in streaks.values() if streak.current)} on a streak, {len(badges)} badges reached)")
+
+def import_attendance(supabase, marks: List[AttendanceMark], chunk_size: int) -> bool:
+    with metrics.stage('lookups'):
+        children = ChildIndex(list(select_all(supabase, 'children', 'id, name', 'id')))
+        sessions = list(select_all(supabase, 'sessions', 'id, date, time, location', 'id'))
+    
+    records, errors, repeated = resolve_marks(marks, children, SessionIndex(sessions))
+    print(f"📋 {len(records)} attendance rows for {len({child_id for _, child_id in records})} children "
+          f"in {len({session_id for session_id, _ in records})} sessions")
+    if repeated:
+        print(f"⚠️  {repeated} rows repeat a child and session, the last one was kept")
+    print_errors(errors)
+    if not records:
+        print("\n⚠️  Nothing to import")
+        return not errors
+    
+    written = load_attendance(supabase, records, chunk_size)
+    print(f"✅ Imported {written} attendance rows")
+    
+    child_ids = sorted({child_id for _, child_id in records})
+    recompute_streaks(supabase, child_ids, session_times(sessions), chunk_size)
+    return not errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Import historical attendance and recompute attendance streaks')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help='Path to the attendance CSV file')
+    source.add_argument('--recompute-only', action='store_true',
+                        help='Import nothing, recompute the streaks of every child with attendance')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='Rows per import call and per streak upsert request (default: 1000)')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Only check the CSV, without connecting to the database')
+    parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
+    parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    metrics.add_arguments(parser)
+    
+    args = parser.parse_args()
+    metrics.enable('import_attendance', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.chunk_size < 1:
+        print("❌ --chunk-size must be at least 1")
+        return 1
+    if args.validate_only and not args.csv:
+        print("❌ --validate-only needs --csv")
+        return 1
+    
+    # Check the file before connecting
+    marks: List[AttendanceMark] = []
+    if args.csv:
+        dates = DateParser(DATE_FORMATS)
+        try:
+            marks, errors = read_attendance(args.csv, dates)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            return 1
+        print(f"🔎 Checked {len(marks) + len(errors)} rows: {len(marks)} readable, {len(errors)} with errors")
+        print_errors(errors)
+        dates.report('session date')
+        if args.validate_only:
+            return 0 if not errors else 1
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    url = args.supabase_url or os.getenv('SUPABASE_URL')
+    key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+    if not url or not key:
+        print("❌ Supabase credentials not provided")
+        print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
+        print("or pass as arguments: --supabase-url and --supabase-key")
+        return 1
+    supabase, transport = create_import_client(url, key, max_retries=args.max_retries)
+    
+    try:
+        if args.recompute_only:
+            sessions = select_all(supabase, 'sessions', 'id, date, time', 'id')
+            recompute_streaks(supabase, None, session_times(sessions), args.chunk_size)
+            return 0
+        return 0 if import_attendance(supabase, marks, args.chunk_size) else 1
+    except Exception as e:
+        print(f"\n❌ Fatal error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        if transport is not None:
+            transport.report()
+
+if __name__ == '__main__':
+    exit(main())
@@ -3,45 +3,44 @@
 Import Tournament Planning Checklist Items from CSV
 
 This script reads a CSV file with default checklist items and imports them into the tournament_checklists table.
+The items are applied to every selected tournament with chunked upserts on
+(tournament_id, category, task_name), so re-running an import does not duplicate tasks.
 
 CSV Format:
     category, task_name, description, priority, due_date
 
 Usage:
     python scripts/import_checklist_items.py --csv "checklist.csv" --tournament-id "<tournament-uuid>"
+    python scripts/import_checklist_items.py --csv "checklist.csv" --tournament-id "<tournament-uuid>" --dry-run
+    python scripts/import_checklist_items.py --csv "checklist.csv" --tournament-id "<uuid-1>" "<uuid-2>"
+    python scripts/import_checklist_items.py --csv "checklist.csv" --all-upcoming --update-existing
+    python scripts/import_checklist_items.py --csv "checklist.csv" --all-upcoming --copy --database-url postgresql://postgres@localhost:54322/postgres
+    python scripts/import_checklist_items.py --csv "checklist.csv" --all-upcoming --metrics-json checklist-metrics.json
+    python scripts/import_checklist_items.py --csv "checklist.csv" --validate-only
 
 Requirements:
     pip install supabase python-dotenv
+    pip install "psycopg[binary]"  # only for --copy
 """
 
 import argparse
-import csv
 import os
-from datetime import datetime
-from typing import Optional
-from supabase import create_client
-from dotenv import load_dotenv
+import uuid
+from datetime import date
+from typing import Dict, List, Optional, Tuple
 
-# Load environment variables
-load_dotenv()
+from import_lib.backends import open_local_backend
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.columns import CHECKLIST_FIELDS
+from import_lib.dates import CHECKLIST_DATE_FORMATS, DateParser
+from import_lib import metrics
+from import_lib.lookups import LookupCache
+from import_lib.pgcopy import CHECKLIST_STAGING_COLUMNS, CopyLoader, resolve_database_url
+from import_lib.pipeline import read_csv_rows
+from import_lib.records import ChecklistItem
 
-def parse_date(date_str: str) -> Optional[str]:
-    """Parse date from DD/MM/YYYY or DD-MM-YYYY format to YYYY-MM-DD"""
-    if not date_str or date_str.strip() == '':
-        return None
-    
-    date_str = date_str.strip()
-    
-    # Try different formats
-    for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%Y-%m-%d', '%d/%m/%y', '%m/%d/%y']:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    
-    print(f"Warning: Could not parse date: {date_str}")
-    return None
+# Unique key from the tournament_checklists_tournament_category_task_key constraint
+CHECKLIST_KEY = 'tournament_id,category,task_name'
 
 def validate_category(category: str) -> bool:
     """Validate category is in allowed list"""
@@ -71,127 +70,277 @@ def validate_priority(priority: str) -> str:
     
     return 'medium'  # Default
 
-def import_checklist_items(csv_path: str, supabase, tournament_id: str):
-    """Import checklist items from CSV into Supabase"""
+@metrics.timed('parse_csv')
+def build_checklist_items(csv_path: str, dates: DateParser) -> Tuple[List[ChecklistItem], int]:
+    """Parse and validate the checklist CSV once. Returns (items, error_count)"""
+    items = []
+    error_count = 0
+    
+    # Map columns to fields once from the header
+    columns, rows = read_csv_rows(csv_path, CHECKLIST_FIELDS)
+    
+    for row_num, row in rows:
+        try:
+            # Get required fields
+            category = columns.get(row, 'category').strip() or None
+            task_name = columns.get(row, 'task_name').strip() or None
+            
+            # Validate required fields
+            if not category:
+                print(f"  Row {row_num}: Missing category")
+                error_count += 1
+                continue
+            
+            if not task_name:
+                print(f"  Row {row_num}: Missing task name")
+                error_count += 1
+                continue
+            
+            # Validate category
+            if not validate_category(category):
+                print(f"  Row {row_num}: Invalid category '{category}'")
+                error_count += 1
+                continue
+            
+            # Get optional fields
+            description = columns.get(row, 'description').strip() or None
+            priority = columns.get(row, 'priority').strip()
+            priority = validate_priority(priority) if priority else 'medium'
+            due_date = dates.parse(columns.get(row, 'due_date'), row_num)
+            
+            items.append(ChecklistItem(category, task_name, description, priority, due_date))
+        
+        except Exception as e:
+            error_count += 1
+            print(f"  [ERROR] Row {row_num}: {str(e)}")
     
+    return items, error_count
+
+def unique_tasks(items: List[ChecklistItem]) -> Tuple[List[ChecklistItem], int]:
+    """Drop repeated (category, task_name) rows, keeping the first. Returns (items, duplicates)"""
+    tasks: Dict[Tuple[str, str], ChecklistItem] = {}
+    for item in items:
+        tasks.setdefault(item.key, item)
+    return list(tasks.values()), len(items) - len(tasks)
+
+def read_checklist(csv_path: str, dates: DateParser) -> Optional[Tuple[List[ChecklistItem], int]]:
+    """Read and validate the checklist CSV before anything connects. Returns (items, error_count), None if unreadable"""
     if not os.path.exists(csv_path):
         print(f"[ERROR] CSV file not found: {csv_path}")
+        return None
+    
+    print(f"\nReading checklist items from: {csv_path}\n")
+    items, error_count = build_checklist_items(csv_path, dates)
+    
+    # Rows sharing a key in one upsert statement would be rejected by Postgres
+    items, duplicate_count = unique_tasks(items)
+    if duplicate_count:
+        print(f"  [WARNING] {duplicate_count} duplicate task(s) in the CSV, keeping the first")
+    
+    return items, error_count
+
+def checklist_rows(items: List[ChecklistItem], tournament_ids: List[str], update_existing: bool) -> List[Dict]:
+    """Cross-product of the checklist items and the tournaments"""
+    # Updates keep the status an organizer has already set
+    status = None if update_existing else 'pending'
+    return [item.to_row(tournament_id, status) for tournament_id in tournament_ids for item in items]
+
+def import_checklist_items(items: List[ChecklistItem], error_count: int, dates: DateParser, supabase, tournament_ids: List[str],
+                           chunk_size: int = 500, update_existing: bool = False):
+    """Import the checklist items read by read_checklist() into Supabase for each tournament"""
+    
+    # Check every tournament in one query instead of failing rows on their foreign key
+    tournament_ids = list(dict.fromkeys(tournament_ids))
+    found = LookupCache(supabase).load_tournaments(tournament_ids)
+    missing = [tournament_id for tournament_id in tournament_ids if tournament_id not in found]
+    if missing:
+        for tournament_id in missing:
+            print(f"[ERROR] Tournament not found: {tournament_id}")
         return False
     
-    success_count = 0
-    error_count = 0
+    rows = checklist_rows(items, tournament_ids, update_existing)
+    print(f"\nWriting {len(items)} tasks to {len(tournament_ids)} tournament(s) in chunks of {chunk_size}\n")
     
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        
-        print(f"\nReading checklist items from: {csv_path}\n")
+    new_count = 0
+    existing_count = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            # Upsert on the task key so re-running an import never duplicates tasks
+            with metrics.stage('upsert'):
+                result = (supabase.table('tournament_checklists')
+                          .upsert(chunk, on_conflict=CHECKLIST_KEY, ignore_duplicates=not update_existing)
+                          .execute())
+            
+            written = len(result.data or [])
+            metrics.count_rows(written)
+            new_count += written
+            if update_existing:
+                print(f"  [OK] Rows {start + 1}-{start + len(chunk)}: {written} written")
+            else:
+                existing_count += len(chunk) - written
+                print(f"  [OK] Rows {start + 1}-{start + len(chunk)}: {written} new, "
+                      f"{len(chunk) - written} already present")
         
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 to account for header
-            try:
-                # Get required fields (case-insensitive)
-                category = None
-                task_name = None
-                
-                # Try different possible column names
-                for col_name in row.keys():
-                    if not col_name:
-                        continue
-                    col_lower = col_name.lower()
-                    value = row[col_name]
-                    if not value:
-                        continue
-                    
-                    if 'category' in col_lower:
-                        category = value.strip()
-                    elif 'task' in col_lower or 'name' in col_lower:
-                        task_name = value.strip()
-                
-                # Validate required fields
-                if not category:
-                    print(f"  Row {row_num}: Missing category")
-                    error_count += 1
-                    continue
-                
-                if not task_name:
-                    print(f"  Row {row_num}: Missing task name")
-                    error_count += 1
-                    continue
-                
-                # Validate category
-                if not validate_category(category):
-                    print(f"  Row {row_num}: Invalid category '{category}'")
-                    error_count += 1
-                    continue
-                
-                # Get optional fields
-                description = None
-                priority = 'medium'
-                due_date = None
-                
-                for col_name, value in row.items():
-                    if not col_name:
-                        continue
-                    col_lower = col_name.lower()
-                    if 'description' in col_lower or 'detail' in col_lower:
-                        description = value.strip() if value and value.strip() else None
-                    elif 'priority' in col_lower:
-                        if value and value.strip():
-                            priority = validate_priority(value)
-                    elif 'due' in col_lower or 'date' in col_lower:
-                        if value and value.strip():
-                            due_date = parse_date(value)
-                
-                # Create checklist item
-                item_data = {
-                    'tournament_id': tournament_id,
-                    'category': category,
-                    'task_name': task_name,
-                    'description': description,
-                    'priority': priority,
-                    'status': 'pending'
-                }
-                
-                if due_date:
-                    item_data['due_date'] = due_date
-                
-                # Insert into database
-                result = supabase.table('tournament_checklists').insert(item_data).execute()
-                
-                if result.data:
-                    success_count += 1
-                    print(f"  [OK] {task_name[:50]}")
-                else:
-                    error_count += 1
-                    print(f"  [FAIL] Failed to insert: {task_name[:50]}")
-                    
-            except Exception as e:
-                error_count += 1
-                print(f"  [ERROR] Row {row_num}: {str(e)}")
+        except Exception as e:
+            error_count += len(chunk)
+            print(f"  [ERROR] Rows {start + 1}-{start + len(chunk)}: {str(e)}")
     
     print(f"\n{'='*60}")
     print(f"IMPORT COMPLETE!")
     print(f"{'='*60}")
-    print(f"Total Success: {success_count} items")
+    if update_existing:
+        print(f"Total Written: {new_count} items (new or updated)")
+    else:
+        print(f"Total New: {new_count} items")
+        print(f"Already Present: {existing_count} items")
     print(f"Total Errors: {error_count} items")
-    print(f"Tournament ID: {tournament_id}")
+    print(f"Tournament IDs: {', '.join(tournament_ids)}")
+    dates.report('due date')
     print(f"\n[SUCCESS] Checklist items imported successfully!")
     
     return error_count == 0
 
+def import_checklist_items_copy(items: List[ChecklistItem], error_count: int, dates: DateParser, database_url: str,
+                                tournament_ids: Optional[List[str]], update_existing: bool = False):
+    """Import checklist items over a direct Postgres connection in one transaction.
+    
+    The cross-product is streamed into a staging table with COPY and upserted
+    by a single statement. With no tournament_ids, every upcoming tournament is used.
+    """
+    
+    with CopyLoader(database_url) as loader:
+        if tournament_ids is None:
+            upcoming = loader.upcoming_tournaments(date.today().isoformat())
+            if not upcoming:
+                print("[ERROR] No upcoming tournaments found")
+                return False
+            print_upcoming(upcoming)
+            tournament_ids = [tournament['id'] for tournament in upcoming]
+        
+        tournament_ids = list(dict.fromkeys(tournament_ids))
+        found = loader.existing_tournaments(tournament_ids)
+        missing = [tournament_id for tournament_id in tournament_ids if tournament_id not in found]
+        if missing:
+            for tournament_id in missing:
+                print(f"[ERROR] Tournament not found: {tournament_id}")
+            return False
+        
+        # Status is set by the merge, so the staged rows leave it out
+        staged = loader.stage('checklist_items_staging', CHECKLIST_STAGING_COLUMNS,
+                              ((tournament_id,) + item.values() for tournament_id in tournament_ids for item in items))
+        print(f"  [OK] Staged {staged} rows ({len(items)} tasks x {len(tournament_ids)} tournament(s)) with COPY")
+        
+        written = loader.merge_checklist_items('checklist_items_staging', update_existing)
+    
+    print(f"\n{'='*60}")
+    print(f"IMPORT COMPLETE!")
+    print(f"{'='*60}")
+    if update_existing:
+        print(f"Total Written: {written} items (new or updated)")
+    else:
+        print(f"Total New: {written} items")
+        print(f"Already Present: {staged - written} items")
+    print(f"Total Errors: {error_count} items")
+    print(f"Tournament IDs: {', '.join(tournament_ids)}")
+    dates.report('due date')
+    print(f"\n[SUCCESS] Checklist items committed in a single transaction!")
+    
+    return error_count == 0
+
+def print_upcoming(upcoming: List[Dict]) -> None:
+    print("Upcoming tournaments:")
+    for tournament in upcoming:
+        print(f"  {tournament['start_date']}  {tournament['name']} ({tournament['id']})")
+
 def main():
     parser = argparse.ArgumentParser(description='Import tournament checklist items from CSV')
     parser.add_argument('--csv', required=True, help='Path to CSV file')
-    parser.add_argument('--tournament-id', required=True, help='Tournament UUID')
+    selector = parser.add_mutually_exclusive_group()
+    selector.add_argument('--tournament-id', nargs='+', dest='tournament_ids', metavar='TOURNAMENT_ID',
+                          help='One or more tournament UUIDs')
+    selector.add_argument('--all-upcoming', action='store_true',
+                          help='Every tournament starting today or later')
+    parser.add_argument('--chunk-size', type=int, default=500,
+                        help='Checklist rows per upsert request (default: 500)')
+    parser.add_argument('--update-existing', action='store_true',
+                        help='Overwrite description, priority and due date of tasks that already exist (status is kept)')
     parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
     parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--copy', action='store_true',
+                        help='Load with COPY over a direct Postgres connection in a single transaction (needs psycopg)')
+    parser.add_argument('--database-url',
+                        help='Postgres URL for --copy (or use DATABASE_URL env var, default: supabase/.temp/pooler-url)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Load into an in-memory stand-in database with a placeholder tournament and print the insert plan')
+    parser.add_argument('--target',
+                        help='Load into a local stand-in database file instead of Supabase (sqlite:///path/to/file.db)')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Check the CSV and report problems without connecting to the database')
+    metrics.add_arguments(parser)
     
     args = parser.parse_args()
+    if not (args.tournament_ids or args.all_upcoming or args.validate_only):
+        parser.error('one of the arguments --tournament-id --all-upcoming is required')
+    metrics.enable('import_checklist_items', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.chunk_size < 1:
+        print("[ERROR] --chunk-size must be at least 1")
+        return 1
+    
+    # Everything about the CSV is checked before anything is imported or connected
+    dates = DateParser(CHECKLIST_DATE_FORMATS)
+    checklist = read_checklist(args.csv, dates)
+    if checklist is None:
+        return 1
+    items, error_count = checklist
+    
+    if args.validate_only:
+        print(f"\n[OK] {len(items)} valid tasks, {error_count} rows with errors")
+        dates.report('due date')
+        return 0 if error_count == 0 and not dates.failures else 1
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    if args.copy:
+        if args.dry_run or args.target:
+            print("[ERROR] --copy cannot be combined with --dry-run or --target")
+            return 1
+        
+        try:
+            success = import_checklist_items_copy(items, error_count, dates, resolve_database_url(args.database_url),
+                                                  args.tournament_ids, args.update_existing)
+            return 0 if success else 1
+        except ValueError as e:
+            print(f"[ERROR] {str(e)}")
+            return 1
+        except Exception as e:
+            print(f"[FATAL] Fatal error, nothing was written: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return 1
+    
+    # Dry runs and rehearsals write to a local stand-in database
+    local = None
+    if args.dry_run or args.target:
+        try:
+            local = open_local_backend(args.target, args.dry_run)
+        except ValueError as e:
+            print(f"[ERROR] {str(e)}")
+            return 1
+        if not args.target:
+            for tournament_id in args.tournament_ids or [str(uuid.uuid4())]:
+                local.seed_placeholders(tournament_id)
     
     # Get Supabase credentials - use service role key to bypass RLS
     url = args.supabase_url or os.getenv('SUPABASE_URL')
     key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
     
-    if not url or not key:
+    if local is None and (not url or not key):
         print("[ERROR] Supabase credentials not provided")
         print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
         print("or pass as arguments: --supabase-url and --supabase-key")
@@ -205,7 +354,7 @@ def main():
         (os.getenv('SUPABASE_SERVICE_ROLE_KEY') and os.getenv('SUPABASE_SERVICE_ROLE_KEY') != os.getenv('SUPABASE_ANON_KEY'))
     )
     
-    if not is_service_role:
+    if local is None and not is_service_role:
         print("[WARNING] ⚠️  NOT using SERVICE_ROLE_KEY - Using ANON key instead!")
         print("This WILL FAIL due to Row Level Security (RLS) policies.")
         print("\nTo fix this:")
@@ -216,17 +365,36 @@ def main():
         print("Continuing anyway, but expect RLS errors...\n")
     
     # Create Supabase client
-    supabase = create_client(url, key)
+    transport = None
+    if local is not None:
+        supabase = local
+    else:
+        supabase, transport = create_import_client(url, key, max_retries=args.max_retries)
     
     # Import data
     try:
-        success = import_checklist_items(args.csv, supabase, args.tournament_id)
+        tournament_ids = args.tournament_ids
+        if args.all_upcoming:
+            upcoming = LookupCache(supabase).upcoming_tournaments(date.today().isoformat())
+            if not upcoming:
+                print("[ERROR] No upcoming tournaments found")
+                return 1
+            print_upcoming(upcoming)
+            tournament_ids = [tournament['id'] for tournament in upcoming]
+        
+        success = import_checklist_items(items, error_count, dates, supabase, tournament_ids,
+                                         args.chunk_size, args.update_existing)
         return 0 if success else 1
     except Exception as e:
         print(f"[FATAL] Fatal error: {str(e)}")
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if transport is not None:
+            transport.report()
+        if local is not None:
+            local.print_plan()
 
 if __name__ == '__main__':
     exit(main())
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the CSV import scripts in this directory.
+
+The scripts are run directly (``python scripts/<script>.py``), which puts
+``scripts/`` on ``sys.path`` so they can ``import import_lib``.
+"""
@@ -0,0 +1,604 @@
+"""
+Local SQLite stand-in for the Supabase client, for dry runs and rehearsals.
+
+The importers only talk to the database through a small slice of the
+supabase-py client: table(name) with select/eq/in_/gte/order/range/limit
+and insert/upsert, rpc(name, params), and .execute() returning an object
+with .data. That slice is the repository interface (see Backend below).
+LocalBackend implements it on SQLite, using a schema that mirrors the
+tournaments, teams, team_players, tournament_checklists and match
+scheduling columns and constraints from supabase/migrations. It also emulates the
+update_age_from_dob trigger and the import_players_bulk() and
+seed_pools_bulk() functions.
+
+Every write is recorded, so after a run print_plan() shows the exact
+requests a real import would have sent, in order, with any failures.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Protocol, Sequence
+
+from .workers import LogFn
+
+class Backend(Protocol):
+    """The part of the supabase-py Client the import scripts use"""
+    
+    def table(self, name: str) -> Any: ...
+    
+    def rpc(self, name: str, params: Dict) -> Any: ...
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    name TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'player',
+    phone TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_roles (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, role)
+);
+
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    location TEXT NOT NULL,
+    max_teams INTEGER NOT NULL DEFAULT 16,
+    status TEXT NOT NULL DEFAULT 'draft' CHECK (status IN ('draft', 'registration_open', 'in_progress', 'completed')),
+    created_by TEXT NOT NULL REFERENCES profiles(id),
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    captain_id TEXT NOT NULL REFERENCES profiles(id),
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'approved', 'registered', 'rejected')),
+    logo_url TEXT,
+    captain_name TEXT,
+    previous_experience TEXT,
+    community TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS team_players (
+    id TEXT PRIMARY KEY,
+    team_id TEXT NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL CHECK (age >= 10 AND age <= 100),
+    gender TEXT NOT NULL CHECK (gender IN ('male', 'female', 'other')),
+    email TEXT NOT NULL,
+    date_of_birth TEXT,
+    contact_number TEXT,
+    parent_contact TEXT,
+    participation_days TEXT CHECK (participation_days IN ('both_days', 'day_1', 'day_2')),
+    parental_consent INTEGER NOT NULL DEFAULT 0,
+    media_consent INTEGER NOT NULL DEFAULT 0,
+    queries_comments TEXT,
+    standard_wfdf_certificate_url TEXT,
+    advance_wfdf_certificate_url TEXT,
+    community TEXT,
+    registration_timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+    verified INTEGER NOT NULL DEFAULT 0,
+    verification_notes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS tournament_checklists (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    category TEXT NOT NULL CHECK (category IN (
+        'pre_registration', 'registration', 'pre_tournament', 'during_tournament',
+        'post_tournament', 'ceremony', 'logistics', 'rules', 'seeding',
+        'tournament', 'ops', 'social_media', 'accounts'
+    )),
+    task_name TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'completed', 'cancelled')),
+    priority TEXT NOT NULL DEFAULT 'medium' CHECK (priority IN ('low', 'medium', 'high', 'critical')),
+    assigned_to TEXT REFERENCES profiles(id),
+    due_date TEXT,
+    completed_at TEXT,
+    completed_by TEXT REFERENCES profiles(id),
+    notes TEXT,
+    vertical TEXT,
+    quantity TEXT,
+    poc_name TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS tournament_checklists_tournament_category_task_key
+    ON tournament_checklists (tournament_id, category, task_name);
+
+CREATE TABLE IF NOT EXISTS tournament_settings (
+    tournament_id TEXT PRIMARY KEY REFERENCES tournaments(id) ON DELETE CASCADE,
+    bracket_type TEXT NOT NULL DEFAULT 'round_robin' CHECK (bracket_type IN ('round_robin', 'single_elimination', 'double_elimination', 'pools')),
+    match_duration_minutes INTEGER NOT NULL DEFAULT 90,
+    break_time_minutes INTEGER NOT NULL DEFAULT 10,
+    fields TEXT,
+    start_time TEXT NOT NULL DEFAULT '09:00:00',
+    end_time TEXT NOT NULL DEFAULT '18:00:00',
+    pool_count INTEGER DEFAULT 4,
+    pool_size INTEGER DEFAULT 4,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tournament_pools (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    pool_name TEXT NOT NULL,
+    pool_type TEXT NOT NULL CHECK (pool_type IN ('pool_a', 'pool_b', 'pool_c', 'pool_d', 'final', 'semifinal', 'quarterfinal')),
+    round_number INTEGER DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'draft' CHECK (status IN ('draft', 'published', 'completed')),
+    seed_order TEXT,
+    notes TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS team_pool_assignments (
+    id TEXT PRIMARY KEY,
+    pool_id TEXT NOT NULL REFERENCES tournament_pools(id) ON DELETE CASCADE,
+    team_id TEXT NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    seed_number INTEGER,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (pool_id, team_id)
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    id TEXT PRIMARY KEY,
+    tournament_id TEXT NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    team_a_id TEXT NOT NULL REFERENCES teams(id),
+    team_b_id TEXT NOT NULL REFERENCES teams(id),
+    scheduled_time TEXT,
+    field TEXT,
+    team_a_score INTEGER DEFAULT 0,
+    team_b_score INTEGER DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'scheduled' CHECK (status IN ('scheduled', 'in_progress', 'completed', 'cancelled')),
+    pool TEXT,
+    round INTEGER DEFAULT 1,
+    bracket_position INTEGER,
+    is_final INTEGER DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS pool_standings_snapshot (
+    pool_id TEXT NOT NULL REFERENCES tournament_pools(id) ON DELETE CASCADE,
+    team_id TEXT NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    tournament_id TEXT NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    goals_for INTEGER NOT NULL DEFAULT 0,
+    goals_against INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (pool_id, team_id)
+);
+"""
+
+# SQLite has no boolean type; these are converted back to bool when read
+BOOLEAN_COLUMNS = {'parental_consent', 'media_consent', 'verified', 'is_final'}
+
+# Placeholder admin every stand-in database starts with, so fallback_user_id() resolves
+PLACEHOLDER_ADMIN_ID = '00000000-0000-0000-0000-000000000001'
+
+_IDENTIFIER = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+def _identifier(name: str) -> str:
+    name = name.strip()
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Unsupported column or table name: {name!r}")
+    return name
+
+def calculate_player_age(date_of_birth: str, today: Optional[date] = None) -> int:
+    """Same result as public.calculate_player_age(): whole years since the date of birth"""
+    today = today or date.today()
+    born = date.fromisoformat(date_of_birth[:10])
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+class PlanEntry(NamedTuple):
+    """One write request, as it would have been sent to Supabase"""
+    action: str
+    target: str
+    rows: int
+    error: Optional[str]
+
+class LocalResult:
+    def __init__(self, data: Any):
+        self.data = data
+        self.count = None
+
+class LocalQuery:
+    """Query builder mirroring the postgrest-py calls the scripts chain"""
+    
+    def __init__(self, backend: 'LocalBackend', table: str):
+        self.backend = backend
+        self.table = _identifier(table)
+        self.columns = '*'
+        self.filters: List[tuple] = []
+        self.negate_next = False
+        self.order_by: List[str] = []
+        self.limit_count: Optional[int] = None
+        self.offset = 0
+        self.payload: Optional[List[Dict]] = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+    
+    def select(self, columns: str = '*', **kwargs) -> 'LocalQuery':
+        self.columns = columns
+        return self
+    
+    def _filter(self, condition: str, params: List[Any]) -> 'LocalQuery':
+        if self.negate_next:
+            condition = f"NOT ({condition})"
+            self.negate_next = False
+        self.filters.append((condition, params))
+        return self
+    
+    @property
+    def not_(self) -> 'LocalQuery':
+        """Negate the filter applied next"""
+        self.negate_next = True
+        return self
+    
+    def eq(self, column: str, value: Any) -> 'LocalQuery':
+        return self._filter(f"{_identifier(column)} = ?", [value])
+    
+    def gte(self, column: str, value: Any) -> 'LocalQuery':
+        return self._filter(f"{_identifier(column)} >= ?", [value])
+    
+    def like(self, column: str, pattern: str) -> 'LocalQuery':
+        return self._filter(f"{_identifier(column)} LIKE ?", [pattern])
+    
+    def in_(self, column: str, values: Iterable[Any]) -> 'LocalQuery':
+        values = list(values)
+        return self._filter(f"{_identifier(column)} IN ({', '.join('?' for _ in values)})", values)
+    
+    def is_(self, column: str, value: Any) -> 'LocalQuery':
+        if value is None or value == 'null':
+            return self._filter(f"{_identifier(column)} IS NULL", [])
+        return self._filter(f"{_identifier(column)} IS ?", [value in (True, 'true')])
+    
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None,
+              **kwargs) -> 'LocalQuery':
+        # Postgres sorts NULLs as the largest values, SQLite as the smallest
+        if nullsfirst is None:
+            nullsfirst = desc
+        self.order_by.append(f"{_identifier(column)} {'DESC' if desc else 'ASC'} "
+                             f"NULLS {'FIRST' if nullsfirst else 'LAST'}")
+        return self
+    
+    def range(self, start: int, end: int) -> 'LocalQuery':
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+    
+    def limit(self, count: int) -> 'LocalQuery':
+        self.limit_count = count
+        return self
+    
+    def insert(self, payload, **kwargs) -> 'LocalQuery':
+        self.payload = payload if isinstance(payload, list) else [payload]
+        return self
+    
+    def upsert(self, payload, on_conflict: Optional[str] = None, ignore_duplicates: bool = False,
+               **kwargs) -> 'LocalQuery':
+        self.insert(payload)
+        self.on_conflict = on_conflict or 'id'
+        self.ignore_duplicates = ignore_duplicates
+        return self
+    
+    def execute(self) -> LocalResult:
+        if self.payload is not None:
+            return LocalResult(self.backend._write(self.table, self.payload, self.on_conflict,
+                                                   self.ignore_duplicates))
+        return LocalResult(self.backend._select(self))
+
+class LocalRpc:
+    def __init__(self, backend: 'LocalBackend', name: str, params: Dict):
+        self.backend = backend
+        self.name = name
+        self.params = params
+    
+    def execute(self) -> LocalResult:
+        return LocalResult(self.backend._call(self.name, self.params))
+
+class LocalBackend:
+    """SQLite database with the importers' tables, usable wherever a Supabase client is"""
+    
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self.plan: List[PlanEntry] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+        self._columns: Dict[str, List[str]] = {}
+        self._seed_admin()
+    
+    def _seed_admin(self) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO profiles (id, email, name, role) VALUES (?, 'admin@local.test', 'Local Admin', 'admin')",
+                (PLACEHOLDER_ADMIN_ID,)
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO user_roles (id, user_id, role) VALUES (?, ?, 'admin')",
+                (str(uuid.uuid4()), PLACEHOLDER_ADMIN_ID)
+            )
+    
+    def load_from(self, path: str) -> None:
+        """Replace this database's contents with a copy of another stand-in database file"""
+        source = sqlite3.connect(path)
+        try:
+            with self._lock:
+                source.backup(self._conn)
+        finally:
+            source.close()
+        self._conn.executescript(SCHEMA)
+        self._seed_admin()
+    
+    def seed_placeholders(self, tournament_id: str, team_names: Iterable[str] = ()) -> int:
+        """Create a placeholder tournament with this id and the named teams, if missing.
+        
+        Lets the scripts that expect an existing tournament rehearse against an
+        empty stand-in. Not recorded in the plan. Returns the number of teams created.
+        """
+        today = date.today().isoformat()
+        created = 0
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO tournaments (id, name, start_date, end_date, location, status, created_by) "
+                "VALUES (?, 'Dry run placeholder', ?, ?, 'To be determined', 'registration_open', ?)",
+                (tournament_id, today, today, PLACEHOLDER_ADMIN_ID)
+            )
+            existing = {row['name'] for row in self._conn.execute(
+                "SELECT name FROM teams WHERE tournament_id = ?", (tournament_id,))}
+            for team_name in dict.fromkeys(team_names):
+                if team_name and team_name not in existing:
+                    self._conn.execute(
+                        "INSERT INTO teams (id, tournament_id, name, captain_id, email, phone, status) "
+                        "VALUES (?, ?, ?, ?, 'placeholder@team.local', '0000000000', 'approved')",
+                        (str(uuid.uuid4()), tournament_id, team_name, PLACEHOLDER_ADMIN_ID)
+                    )
+                    created += 1
+        return created
+    
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+    
+    def rpc(self, name: str, params: Dict) -> LocalRpc:
+        return LocalRpc(self, name, params)
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+    
+    def _table_columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            self._columns[table] = [row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if not self._columns[table]:
+                raise Exception(f"Could not find the table 'public.{table}'")
+        return self._columns[table]
+    
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        return {key: (bool(row[key]) if key in BOOLEAN_COLUMNS and row[key] is not None else row[key])
+                for key in row.keys()}
+    
+    def _select(self, query: LocalQuery) -> List[Dict]:
+        self._table_columns(query.table)
+        columns = '*' if query.columns.strip() == '*' else ', '.join(
+            _identifier(column) for column in query.columns.split(','))
+        sql = f"SELECT {columns} FROM {query.table}"
+        params: List[Any] = []
+        if query.filters:
+            sql += " WHERE " + " AND ".join(clause for clause, _ in query.filters)
+            for _, values in query.filters:
+                params.extend(values)
+        if query.order_by:
+            sql += " ORDER BY " + ", ".join(query.order_by)
+        if query.limit_count is not None or query.offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([query.limit_count if query.limit_count is not None else -1, query.offset])
+        
+        with self._lock:
+            return [self._to_dict(row) for row in self._conn.execute(sql, params)]
+    
+    def _prepare_row(self, table: str, row: Dict) -> Dict:
+        """Fill the id default and apply the team_players triggers and checks"""
+        row = dict(row)
+        if 'id' in self._table_columns(table):
+            row.setdefault('id', str(uuid.uuid4()))
+        if table == 'team_players' and row.get('date_of_birth'):
+            if row['date_of_birth'] > date.today().isoformat():
+                raise Exception('new row for relation "team_players" violates check constraint "check_date_of_birth"')
+            # update_age_from_dob trigger
+            row['age'] = calculate_player_age(row['date_of_birth'])
+        return row
+    
+    def _insert_rows(self, table: str, rows: Sequence[Dict], on_conflict: Optional[str] = None,
+                     ignore_duplicates: bool = False) -> List[Dict]:
+        """Insert rows, returning those written (rows skipped by ignore_duplicates are left out)"""
+        columns = self._table_columns(table)
+        inserted: List[Dict] = []
+        for row in rows:
+            unknown = [key for key in row if key not in columns]
+            if unknown:
+                raise Exception(f"Could not find the '{unknown[0]}' column of '{table}' in the schema cache")
+            
+            keys = [_identifier(key) for key in row]
+            sql = f"INSERT INTO {table} ({', '.join(keys)}) VALUES ({', '.join('?' for _ in keys)})"
+            if on_conflict:
+                conflict = [_identifier(column) for column in on_conflict.split(',')]
+                updates = [key for key in keys if key not in conflict and key != 'id']
+                sql += f" ON CONFLICT ({', '.join(conflict)}) DO " + (
+                    "UPDATE SET " + ", ".join(f"{key} = excluded.{key}" for key in updates)
+                    if updates and not ignore_duplicates else "NOTHING")
+            if self._conn.execute(sql, [row[key] for key in row]).rowcount:
+                inserted.append(row)
+        return inserted
+    
+    def _write(self, table: str, payload: List[Dict], on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False) -> List[Dict]:
+        """Insert all rows in one transaction, like a single PostgREST request"""
+        action = 'UPSERT' if on_conflict else 'INSERT'
+        try:
+            rows = [self._prepare_row(table, row) for row in payload]
+            with self._lock, self._conn:
+                inserted = self._insert_rows(table, rows, on_conflict, ignore_duplicates)
+        except Exception as e:
+            self._record(action, table, len(payload), str(e))
+            raise Exception(str(e)) from e
+        
+        self._record(action, table, len(payload), None)
+        return inserted
+    
+    def _call(self, name: str, params: Dict) -> Any:
+        functions = {'import_players_bulk': self._import_players_bulk, 'seed_pools_bulk': self._seed_pools_bulk}
+        if name not in functions:
+            raise Exception(f"Could not find the function public.{name} in the schema cache")
+        return functions[name](name, params)
+    
+    def _import_players_bulk(self, name: str, params: Dict) -> int:
+        players = params['_players']
+        try:
+            # Same validation and defaults as the SQL function, all or nothing
+            for position, player in enumerate(players, start=1):
+                reason = None
+                if not (player.get('name') or '').strip():
+                    reason = 'missing name'
+                elif player.get('gender') not in ('male', 'female', 'other'):
+                    reason = 'invalid gender'
+                elif (player.get('participation_days') or 'both_days') not in ('both_days', 'day_1', 'day_2'):
+                    reason = 'invalid participation_days'
+                if reason:
+                    raise Exception(f"import_players_bulk: player {position} ({player.get('name') or 'no name'}) has {reason}")
+            
+            rows = []
+            for player in players:
+                row = {key: value for key, value in player.items() if value is not None}
+                row['team_id'] = params['_team_id']
+                row['age'] = calculate_player_age(row['date_of_birth']) if row.get('date_of_birth') else 20
+                row.setdefault('email', f"{row['name'].replace(' ', '_').lower()}@temp.ultimate.local")
+                row.setdefault('participation_days', 'both_days')
+                row.setdefault('registration_timestamp', datetime.now().isoformat())
+                row['verified'] = False
+                rows.append(self._prepare_row('team_players', row))
+            
+            with self._lock, self._conn:
+                self._insert_rows('team_players', rows)
+        except Exception as e:
+            self._record('RPC', name, len(players), str(e))
+            raise Exception(str(e)) from e
+        
+        self._record('RPC', name, len(players), None)
+        return len(rows)
+    
+    def _seed_pools_bulk(self, name: str, params: Dict) -> int:
+        """Create the new pools, then replace the tournament's pool play assignments and seed_order, all or nothing"""
+        assignments = params['_assignments']
+        try:
+            with self._lock, self._conn:
+                self._insert_rows('tournament_pools', [
+                    self._prepare_row('tournament_pools', dict(pool, tournament_id=params['_tournament_id'],
+                                                               status='draft'))
+                    for pool in params.get('_new_pools') or []])
+                pool_ids = {row['id'] for row in self._conn.execute(
+                    "SELECT id FROM tournament_pools WHERE tournament_id = ? AND pool_type LIKE 'pool\\_%' ESCAPE '\\'",
+                    (params['_tournament_id'],))}
+                for assignment in assignments:
+                    if assignment['pool_id'] not in pool_ids:
+                        raise Exception(f"seed_pools_bulk: pool {assignment['pool_id']} is not a pool play pool "
+                                        f"of tournament {params['_tournament_id']}")
+                self._conn.execute(
+                    f"DELETE FROM team_pool_assignments WHERE pool_id IN ({', '.join('?' for _ in pool_ids)})",
+                    list(pool_ids))
+                self._insert_rows('team_pool_assignments', [self._prepare_row('team_pool_assignments', assignment)
+                                                            for assignment in assignments])
+                seed_order: Dict[str, List] = {}
+                for assignment in sorted(assignments, key=lambda assignment: assignment['seed_number']):
+                    seed_order.setdefault(assignment['pool_id'], []).append(assignment['team_id'])
+                for pool_id, team_ids in seed_order.items():
+                    self._conn.execute("UPDATE tournament_pools SET seed_order = ?, updated_at = CURRENT_TIMESTAMP "
+                                       "WHERE id = ?", (json.dumps(team_ids), pool_id))
+        except Exception as e:
+            self._record('RPC', name, len(assignments), str(e))
+            raise Exception(str(e)) from e
+        
+        self._record('RPC', name, len(assignments), None)
+        return len(assignments)
+    
+    def _record(self, action: str, target: str, rows: int, error: Optional[str]) -> None:
+        with self._lock:
+            self.plan.append(PlanEntry(action, target, rows, error))
+    
+    def print_plan(self, log: LogFn = print) -> None:
+        """Print every write request in order, folding identical consecutive requests"""
+        log(f"\n{'='*60}")
+        log(f"📝 INSERT PLAN ({len(self.plan)} requests)")
+        log(f"{'='*60}")
+        
+        runs: List[List] = []
+        for entry in self.plan:
+            if runs and runs[-1][0] == entry and entry.error is None:
+                runs[-1][1] += 1
+            else:
+                runs.append([entry, 1])
+        
+        for entry, repeat in runs:
+            noun = 'row' if entry.rows == 1 else 'rows'
+            line = f"  {entry.action} {entry.target}: {entry.rows} {noun}"
+            if repeat > 1:
+                line += f" x {repeat}"
+            if entry.error:
+                line += f"  ❌ {entry.error}"
+            log(line)
+        
+        totals: Dict[str, List[int]] = {}
+        for entry in self.plan:
+            counts = totals.setdefault(f"{entry.action} {entry.target}", [0, 0])
+            counts[0 if entry.error is None else 1] += entry.rows
+        log("")
+        for target, (written, failed) in totals.items():
+            log(f"  {target}: {written} written, {failed} in failed requests")
+
+def open_local_backend(target: Optional[str], dry_run: bool = False) -> LocalBackend:
+    """Open the stand-in database for --target sqlite:///path and/or --dry-run.
+    
+    With --dry-run alone the database lives in memory. With --dry-run and a
+    file target, the file is copied into memory first so it is left unchanged.
+    """
+    path = ':memory:'
+    if target:
+        if not target.startswith('sqlite://'):
+            raise ValueError(f"Unsupported target {target!r}, expected sqlite:///path/to/file.db")
+        path = target[len('sqlite:///'):] if target.startswith('sqlite:///') else ''
+        path = path or ':memory:'
+    
+    if dry_run and path != ':memory:':
+        if not os.path.exists(path):
+            raise ValueError(f"Target database does not exist: {path}")
+        backend = LocalBackend(':memory:')
+        backend.load_from(path)
+        return backend
+    
+    return LocalBackend(path)
@@ -0,0 +1,146 @@
+"""
+Batch mode: import a season of registration CSVs in one run.
+
+A batch is a list of ImportJobs, one per CSV file and tournament, read from
+a manifest or from every CSV in a directory. map_in_processes() parses the
+files in a process pool, so parsing and normalization use every core, and
+hands the parsed files back in job order. The main process writes them one
+after another through a single client, so every file shares the same
+connection pool and the same adaptive rate limit (see client.py).
+
+A manifest is a CSV file with a header row:
+
+    csv,tournament_name,tournament_date
+    registrations/udaan.csv,UDAAN 2025,15/02/2025
+    registrations/monsoon.csv,Monsoon Hat,
+
+Relative paths are resolved against the manifest's directory; an empty
+tournament_date falls back to --tournament-date.
+"""
+
+import csv
+import os
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, TypeVar
+
+from .pipeline import ImportStats
+from .workers import LogFn
+
+J = TypeVar('J')
+T = TypeVar('T')
+
+MANIFEST_COLUMNS = ('csv', 'tournament_name', 'tournament_date')
+
+class ImportJob(NamedTuple):
+    """One CSV file and the tournament its players belong to"""
+    csv_path: str
+    tournament_name: str
+    tournament_date: Optional[str] = None
+
+class BatchResult(NamedTuple):
+    """How one job of a batch went; error is set if the file could not be imported at all"""
+    job: ImportJob
+    tournament_id: Optional[str]
+    stats: ImportStats
+    unparsed_dates: int = 0
+    error: Optional[str] = None
+
+def read_manifest(manifest_path: str, tournament_date: Optional[str] = None) -> List[ImportJob]:
+    """Jobs from a manifest CSV (see MANIFEST_COLUMNS), in file order"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs: List[ImportJob] = []
+    
+    with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        header = [name.strip().lower() for name in reader.fieldnames or []]
+        missing = [name for name in MANIFEST_COLUMNS[:2] if name not in header]
+        if missing:
+            raise ValueError(f"Manifest {manifest_path} has no column for: {', '.join(missing)}")
+        reader.fieldnames = header
+        
+        for line_num, entry in enumerate(reader, start=2):
+            csv_path = (entry.get('csv') or '').strip()
+            tournament_name = (entry.get('tournament_name') or '').strip()
+            if not csv_path and not tournament_name:
+                continue
+            if not csv_path or not tournament_name:
+                raise ValueError(f"Manifest row {line_num} needs both a csv and a tournament_name")
+            jobs.append(ImportJob(os.path.join(base_dir, csv_path), tournament_name,
+                                  (entry.get('tournament_date') or '').strip() or tournament_date))
+    
+    return check_jobs(jobs, manifest_path)
+
+def jobs_from_directory(directory: str, tournament_date: Optional[str] = None) -> List[ImportJob]:
+    """One job per *.csv file in the directory, in name order, each named after its file"""
+    if not os.path.isdir(directory):
+        raise ValueError(f"{directory} is not a directory")
+    
+    jobs = [ImportJob(os.path.join(directory, name), os.path.splitext(name)[0], tournament_date)
+            for name in sorted(os.listdir(directory)) if name.lower().endswith('.csv')]
+    return check_jobs(jobs, directory)
+
+def check_jobs(jobs: List[ImportJob], source: str) -> List[ImportJob]:
+    """Fail before anything is written if the batch is empty or names files that do not exist"""
+    if not jobs:
+        raise ValueError(f"No CSV files to import in {source}")
+    
+    missing = [job.csv_path for job in jobs if not os.path.isfile(job.csv_path)]
+    if missing:
+        raise ValueError(f"CSV file(s) not found: {', '.join(missing)}")
+    return jobs
+
+def map_in_processes(fn: Callable[[J], T], jobs: Iterable[J], processes: int = 1) -> Iterator[T]:
+    """Yield fn(job) for every job, in order, computing up to `processes * 2` results ahead.
+    
+    With processes == 1 jobs run one after another in this process. Otherwise
+    fn and its results must be picklable, so fn has to be a module-level
+    function (or a functools.partial of one).
+    """
+    if processes <= 1:
+        for job in jobs:
+            yield fn(job)
+        return
+    
+    # multiprocessing is slow to import and only needed here
+    from concurrent.futures import ProcessPoolExecutor
+    
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_flight: Deque = deque()
+        
+        for job in jobs:
+            in_flight.append(executor.submit(fn, job))
+            if len(in_flight) >= processes * 2:
+                yield in_flight.popleft().result()
+        
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def print_batch_summary(results: List[BatchResult], log: LogFn = print) -> None:
+    """One line per file, then the totals across every tournament in the batch"""
+    failed = [result for result in results if result.error is not None]
+    tournaments = {result.tournament_id for result in results if result.tournament_id}
+    
+    log(f"\n{'='*60}")
+    log(f"🎉 BATCH IMPORT COMPLETE: {len(results)} files, {len(tournaments)} tournaments")
+    log(f"{'='*60}\n")
+    
+    for result in results:
+        file_name = os.path.basename(result.job.csv_path)
+        if result.error is not None:
+            log(f"  ❌ {result.job.tournament_name} ({file_name}): {result.error}")
+            continue
+        stats = result.stats
+        log(f"  {result.job.tournament_name} ({file_name}): {len(stats.teams)} teams, "
+            f"{stats.total('success')} successful, {stats.total('errors')} errors, "
+            f"{stats.total('skipped')} skipped")
+    
+    log(f"\nTotal Teams: {sum(len(result.stats.teams) for result in results)}")
+    log(f"Total Success: {sum(result.stats.total('success') for result in results)} players")
+    log(f"Total Errors: {sum(result.stats.total('errors') for result in results)} players")
+    log(f"Total Skipped (already imported): {sum(result.stats.total('skipped') for result in results)} players")
+    
+    unparsed = sum(result.unparsed_dates for result in results)
+    if unparsed:
+        log(f"⚠️  {unparsed} dates could not be parsed (see each file's output above)")
+    if failed:
+        log(f"\n❌ {len(failed)} of {len(results)} files could not be imported")
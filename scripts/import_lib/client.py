@@ -0,0 +1,96 @@
+"""
+Supabase client for the import scripts, with retries and adaptive concurrency.
+
+Every PostgREST request goes through RetryTransport (transport.py), which
+keeps a pool of keep-alive connections and retries rate-limited (429) and
+failed (5xx) requests with jittered exponential backoff. An AIMD limiter caps the
+requests in flight: it grows by one for every window of successful
+requests and halves when the server pushes back, so parallel workers
+settle at the fastest rate the project's limits allow.
+
+Writes are only retried when that cannot duplicate rows: after a 429 or
+503 (the request was turned away), after a connection error (it was never
+sent), or when the write is an upsert. Plain inserts that fail with an
+ambiguous 500/502/504 are left to the caller's error handling.
+"""
+
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from .workers import log_line
+
+if TYPE_CHECKING:
+    from .transport import RetryTransport
+
+# Retries after the first attempt
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+class AdaptiveLimiter:
+    """AIMD cap on requests in flight: +1 per window of successes, halved on push back"""
+    
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.limit = float(minimum)
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+    
+    def acquire(self) -> float:
+        """Wait for a free slot. Returns the start time to pass to release()"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+    
+    def release(self, started: float, throttled: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                # Requests already in flight at the last decrease saw the old limit; count one decrease per round
+                if started > self._last_decrease:
+                    self.limit = max(float(self.minimum), self.limit / 2)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it gives one in seconds"""
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def create_import_client(url: str, key: str, max_concurrency: int = 1,
+                         max_retries: int = DEFAULT_MAX_RETRIES) -> Tuple[object, Optional['RetryTransport']]:
+    """Create a Supabase client whose requests go through a RetryTransport.
+    
+    Returns (client, transport). supabase-py releases that cannot take a
+    custom HTTP client get a plain client and None.
+    """
+    # httpx and supabase take most of a script's startup time, so they are only imported to connect
+    import httpx
+    from supabase import ClientOptions, create_client
+    
+    from .transport import RetryTransport
+    
+    transport = RetryTransport(max_concurrency, max_retries)
+    http_client = httpx.Client(transport=transport, timeout=httpx.Timeout(120.0, connect=10.0),
+                               follow_redirects=True)
+    try:
+        options = ClientOptions(httpx_client=http_client)
+    except TypeError:
+        http_client.close()
+        log_line("⚠️  This supabase-py version cannot use a custom HTTP client; requests will not be retried")
+        return create_client(url, key), None
+    return create_client(url, key, options=options), transport
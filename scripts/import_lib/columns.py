@@ -0,0 +1,86 @@
+"""
+Declarative column aliases and a header resolver for the import CSVs.
+
+Google Forms exports use long bilingual headers such as
+'Team Name (टीम का नाम):', and hand-made sheets use the short English or
+Hindi form. Instead of trying every alias on every row, HeaderResolver
+inspects the header once and maps each field to the column indices that
+carry it. Rows are then read by tuple index.
+
+A field matches a column when the stripped, lowercased header equals one
+of its aliases, or (for the loosely formatted checklist sheets) contains
+one of its keywords. Each column is claimed by the first field, in table
+order, that matches it.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+class FieldSpec(NamedTuple):
+    aliases: Tuple[str, ...] = ()
+    keywords: Tuple[str, ...] = ()
+
+# Registration exports read by import_tournament_complete.py and import_tournament_players.py
+PLAYER_FIELDS: Dict[str, FieldSpec] = {
+    'timestamp': FieldSpec(('Timestamp',)),
+    'team_name': FieldSpec(('Team Name (टीम का नाम):', 'Team Name', 'टीम का नाम:')),
+    'community': FieldSpec(('Community (समुदाय):', 'Community', 'समुदाय:')),
+    'player_name': FieldSpec(('Player Full Name ( खिलाड़ी पूरा का नाम):', 'Player Full Name', 'खिलाड़ी पूरा का नाम:')),
+    'gender': FieldSpec(('Gender (लिंग):', 'Gender')),
+    'date_of_birth': FieldSpec(('Date of Birth (DOB) (जन्म तिथि):', 'Date of Birth', 'DOB')),
+    'contact_number': FieldSpec(('Contact Number (संपर्क नंबर):',)),
+    'parent_contact': FieldSpec(('Parents Contact Number (संपर्क नंबर):',)),
+    'participation_days': FieldSpec(('Participating on which day?(किस दिन भाग ले रहे हैं?)', 'Participating day')),
+    'permissions': FieldSpec(('Permissions (अनुमतियाँ):', 'Permissions')),
+    'queries': FieldSpec(('Any Queries or Comments (कोई प्रश्न या टिप्पणी):', 'Queries')),
+    'standard_certificate': FieldSpec(('Standard WFDF Accreditation Certificate',)),
+    'advance_certificate': FieldSpec(('Advance WFDF Accreditation Certificate',)),
+}
+
+# Checklist sheets read by import_checklist_items.py
+CHECKLIST_FIELDS: Dict[str, FieldSpec] = {
+    'category': FieldSpec(keywords=('category',)),
+    'task_name': FieldSpec(keywords=('task', 'name')),
+    'description': FieldSpec(keywords=('description', 'detail')),
+    'priority': FieldSpec(keywords=('priority',)),
+    'due_date': FieldSpec(keywords=('due', 'date')),
+}
+
+# Attendance sheets read by import_attendance.py; a session is given by id, or by date (plus time or location)
+ATTENDANCE_FIELDS: Dict[str, FieldSpec] = {
+    'child': FieldSpec(('Child', 'Child Name', 'Name', 'child_id', 'child_name')),
+    'session_id': FieldSpec(('Session ID', 'session_id')),
+    'session_date': FieldSpec(('Date', 'Session Date', 'session_date')),
+    'session_time': FieldSpec(('Time', 'Session Time', 'session_time')),
+    'location': FieldSpec(('Location',)),
+    'present': FieldSpec(('Present', 'Attendance', 'Attended')),
+}
+
+class HeaderResolver:
+    """Field -> column index mapping built once from a CSV header"""
+    
+    def __init__(self, header: Sequence[str], fields: Dict[str, FieldSpec]):
+        self.header = list(header)
+        indices: Dict[str, List[int]] = {field: [] for field in fields}
+        
+        for index, column in enumerate(self.header):
+            column_key = (column or '').strip().lower()
+            if not column_key:
+                continue
+            for field, spec in fields.items():
+                if (column_key in (alias.strip().lower() for alias in spec.aliases) or
+                        any(keyword in column_key for keyword in spec.keywords)):
+                    indices[field].append(index)
+                    break
+        
+        self._indices: Dict[str, Tuple[int, ...]] = {field: tuple(found) for field, found in indices.items()}
+    
+    def get(self, row: Sequence[str], field: str) -> str:
+        """First non-empty value of the field in a row, or '' if there is none"""
+        for index in self._indices[field]:
+            if index < len(row) and row[index]:
+                return row[index]
+        return ''
+    
+    def missing(self, fields: Iterable[str]) -> List[str]:
+        """Fields that no column in the header maps to"""
+        return [field for field in fields if not self._indices[field]]
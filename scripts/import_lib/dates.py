@@ -0,0 +1,159 @@
+"""
+Fast, memoized date parsing for the importers.
+
+The scripts used to loop through up to six datetime.strptime formats per
+value, using exceptions for control flow. DateParser instead matches each
+supported format with a precompiled regex and range-checks the parts
+directly. Results are memoized per raw string, since registration exports
+repeat the same handful of dates many times.
+
+Once a format reads a value that no other format could (a day above 12,
+say), it is locked in and tried first for the rest of the file. A value
+the locked format reads is still checked against the formats of the same
+shape that come before it, so ambiguous dates such as 05/07/2010 always
+follow the configured priority order, whichever row the file starts with.
+Values that cannot be parsed are collected with their row numbers and
+reported once at the end instead of warning inline for every row.
+"""
+
+import calendar
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional, Pattern, Sequence, Tuple
+
+from .metrics import timed
+
+# Formats accepted for dates of birth and tournament dates, in priority order
+DATE_FORMATS: Tuple[str, ...] = ('%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%Y-%m-%d')
+
+# Checklist sheets also use two-digit years
+CHECKLIST_DATE_FORMATS: Tuple[str, ...] = DATE_FORMATS + ('%d/%m/%y', '%m/%d/%y')
+
+# Date part of Google Forms 'Timestamp' values
+TIMESTAMP_FORMATS: Tuple[str, ...] = ('%m/%d/%Y', '%d/%m/%Y')
+
+# Time part of a Forms timestamp: 24-hour H:MM[:SS], or 12-hour with AM/PM
+_TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([AaPp])\.?[Mm]\.?)?$')
+
+_PART_PATTERNS = {'%d': r'(\d{1,2})', '%m': r'(\d{1,2})', '%Y': r'(\d{4})', '%y': r'(\d{2})'}
+
+def _compile(fmt: str) -> Tuple[Pattern, Tuple[str, ...]]:
+    """Turn a strptime format built from %d, %m, %Y and %y into (regex, part order)"""
+    parts = tuple(re.findall(r'%[dmYy]', fmt))
+    pattern = re.escape(fmt)
+    for part in parts:
+        pattern = pattern.replace(re.escape(part), _PART_PATTERNS[part], 1)
+    return (re.compile(pattern + '$'), parts)
+
+@lru_cache(maxsize=4096)
+def parse_time_of_day(value: str) -> Optional[str]:
+    """HH:MM:SS from a time of day such as '9:00' or '4:30 PM', or None if it cannot be read"""
+    match = _TIME_PATTERN.match(value.strip())
+    if not match:
+        return None
+    hour, minute, second = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+    if match.group(4):
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if match.group(4) in 'Pp' else 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}:{second:02d}"
+
+def _parse_time(value: str) -> str:
+    """HH:MM:SS from a time of day, or midnight if it cannot be read"""
+    return parse_time_of_day(value) or '00:00:00'
+
+def timestamp_key(value: str) -> str:
+    """Comparable 'YYYY-MM-DDTHH:MM:SS' form of an ISO timestamp from the database or the command line"""
+    key = value.strip().replace(' ', 'T', 1)[:19]
+    return key + 'T00:00:00' if len(key) == 10 else key
+
+def _to_iso(match: re.Match, parts: Tuple[str, ...]) -> Optional[str]:
+    values = dict(zip(parts, (int(group) for group in match.groups())))
+    day, month = values['%d'], values['%m']
+    if '%Y' in values:
+        year = values['%Y']
+    else:
+        # Same pivot as strptime: 69-99 -> 1900s, 00-68 -> 2000s
+        year = values['%y'] + (1900 if values['%y'] >= 69 else 2000)
+    
+    if year < 1 or not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+class DateParser:
+    """Parses one file's dates to YYYY-MM-DD, remembering the format that works"""
+    
+    def __init__(self, formats: Sequence[str] = DATE_FORMATS, cache_size: int = 4096):
+        self._formats: List[Tuple[Pattern, Tuple[str, ...]]] = [_compile(fmt) for fmt in formats]
+        # Formats can only both match a value if they have the same shape, like %d/%m/%Y and %m/%d/%Y
+        self._rivals: List[List[int]] = [
+            [other for other, (pattern, _) in enumerate(self._formats)
+             if other != index and pattern.pattern == self._formats[index][0].pattern]
+            for index in range(len(self._formats))]
+        self._locked: Optional[int] = None
+        self.failures: List[Tuple[Optional[int], str]] = []
+        # Results do not depend on the locked format, so caching across lock-in is safe
+        self._parse_cached: Callable[[str], Optional[str]] = lru_cache(maxsize=cache_size)(self._parse_uncached)
+    
+    def _parse_with(self, index: int, value: str) -> Optional[str]:
+        pattern, parts = self._formats[index]
+        match = pattern.match(value)
+        return _to_iso(match, parts) if match else None
+    
+    def _parse_uncached(self, value: str) -> Optional[str]:
+        if self._locked is not None:
+            parsed = self._parse_with(self._locked, value)
+            if parsed:
+                # A format of the same shape earlier in the priority order wins, as it would unlocked
+                for rival in self._rivals[self._locked]:
+                    if rival < self._locked:
+                        earlier = self._parse_with(rival, value)
+                        if earlier:
+                            return earlier
+                return parsed
+        
+        for index in range(len(self._formats)):
+            parsed = self._parse_with(index, value)
+            if parsed:
+                # Only lock in a format that was the sole reading of the value
+                if self._locked is None and not any(self._parse_with(rival, value) for rival in self._rivals[index]):
+                    self._locked = index
+                return parsed
+        
+        return None
+    
+    @timed('parse_date')
+    def parse(self, value: Optional[str], row_num: Optional[int] = None) -> Optional[str]:
+        """Parse a date to YYYY-MM-DD. Empty values give None; bad values are recorded"""
+        if not value:
+            return None
+        value = value.strip()
+        if not value:
+            return None
+        
+        parsed = self._parse_cached(value)
+        if parsed is None:
+            self.failures.append((row_num, value))
+        return parsed
+    
+    def parse_timestamp(self, value: Optional[str], row_num: Optional[int] = None) -> Optional[str]:
+        """Parse a 'M/D/YYYY HH:MM:SS' style timestamp to an ISO datetime, midnight if it has no time"""
+        if not value or not value.strip():
+            return None
+        date_part, _, time_part = value.strip().partition(' ')
+        parsed = self.parse(date_part, row_num)
+        return f"{parsed}T{_parse_time(time_part)}" if parsed else None
+    
+    def report(self, label: str, log: Callable[[str], None] = print, limit: int = 20) -> None:
+        """Print the values that could not be parsed, once, with their row numbers"""
+        if not self.failures:
+            return
+        
+        log(f"\n⚠️  Could not parse {len(self.failures)} {label} value(s):")
+        for row_num, value in self.failures[:limit]:
+            where = f"Row {row_num}" if row_num is not None else "Value"
+            log(f"    {where}: {value!r}")
+        if len(self.failures) > limit:
+            log(f"    ... and {len(self.failures) - limit} more")
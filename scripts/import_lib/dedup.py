@@ -0,0 +1,323 @@
+"""
+Import-time duplicate player detection with a blocking index.
+
+Comparing every player with every other one is O(n^2). Instead each player
+gets a few blocking keys: a phonetic key of the name (Devanagari spellings
+are transliterated first, so 'राहुल' and 'Rahul' land together), each
+normalized phone number, and the date of birth. Only players that share a
+block are compared, with a Levenshtein similarity as in
+DuplicateDetectionDialog.tsx, so a 5k-row file costs a few thousand
+comparisons instead of 12.5 million.
+
+DuplicateFilter runs inside the streaming pipeline. Players already on
+the tournament's teams are indexed up front, and every CSV row is checked
+against them and against the rows before it, before anything is written.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .journal import PAGE_SIZE
+from .metrics import timed
+from .pipeline import ImportStats, PendingPlayer
+from .workers import LogFn
+
+DEDUP_MODES = ('flag', 'skip')
+
+# Blocks larger than this are not extended (e.g. a placeholder phone shared by many rows)
+MAX_BLOCK_SIZE = 50
+
+# Long and short vowels romanize alike, as they usually do in English spellings of names
+_DEVANAGARI_VOWELS = {
+    'अ': 'a', 'आ': 'a', 'इ': 'i', 'ई': 'i', 'उ': 'u', 'ऊ': 'u', 'ऋ': 'ri',
+    'ए': 'e', 'ऐ': 'ai', 'ओ': 'o', 'औ': 'au',
+}
+_DEVANAGARI_MATRAS = {
+    'ा': 'a', 'ि': 'i', 'ी': 'i', 'ु': 'u', 'ू': 'u', 'ृ': 'ri',
+    'े': 'e', 'ै': 'ai', 'ो': 'o', 'ौ': 'au',
+}
+_DEVANAGARI_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n',
+    'च': 'ch', 'छ': 'chh', 'ज': 'j', 'झ': 'jh', 'ञ': 'n',
+    'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n',
+    'त': 't', 'थ': 'th', 'द': 'd', 'ध': 'dh', 'न': 'n',
+    'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh', 'म': 'm',
+    'य': 'y', 'र': 'r', 'ल': 'l', 'व': 'v', 'श': 'sh', 'ष': 'sh', 'स': 's', 'ह': 'h',
+    'क़': 'q', 'ख़': 'kh', 'ग़': 'g', 'ज़': 'z', 'ड़': 'r', 'ढ़': 'rh', 'फ़': 'f', 'य़': 'y',
+}
+# Nukta letters are keyed in decomposed form (consonant + nukta), as NFC leaves them
+_DEVANAGARI_CONSONANTS = {unicodedata.normalize('NFC', letter): latin for letter, latin in _DEVANAGARI_CONSONANTS.items()}
+_VIRAMA = '्'
+_NUKTA = '़'
+_NASALS = {'ं': 'n', 'ँ': 'n', 'ः': 'h'}
+
+# Romanization variants folded together by the phonetic key, longest first
+_PHONETIC_REPLACEMENTS = (
+    ('chh', 'c'), ('ph', 'f'), ('sh', 's'), ('kh', 'k'), ('gh', 'g'), ('ch', 'c'), ('jh', 'j'),
+    ('th', 't'), ('dh', 'd'), ('bh', 'b'), ('ck', 'k'), ('w', 'v'), ('z', 'j'), ('q', 'k'), ('x', 'ks'),
+)
+
+class PlayerIdentity(NamedTuple):
+    """What two players are compared on"""
+    label: str
+    name: str
+    name_key: str
+    phones: FrozenSet[str]
+    date_of_birth: Optional[str]
+
+class DuplicateMatch(NamedTuple):
+    player: PendingPlayer
+    original: str
+    reason: str
+    confidence: int
+
+def transliterate(text: str) -> str:
+    """Romanize Devanagari letters, dropping the inherent vowel where Hindi drops it at word end"""
+    # Precomposed nukta letters (e.g. U+095B) are composition exclusions, so NFC splits them
+    text = unicodedata.normalize('NFC', text)
+    out: List[str] = []
+    inherent = False
+    
+    for index, char in enumerate(text):
+        following = text[index + 1] if index + 1 < len(text) else ''
+        if following == _NUKTA and char + _NUKTA in _DEVANAGARI_CONSONANTS:
+            char = char + _NUKTA
+        elif char == _NUKTA:
+            continue
+        
+        if char in _DEVANAGARI_CONSONANTS:
+            if inherent:
+                out.append('a')
+            out.append(_DEVANAGARI_CONSONANTS[char])
+            inherent = True
+        elif char in _DEVANAGARI_MATRAS:
+            out.append(_DEVANAGARI_MATRAS[char])
+            inherent = False
+        elif char == _VIRAMA:
+            inherent = False
+        else:
+            # Inherent 'a' is dropped before a word break (schwa deletion)
+            inherent = False
+            out.append(_DEVANAGARI_VOWELS.get(char) or _NASALS.get(char) or char)
+    
+    return ''.join(out)
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """Lowercase Latin form of a name with punctuation and extra spaces removed"""
+    latin = transliterate(name or '').lower()
+    return ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', latin).split())
+
+@lru_cache(maxsize=65536)
+def phonetic_key(name: str) -> str:
+    """Spelling-insensitive key of a normalized name: folded consonants, no inner vowels, sorted tokens"""
+    tokens = []
+    for token in name.split():
+        for old, new in _PHONETIC_REPLACEMENTS:
+            token = token.replace(old, new)
+        first = 'a' if token[0] in 'aeiouy' else token[0]
+        rest = re.sub(r'[aeiouyh]', '', token[1:])
+        key = re.sub(r'(.)\1+', r'\1', first + rest)
+        tokens.append(key)
+    return ' '.join(sorted(tokens))
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """Last ten digits of a phone number, or '' if it has fewer or is a placeholder"""
+    digits = re.sub(r'\D', '', phone or '')[-10:]
+    if len(digits) < 10 or len(set(digits)) == 1:
+        return ''
+    return digits
+
+def name_similarity(name1: str, name2: str, minimum: float = 0.0) -> float:
+    """Levenshtein similarity, as calculateSimilarity() in DuplicateDetectionDialog.tsx.
+    
+    Gives up early, returning 0.0, once the similarity is certain to be
+    at or below `minimum`.
+    """
+    longer, shorter = (name1, name2) if len(name1) > len(name2) else (name2, name1)
+    if not longer:
+        return 1.0
+    if longer == shorter:
+        return 1.0
+    
+    max_distance = len(longer) * (1 - minimum)
+    if len(longer) - len(shorter) >= max_distance:
+        return 0.0
+    
+    # A shared prefix or suffix (often the surname) does not change the distance
+    start = 0
+    while start < len(shorter) and longer[start] == shorter[start]:
+        start += 1
+    end = 0
+    while end < len(shorter) - start and longer[-1 - end] == shorter[-1 - end]:
+        end += 1
+    longer_rest, shorter_rest = longer[start:len(longer) - end], shorter[start:len(shorter) - end]
+    
+    previous = list(range(len(shorter_rest) + 1))
+    for i, char1 in enumerate(longer_rest, start=1):
+        current = [i]
+        for j, char2 in enumerate(shorter_rest, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char1 != char2)))
+        if min(current) >= max_distance:
+            return 0.0
+        previous = current
+    
+    return (len(longer) - previous[-1]) / len(longer)
+
+def identity(label: str, name: str, date_of_birth: Optional[str], phones: Iterable[Optional[str]]) -> PlayerIdentity:
+    normalized = normalize_name(name)
+    return PlayerIdentity(
+        label=label,
+        name=normalized,
+        name_key=phonetic_key(normalized) if normalized else '',
+        phones=frozenset(filter(None, (normalize_phone(phone) for phone in phones))),
+        date_of_birth=date_of_birth or None,
+    )
+
+def compare(player: PlayerIdentity, other: PlayerIdentity) -> Optional[Tuple[str, int]]:
+    """Return (reason, confidence) if the two look like the same person, else None"""
+    if not player.name or not other.name:
+        return None
+    
+    similarity = name_similarity(player.name, other.name, minimum=0.85)
+    sounds_alike = player.name_key == other.name_key
+    # Siblings share a surname and a parent's phone, so 'Rahul Kumar' / 'Rohit Kumar' (82%) must not match
+    name_match = similarity > 0.85 or sounds_alike
+    if not name_match:
+        return None
+    
+    phone_match = bool(player.phones & other.phones)
+    dob_match = player.date_of_birth is not None and player.date_of_birth == other.date_of_birth
+    dob_conflict = (player.date_of_birth is not None and other.date_of_birth is not None
+                    and not dob_match)
+    name_reason = ('same name' if similarity == 1.0 else
+                   'similar name' if similarity > 0.85 else 'similar-sounding name')
+    
+    if phone_match and dob_match:
+        return (f"{name_reason}, phone and date of birth", 99)
+    if phone_match:
+        return (f"{name_reason} and phone", 95)
+    if dob_match:
+        return (f"{name_reason} and date of birth", 90)
+    if similarity > 0.9 and sounds_alike and not dob_conflict:
+        return (name_reason, round(similarity * 100))
+    return None
+
+class DuplicateIndex:
+    """Blocking index: players are only compared with those sharing a name key, phone or DOB"""
+    
+    def __init__(self, max_block_size: int = MAX_BLOCK_SIZE):
+        self.max_block_size = max_block_size
+        self.identities: List[PlayerIdentity] = []
+        self._blocks: Dict[Tuple[str, str], List[int]] = {}
+        self.comparisons = 0
+    
+    def _block_keys(self, player: PlayerIdentity) -> List[Tuple[str, str]]:
+        keys = [('phone', phone) for phone in player.phones]
+        if player.name_key:
+            keys.append(('name', player.name_key))
+        if player.date_of_birth:
+            keys.append(('dob', player.date_of_birth))
+        return keys
+    
+    def add(self, player: PlayerIdentity) -> None:
+        position = len(self.identities)
+        self.identities.append(player)
+        for key in self._block_keys(player):
+            block = self._blocks.setdefault(key, [])
+            if len(block) < self.max_block_size:
+                block.append(position)
+    
+    def best_match(self, player: PlayerIdentity) -> Optional[Tuple[PlayerIdentity, str, int]]:
+        """Most confident earlier player this one duplicates, as (other, reason, confidence)"""
+        candidates = set()
+        for key in self._block_keys(player):
+            candidates.update(self._blocks.get(key, ()))
+        
+        best = None
+        for position in sorted(candidates):
+            self.comparisons += 1
+            other = self.identities[position]
+            result = compare(player, other)
+            if result and (best is None or result[1] > best[2]):
+                best = (other, result[0], result[1])
+        return best
+
+class DuplicateFilter:
+    """Checks streamed players for duplicates before they are batched for insert.
+    
+    mode 'flag' reports duplicates and still imports them; mode 'skip' keeps
+    the first occurrence (or the existing player) and counts the later rows
+    as skipped.
+    """
+    
+    def __init__(self, mode: str, existing: Iterable[PlayerIdentity] = ()):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        self.mode = mode
+        self.index = DuplicateIndex()
+        self.matches: List[DuplicateMatch] = []
+        for player in existing:
+            self.index.add(player)
+    
+    def filter(self, players: Iterable[PendingPlayer], stats: ImportStats, log: LogFn) -> Iterator[PendingPlayer]:
+        for player in players:
+            record = player.record
+            incoming = identity(f"row {player.row_num} {record.name} ({player.team_name})",
+                                record.name, record.date_of_birth,
+                                (record.contact_number, record.parent_contact))
+            match = self.index.best_match(incoming)
+            self.index.add(incoming)
+            
+            if match is None:
+                yield player
+                continue
+            
+            other, reason, confidence = match
+            self.matches.append(DuplicateMatch(player, other.label, reason, confidence))
+            if self.mode == 'skip':
+                stats.add(player.team_name, skipped=1)
+                log(f"    ↷ {player.player_name} looks like {other.label}: {reason} ({confidence}%), skipped")
+                continue
+            
+            log(f"    🔁 {player.player_name} looks like {other.label}: {reason} ({confidence}%)")
+            yield player
+    
+    def report(self, log: LogFn = print) -> None:
+        if not self.matches:
+            return
+        
+        action = 'skipped' if self.mode == 'skip' else 'imported anyway, please review'
+        log(f"\n🔁 {len(self.matches)} likely duplicate player(s) {action} "
+            f"({self.index.comparisons} comparisons for {len(self.index.identities)} players):")
+        for match in self.matches:
+            log(f"    Row {match.player.row_num} {match.player.player_name} ({match.player.team_name}) "
+                f"~ {match.original}: {match.reason} ({match.confidence}%)")
+
+@timed('dedup_lookup')
+def load_existing_identities(supabase, teams: Dict[str, str]) -> List[PlayerIdentity]:
+    """Fetch the players already on the given teams ({team_name: team_id}) for DuplicateFilter"""
+    team_names = {team_id: team_name for team_name, team_id in teams.items()}
+    existing: List[PlayerIdentity] = []
+    if not team_names:
+        return existing
+    
+    start = 0
+    while True:
+        result = (supabase.table('team_players')
+                  .select('team_id, name, date_of_birth, contact_number, parent_contact')
+                  .in_('team_id', list(team_names))
+                  .order('id')
+                  .range(start, start + PAGE_SIZE - 1)
+                  .execute())
+        rows = result.data or []
+        for row in rows:
+            existing.append(identity(f"existing player {row['name']} ({team_names.get(row['team_id'], 'unknown team')})",
+                                     row['name'], row.get('date_of_birth'),
+                                     (row.get('contact_number'), row.get('parent_contact'))))
+        
+        if len(rows) < PAGE_SIZE:
+            return existing
+        start += PAGE_SIZE
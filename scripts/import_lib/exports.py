@@ -0,0 +1,298 @@
+"""
+Streaming export of the reporting views to CSV, XLSX or Parquet.
+
+src/lib/reportExports.ts builds a whole report in browser memory from one
+PostgREST response, so large reports are cut off at the row cap. Here a
+view is read with keyset pagination: each page is ordered by the view's
+key columns and starts after the last key of the previous page, so no
+report is cut off at the row cap and rows cannot shift between pages as
+they can with offsets. That bounds each response, not the work behind it:
+the GROUP BY views (coach_effectiveness_report, spirit_score_analytics,
+program_growth_trends, ...) compute the whole aggregate again for every
+page, and the join views are filtered only after joining, so pages are
+as large as the server allows: PostgREST returns at most PAGE_SIZE rows
+per request, and a page that came back shorter than asked for is taken
+as the last one, so larger pages are never asked for. Views without a
+unique key are single-row aggregates and are read with offsets.
+
+Each page is handed to a sink as soon as it arrives and then dropped, so
+memory stays flat whatever the size of the report. Several views are read
+at once by worker threads; a bounded queue keeps at most two pages per
+worker waiting for the single thread that writes the files.
+
+Files are written under a .partial name and only renamed into place once
+every report has been read, so a failed export leaves no file that looks
+complete.
+
+openpyxl (XLSX) and pyarrow (Parquet) are only needed for those formats.
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .journal import PAGE_SIZE
+from .metrics import timed_iter
+
+class ReportSpec(NamedTuple):
+    """A view and the columns that identify its rows (empty for single-row or small aggregates)"""
+    view: str
+    key: Tuple[str, ...] = ()
+
+# Reporting views from supabase/migrations, with their unique, non-null key columns
+REPORTS: Dict[str, ReportSpec] = {spec.view: spec for spec in (
+    ReportSpec('participation_report'),
+    ReportSpec('retention_report'),
+    ReportSpec('coach_effectiveness_report', ('coach_id',)),
+    ReportSpec('spirit_score_analytics', ('team_id',)),
+    ReportSpec('program_growth_trends', ('month',)),
+    ReportSpec('program_comparison_report', ('program_type',)),
+    ReportSpec('age_distribution_report', ('age',)),
+    ReportSpec('gender_ratio_report', ('gender',)),
+    ReportSpec('child_attendance_history', ('child_id', 'session_id')),
+    ReportSpec('streak_leaderboard', ('child_id',)),
+    ReportSpec('pool_standings', ('pool_id', 'team_id')),
+)}
+
+# The reports the Reports page exports
+DEFAULT_REPORTS = ('participation_report', 'retention_report', 'coach_effectiveness_report', 'spirit_score_analytics')
+
+FORMATS = ('csv', 'xlsx', 'parquet')
+
+# Rows per worksheet in Excel, header included
+XLSX_MAX_ROWS = 1048576
+
+def parse_report(value: str) -> ReportSpec:
+    """A known report name, or 'view:key1,key2' for any other view"""
+    view, _, key = value.partition(':')
+    if not key and view in REPORTS:
+        return REPORTS[view]
+    if not key:
+        raise ValueError(f"Unknown report {view!r}; give its key columns as {view}:column[,column]")
+    return ReportSpec(view, tuple(column.strip() for column in key.split(',') if column.strip()))
+
+def _quote(value: Any) -> str:
+    """A value inside a PostgREST or=() filter"""
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+def _after(key: Sequence[str], last: Sequence[Any]) -> str:
+    """or=() filter for rows whose key sorts after `last`: (a > x) or (a = x and b > y) ..."""
+    terms = []
+    for index, column in enumerate(key):
+        conditions = [f"{key[i]}.eq.{_quote(last[i])}" for i in range(index)] + [f"{column}.gt.{_quote(last[index])}"]
+        terms.append(conditions[0] if len(conditions) == 1 else f"and({','.join(conditions)})")
+    return ','.join(terms)
+
+def keyset_pages(supabase, spec: ReportSpec, page_size: int = PAGE_SIZE) -> Iterator[List[Dict]]:
+    """Every row of the view, one page at a time, in key order"""
+    # The server cuts longer pages short, which would read as the end of the view
+    page_size = min(page_size, PAGE_SIZE)
+    last: Optional[Tuple] = None
+    start = 0
+    while True:
+        query = supabase.table(spec.view).select('*')
+        if not spec.key:
+            query = query.range(start, start + page_size - 1)
+            start += page_size
+        else:
+            for column in spec.key:
+                query = query.order(column)
+            if last is not None:
+                query = query.gt(spec.key[0], last[0]) if len(spec.key) == 1 else query.or_(_after(spec.key, last))
+            query = query.limit(page_size)
+        rows = query.execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        if spec.key:
+            last = tuple(rows[-1][column] for column in spec.key)
+
+def _finish(partial: str, path: str, keep: bool) -> None:
+    """Move a finished file into place, or remove it"""
+    if keep:
+        os.replace(partial, path)
+    else:
+        os.remove(partial)
+
+def _cell(value: Any) -> Any:
+    """Objects and arrays as JSON, as exportToCSV() writes them"""
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+class CsvSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._writer = None
+        self._columns: List[str] = []
+    
+    def write(self, rows: List[Dict]) -> None:
+        if self._writer is None:
+            self._columns = list(rows[0])
+            self._file = open(f"{self.path}.partial", 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self._columns)
+        self._writer.writerows([_cell(row.get(column)) for column in self._columns] for row in rows)
+    
+    def close(self, keep: bool = True) -> None:
+        if self._file is not None:
+            self._file.close()
+            _finish(f"{self.path}.partial", self.path, keep)
+
+class ParquetSink:
+    """One row group per page; column types come from the first page, untyped (all-null) columns become strings"""
+    
+    def __init__(self, path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError('--format parquet needs pyarrow: pip install pyarrow')
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self._writer = None
+        self._schema = None
+    
+    def write(self, rows: List[Dict]) -> None:
+        pa = self._pa
+        rows = [{column: _cell(value) for column, value in row.items()} for row in rows]
+        if self._writer is None:
+            inferred = pa.Table.from_pylist(rows).schema
+            self._schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                                      for field in inferred])
+            self._writer = self._pq.ParquetWriter(f"{self.path}.partial", self._schema)
+        for field in self._schema:
+            if pa.types.is_string(field.type):
+                for row in rows:
+                    if row.get(field.name) is not None:
+                        row[field.name] = str(row[field.name])
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self._schema))
+    
+    def close(self, keep: bool = True) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            _finish(f"{self.path}.partial", self.path, keep)
+
+class XlsxWorkbook:
+    """A write-only workbook with one sheet per report, continued on a new sheet past Excel's row limit"""
+    
+    def __init__(self, path: str):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ValueError('--format xlsx needs openpyxl: pip install openpyxl')
+        self.path = path
+        self._book = Workbook(write_only=True)
+    
+    def sheet(self, name: str) -> 'XlsxSheet':
+        return XlsxSheet(self._book, name)
+    
+    def close(self, keep: bool = True) -> None:
+        # Saved even when discarded, since write-only sheets hold open temporary files until then
+        self._book.save(f"{self.path}.partial")
+        _finish(f"{self.path}.partial", self.path, keep)
+
+class XlsxSheet:
+    def __init__(self, book, name: str):
+        self._book = book
+        self.name = name
+        self._parts = 0
+        self._columns: List[str] = []
+        self._next_sheet()
+    
+    def _next_sheet(self) -> None:
+        self._parts += 1
+        # Sheet names are limited to 31 characters
+        title = self.name[:31] if self._parts == 1 else f"{self.name[:26]} ({self._parts})"
+        self._sheet = self._book.create_sheet(title=title)
+        self._rows = 0
+        if self._columns:
+            self._sheet.append(self._columns)
+            self._rows = 1
+    
+    def write(self, rows: List[Dict]) -> None:
+        if not self._columns:
+            self._columns = list(rows[0])
+            self._sheet.append(self._columns)
+            self._rows = 1
+        for row in rows:
+            if self._rows >= XLSX_MAX_ROWS:
+                self._next_sheet()
+            self._sheet.append([_cell(row.get(column)) for column in self._columns])
+            self._rows += 1
+    
+    def close(self, keep: bool = True) -> None:
+        pass
+
+class ExportResult(NamedTuple):
+    spec: ReportSpec
+    rows: int
+    pages: int
+
+def stream_reports(supabase, specs: Sequence[ReportSpec], open_sink: Callable[[ReportSpec], Any],
+                   page_size: int = PAGE_SIZE, workers: int = 4) -> List[ExportResult]:
+    """Read the views on up to `workers` threads and write every page to its view's sink on this thread.
+    
+    open_sink(spec) returns an object with write(rows) and close(keep); every sink is opened
+    first, in order. Pages of one view are written in key order. The first failing view
+    stops the export, closes every sink with keep=False and re-raises.
+    """
+    pages: 'queue.Queue[Tuple[int, Any]]' = queue.Queue(maxsize=max(1, workers) * 2)
+    cancelled = threading.Event()
+    pending = list(enumerate(specs))
+    pending_lock = threading.Lock()
+    
+    def fetch() -> None:
+        while not cancelled.is_set():
+            with pending_lock:
+                if not pending:
+                    return
+                index, spec = pending.pop(0)
+            try:
+                for page in timed_iter('fetch', keyset_pages(supabase, spec, page_size)):
+                    if cancelled.is_set():
+                        return
+                    pages.put((index, page))
+                pages.put((index, None))
+            except Exception as e:
+                pages.put((index, e))
+                return
+    
+    threads = [threading.Thread(target=fetch, daemon=True) for _ in range(max(1, min(workers, len(specs))))]
+    for thread in threads:
+        thread.start()
+    
+    # Opened in report order, so workbook sheets come out in that order whichever view finishes first
+    sinks = [open_sink(spec) for spec in specs]
+    counts = [[0, 0] for _ in specs]
+    remaining = len(specs)
+    completed = False
+    try:
+        while remaining:
+            index, page = pages.get()
+            if isinstance(page, Exception):
+                raise Exception(f"{specs[index].view}: {page}") from page
+            if page is None:
+                remaining -= 1
+                continue
+            sinks[index].write(page)
+            counts[index][0] += len(page)
+            counts[index][1] += 1
+        completed = True
+    finally:
+        cancelled.set()
+        # Unblock workers waiting on a full queue
+        while not pages.empty():
+            pages.get_nowait()
+        for sink in sinks:
+            sink.close(keep=completed)
+    
+    return [ExportResult(spec, *counts[index]) for index, spec in enumerate(specs)]
+
+def output_path(directory: str, spec: ReportSpec, extension: str) -> str:
+    return os.path.join(directory, f"{spec.view}.{extension}")
@@ -0,0 +1,191 @@
+"""
+Checkpoint journal for resumable imports.
+
+Completed CSV rows are recorded in a local SQLite file, keyed by a content
+hash of the row plus the tournament ID. Rerunning an import that died
+halfway (network drop, rate limit) skips every row that already went in,
+so a restart only costs the remaining work.
+
+load_existing_player_keys() covers the case where there is no journal:
+it fetches the tournament's existing team_players in bulk so rows that
+are already in the database can be skipped as well.
+load_registration_watermark() supports delta imports of cumulative
+exports: rows registered at or before the latest imported registration
+can be skipped without being parsed. select_all() is the same paged read
+for any table.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .columns import HeaderResolver
+from .dates import TIMESTAMP_FORMATS, DateParser, timestamp_key
+from .metrics import timed
+
+# PostgREST caps a single response at 1000 rows by default
+PAGE_SIZE = 1000
+
+# Players written by the importers get a placeholder <name>@temp.local email
+IMPORTED_EMAIL_PATTERN = '%@temp.local'
+
+# (team_id, lowercased player name, date_of_birth)
+PlayerKey = Tuple[str, str, Optional[str]]
+
+def row_key(tournament_id: str, values: Iterable[str]) -> str:
+    """Content hash of a raw CSV row within a tournament"""
+    content = '\x1f'.join([tournament_id] + [value or '' for value in values])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def player_key(team_id: str, name: str, date_of_birth: Optional[str]) -> PlayerKey:
+    """Identity used to match CSV players against existing team_players rows"""
+    return (team_id, name.strip().lower(), date_of_birth)
+
+class ImportJournal:
+    """SQLite-backed record of the rows an import has already written"""
+    
+    def __init__(self, path: str, tournament_id: str):
+        self.path = path
+        self.tournament_id = tournament_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completed_rows (
+                tournament_id TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (tournament_id, row_hash)
+            )
+        """)
+        self._conn.commit()
+        
+        rows = self._conn.execute(
+            "SELECT row_hash FROM completed_rows WHERE tournament_id = ?", (tournament_id,)
+        ).fetchall()
+        self._done: Set[str] = {row_hash for (row_hash,) in rows}
+    
+    def __len__(self) -> int:
+        return len(self._done)
+    
+    def is_done(self, row_hash: str) -> bool:
+        return row_hash in self._done
+    
+    def mark_done(self, row_hashes: Iterable[str]) -> None:
+        """Record rows as written. Committed immediately so a crash loses nothing"""
+        new_hashes = [row_hash for row_hash in row_hashes if row_hash not in self._done]
+        if not new_hashes:
+            return
+        
+        completed_at = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO completed_rows (tournament_id, row_hash, completed_at) VALUES (?, ?, ?)",
+                [(self.tournament_id, row_hash, completed_at) for row_hash in new_hashes]
+            )
+            self._conn.commit()
+            self._done.update(new_hashes)
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@timed('reconcile')
+def load_existing_player_keys(supabase, team_ids: List[str]) -> Set[PlayerKey]:
+    """Fetch the identity of every player already on the given teams.
+    
+    Issues one filtered query over all teams, paged only to get past the
+    PostgREST response cap.
+    """
+    existing: Set[PlayerKey] = set()
+    if not team_ids:
+        return existing
+    
+    start = 0
+    while True:
+        result = (supabase.table('team_players')
+                  .select('team_id, name, date_of_birth')
+                  .in_('team_id', team_ids)
+                  .order('id')
+                  .range(start, start + PAGE_SIZE - 1)
+                  .execute())
+        rows = result.data or []
+        existing.update(player_key(row['team_id'], row['name'], row['date_of_birth']) for row in rows)
+        
+        if len(rows) < PAGE_SIZE:
+            return existing
+        start += PAGE_SIZE
+
+def select_all(supabase, table: str, columns: str, order: str, column: Optional[str] = None,
+               values: Optional[List[str]] = None, **equals) -> Iterator[Dict]:
+    """Every matching row, paged past the PostgREST response cap.
+    
+    order must identify rows uniquely (one column, or several comma-separated), or
+    rows tying across a page boundary can be skipped.
+    """
+    if column is not None and not values:
+        return
+    start = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        if column is not None:
+            query = query.in_(column, values)
+        for name, value in equals.items():
+            query = query.eq(name, value)
+        for name in order.split(','):
+            query = query.order(name.strip())
+        rows = query.range(start, start + PAGE_SIZE - 1).execute().data or []
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        start += PAGE_SIZE
+
+@timed('watermark')
+def load_registration_watermark(supabase, team_ids: List[str]) -> Optional[str]:
+    """Latest registration_timestamp among the players imported into the given teams.
+    
+    Only rows with an importer placeholder email count, so a player added by
+    hand through the app (stamped with the time they were added) cannot move
+    the watermark past registrations that have not been imported yet.
+    """
+    if not team_ids:
+        return None
+    
+    result = (supabase.table('team_players')
+              .select('registration_timestamp')
+              .in_('team_id', team_ids)
+              .like('email', IMPORTED_EMAIL_PATTERN)
+              # Rows whose Timestamp could not be read are imported with none, and sort first
+              # in descending order; older clients also drop nullsfirst=False
+              .not_.is_('registration_timestamp', 'null')
+              .order('registration_timestamp', desc=True)
+              .limit(1)
+              .execute())
+    if not result.data or not result.data[0]['registration_timestamp']:
+        return None
+    return timestamp_key(result.data[0]['registration_timestamp'])
+
+class RegistrationCutoff:
+    """Drops CSV rows registered at or before a watermark, reading only their Timestamp column.
+    
+    Rows whose Timestamp is missing or unreadable are kept, since they cannot
+    be placed relative to the watermark.
+    """
+    
+    def __init__(self, watermark: str):
+        self.watermark = watermark
+        self.skipped = 0
+        self._timestamps = DateParser(TIMESTAMP_FORMATS)
+    
+    def filter(self, columns: HeaderResolver,
+               rows: Iterable[Tuple[int, List[str]]]) -> Iterator[Tuple[int, List[str]]]:
+        for row_num, row in rows:
+            registered = self._timestamps.parse_timestamp(columns.get(row, 'timestamp'))
+            if registered is not None and registered <= self.watermark:
+                self.skipped += 1
+                continue
+            yield (row_num, row)
+    
+    def report(self, log: Callable[[str], None] = print) -> None:
+        log(f"Skipped {self.skipped} rows registered at or before {self.watermark}")
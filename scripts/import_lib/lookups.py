@@ -0,0 +1,168 @@
+"""
+Prefetch-and-cache lookups for tournaments, teams and the fallback user.
+
+The importers used to query `teams` and `profiles` once per team and
+`tournaments`, `user_roles` and `profiles` once per run. LookupCache loads
+every team of a tournament in one query, resolves the fallback user
+(first admin, else first profile) once, and serves the get_or_create_*
+calls from memory. Rows it creates are written through to the cache.
+Team names are matched ignoring case and surrounding spaces, as the
+unique_team_name_per_tournament index compares them.
+
+The cache is safe to share between the worker threads in workers.py.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from .metrics import timed
+from .workers import LogFn
+
+def team_name_key(name: str) -> str:
+    """A team name as unique_team_name_per_tournament compares it: LOWER(TRIM(name))"""
+    return name.strip().lower()
+
+class LookupCache:
+    """In-memory view of the tournaments, teams and users an import touches"""
+    
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self._lock = threading.Lock()
+        self._tournaments: Dict[str, Dict] = {}
+        self._teams: Dict[str, Dict[str, str]] = {}
+        # {tournament_id: {team_name_key(name): team_id}}
+        self._team_keys: Dict[str, Dict[str, str]] = {}
+        self._fallback_user_id: Optional[str] = None
+    
+    def get_tournament(self, tournament_id: str) -> Optional[Dict]:
+        """Return the tournament row, or None if it does not exist"""
+        if tournament_id not in self._tournaments:
+            result = self.supabase.table('tournaments').select('id, name, start_date').eq('id', tournament_id).execute()
+            if not result.data:
+                return None
+            self._tournaments[tournament_id] = result.data[0]
+        return self._tournaments[tournament_id]
+    
+    @timed('lookups')
+    def load_tournaments(self, tournament_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch the given tournaments in one query. Returns {id: row} for those that exist"""
+        missing = [tournament_id for tournament_id in tournament_ids if tournament_id not in self._tournaments]
+        if missing:
+            result = self.supabase.table('tournaments').select('id, name, start_date').in_('id', missing).execute()
+            for tournament in result.data or []:
+                self._tournaments[tournament['id']] = tournament
+        return {tournament_id: self._tournaments[tournament_id]
+                for tournament_id in tournament_ids if tournament_id in self._tournaments}
+    
+    @timed('lookups')
+    def upcoming_tournaments(self, from_date: str) -> List[Dict]:
+        """Tournaments starting on or after from_date (YYYY-MM-DD), soonest first"""
+        result = (self.supabase.table('tournaments')
+                  .select('id, name, start_date')
+                  .gte('start_date', from_date)
+                  .order('start_date')
+                  .execute())
+        for tournament in result.data or []:
+            self._tournaments[tournament['id']] = tournament
+        return result.data or []
+    
+    @timed('lookups')
+    def get_or_create_tournament(self, tournament_name: str, start_date: str,
+                                 log: LogFn = print) -> str:
+        """Get existing tournament by name or create a new one"""
+        result = self.supabase.table('tournaments').select('id, name, start_date').eq('name', tournament_name).execute()
+        
+        if result.data:
+            tournament = result.data[0]
+            self._tournaments[tournament['id']] = tournament
+            log(f"Using existing tournament: {tournament_name} ({tournament['id']})")
+            return tournament['id']
+        
+        tournament_data = {
+            'name': tournament_name,
+            'start_date': start_date,
+            'end_date': start_date,  # Same day tournament
+            'location': 'To be determined',
+            'status': 'registration_open',
+            'created_by': self.fallback_user_id(log)
+        }
+        
+        result = self.supabase.table('tournaments').insert(tournament_data).execute()
+        
+        if not result.data:
+            raise Exception("Failed to create tournament")
+        
+        tournament = result.data[0]
+        self._tournaments[tournament['id']] = tournament
+        log(f"Created tournament: {tournament_name} ({tournament['id']})")
+        return tournament['id']
+    
+    def fallback_user_id(self, log: LogFn = print) -> str:
+        """Resolve the user new rows are attributed to: the first admin, else the first profile"""
+        with self._lock:
+            if self._fallback_user_id:
+                return self._fallback_user_id
+            
+            admin_result = self.supabase.table('user_roles').select('user_id').eq('role', 'admin').limit(1).execute()
+            
+            if admin_result.data:
+                self._fallback_user_id = admin_result.data[0]['user_id']
+            else:
+                any_user_result = self.supabase.table('profiles').select('id').limit(1).execute()
+                
+                if not any_user_result.data:
+                    log("ERROR: No users found in database. Please create a user profile first.")
+                    raise Exception("No users available")
+                
+                self._fallback_user_id = any_user_result.data[0]['id']
+                log("WARNING: No admin user found. Using first available user.")
+            
+            return self._fallback_user_id
+    
+    @timed('lookups')
+    def load_teams(self, tournament_id: str) -> Dict[str, str]:
+        """Load every team of the tournament in one query. Returns {team_name: team_id}"""
+        with self._lock:
+            if tournament_id not in self._teams:
+                result = self.supabase.table('teams').select('id, name').eq('tournament_id', tournament_id).execute()
+                self._teams[tournament_id] = {team['name']: team['id'] for team in result.data or []}
+                self._team_keys[tournament_id] = {team_name_key(team['name']): team['id']
+                                                  for team in result.data or []}
+            return self._teams[tournament_id]
+    
+    def get_team_id(self, tournament_id: str, team_name: str) -> Optional[str]:
+        """Return the id of an existing team, or None. Case and surrounding spaces are ignored"""
+        self.load_teams(tournament_id)
+        return self._team_keys[tournament_id].get(team_name_key(team_name))
+    
+    @timed('lookups')
+    def get_or_create_team(self, tournament_id: str, team_name: str, community: str,
+                           log: LogFn = print) -> str:
+        """Get existing team or create a new one"""
+        team_id = self.get_team_id(tournament_id, team_name)
+        
+        if team_id:
+            log(f"  Team exists: {team_name}")
+            return team_id
+        
+        team_data = {
+            'tournament_id': tournament_id,
+            'name': team_name,
+            'captain_id': self.fallback_user_id(log),
+            'email': f'{team_name.lower().replace(" ", "_")}@team.local',
+            'phone': '0000000000',
+            'status': 'approved',
+            'community': community or 'Unknown'
+        }
+        
+        result = self.supabase.table('teams').insert(team_data).execute()
+        
+        if not result.data:
+            raise Exception(f"Failed to create team: {team_name}")
+        
+        team_id = result.data[0]['id']
+        with self._lock:
+            self._teams[tournament_id][team_name] = team_id
+            self._team_keys[tournament_id][team_name_key(team_name)] = team_id
+        log(f"  Created team: {team_name}")
+        return team_id
@@ -0,0 +1,248 @@
+"""
+Per-stage timing and request metrics for the import scripts.
+
+Recording is off unless a script calls enable() (the --profile,
+--metrics-json and --cprofile flags). While it is off the instrumentation
+hooks below cost one attribute check per call.
+
+- @timed('stage') wraps a function and adds its wall time and call count
+  to the stage. Stages are inclusive: 'parse_row' contains the
+  'parse_date' time spent inside it, and stages run from worker threads
+  (such as 'insert') add up the time of every thread, so they can exceed
+  the wall clock.
+- `with stage('stage'):` does the same for a block of code.
+- timed_iter('stage', iterable) times how long each item takes to produce,
+  without the time the consumer spends on it.
+- record_request() is called by RetryTransport for every HTTP attempt:
+  time to response headers, status and body sizes.
+- count_rows() records written rows, bucketed per second of the run.
+
+Files parsed in worker processes by batch mode (--processes > 1) are not
+included in the parsing stages.
+"""
+
+import atexit
+import bisect
+import json
+import math
+import threading
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from .workers import LogFn
+
+T = TypeVar('T')
+
+# Upper bounds of the request latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+class Metrics:
+    """Stage timings, HTTP request stats and written rows for one run"""
+    
+    def __init__(self, script: str):
+        self.script = script
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.latencies_ms: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.rows_per_second: Dict[int, int] = {}
+        self._lock = threading.Lock()
+    
+    def add_stage(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+    
+    def add_request(self, status: str, seconds: float, sent: int, received: int) -> None:
+        with self._lock:
+            self.latencies_ms.append(seconds * 1000)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+    
+    def add_rows(self, count: int) -> None:
+        second = int(time.perf_counter() - self.start)
+        with self._lock:
+            self.rows_per_second[second] = self.rows_per_second.get(second, 0) + count
+    
+    def report(self) -> Dict:
+        """The whole run as a JSON-serializable dict"""
+        wall_seconds = time.perf_counter() - self.start
+        latencies = sorted(self.latencies_ms)
+        histogram: Dict[str, int] = {}
+        for bound in LATENCY_BUCKETS_MS:
+            histogram[f"<={bound}"] = 0
+        histogram[f">{LATENCY_BUCKETS_MS[-1]}"] = 0
+        labels = list(histogram)
+        for latency in latencies:
+            histogram[labels[bisect.bisect_left(LATENCY_BUCKETS_MS, latency)]] += 1
+        
+        total_rows = sum(self.rows_per_second.values())
+        return {
+            'script': self.script,
+            'started_at': self.started_at,
+            'wall_seconds': round(wall_seconds, 3),
+            'stages': {name: {'seconds': round(seconds, 4), 'calls': calls}
+                       for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0])},
+            'requests': {
+                'count': len(latencies),
+                'by_status': dict(sorted(self.statuses.items())),
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'latency_ms': {name: round(value, 2) if value is not None else None for name, value in (
+                    ('p50', percentile(latencies, 0.50)),
+                    ('p95', percentile(latencies, 0.95)),
+                    ('p99', percentile(latencies, 0.99)),
+                    ('max', latencies[-1] if latencies else None),
+                )},
+                'latency_histogram_ms': histogram,
+            },
+            'rows': {
+                'written': total_rows,
+                'per_second': round(total_rows / wall_seconds, 1) if wall_seconds > 0 else None,
+                'timeline': [{'second': second, 'rows': count}
+                             for second, count in sorted(self.rows_per_second.items())],
+            },
+        }
+    
+    def print_report(self, report: Dict, log: LogFn = print) -> None:
+        log(f"\n{'='*60}")
+        log(f"⏱️  PROFILE ({report['wall_seconds']:.2f}s wall)")
+        log(f"{'='*60}")
+        for name, stage in report['stages'].items():
+            log(f"  {name:<20} {stage['seconds']:>9.3f}s {stage['calls']:>9} calls")
+        
+        requests = report['requests']
+        if requests['count']:
+            latency = requests['latency_ms']
+            log(f"\n  {requests['count']} requests, {requests['bytes_sent']} bytes sent, "
+                f"{requests['bytes_received']} bytes received")
+            log(f"  latency p50 {latency['p50']:.0f}ms, p95 {latency['p95']:.0f}ms, "
+                f"p99 {latency['p99']:.0f}ms, max {latency['max']:.0f}ms")
+            log(f"  status: {', '.join(f'{status} x{count}' for status, count in requests['by_status'].items())}")
+        
+        rows = report['rows']
+        if rows['written']:
+            log(f"\n  {rows['written']} rows written, {rows['per_second']} rows/sec")
+
+class _Profiler:
+    """The active run: its metrics, where to send them, and the optional cProfile session"""
+    
+    def __init__(self, metrics: Metrics, print_report: bool, json_path: Optional[str], cprofile_path: Optional[str]):
+        self.metrics = metrics
+        self.print_report = print_report
+        self.json_path = json_path
+        self.cprofile_path = cprofile_path
+        self.cprofile = None
+        if cprofile_path:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+    
+    def finish(self) -> None:
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            print(f"\n🔬 cProfile stats written to {self.cprofile_path} "
+                  f"(python -m pstats {self.cprofile_path})")
+        
+        report = self.metrics.report()
+        if self.print_report:
+            self.metrics.print_report(report)
+        if self.json_path:
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n📈 Metrics written to {self.json_path}")
+
+_active: Optional[Metrics] = None
+
+def enable(script: str, print_report: bool = False, json_path: Optional[str] = None,
+           cprofile_path: Optional[str] = None) -> Optional[Metrics]:
+    """Start recording if any output was asked for; the report is produced when the script exits"""
+    global _active
+    if not (print_report or json_path or cprofile_path):
+        return None
+    
+    _active = Metrics(script)
+    atexit.register(_Profiler(_active, print_report, json_path, cprofile_path).finish)
+    return _active
+
+def add_arguments(parser) -> None:
+    """The --profile, --metrics-json and --cprofile flags shared by the import scripts"""
+    parser.add_argument('--profile', action='store_true',
+                        help='Print time and call counts per stage, request latencies and rows/sec at the end')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help='Write the same metrics as JSON, for comparing runs')
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help='Also run under cProfile and dump the stats to PATH')
+
+def timed(stage: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator adding each call's wall time to the stage while recording is on"""
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            metrics = _active
+            if metrics is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.add_stage(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Add the time spent in the with block to the stage while recording is on"""
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_stage(name, time.perf_counter() - start)
+
+def timed_iter(stage: str, items: Iterable[T]) -> Iterator[T]:
+    """Iterate items, adding the time taken to produce each one to the stage"""
+    if _active is None:
+        return iter(items)
+    return _timed_iter(_active, stage, iter(items))
+
+def _timed_iter(metrics: Metrics, stage: str, iterator: Iterator[T]) -> Iterator[T]:
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            metrics.add_stage(stage, time.perf_counter() - start, calls=0)
+            return
+        metrics.add_stage(stage, time.perf_counter() - start)
+        yield item
+
+def recording() -> bool:
+    return _active is not None
+
+def record_request(status: str, seconds: float, sent: int, received: int) -> None:
+    if _active is not None:
+        _active.add_request(status, seconds, sent, received)
+
+def count_rows(count: int) -> None:
+    if _active is not None and count:
+        _active.add_rows(count)
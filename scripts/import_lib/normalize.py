@@ -0,0 +1,180 @@
+"""
+Normalization of the bilingual registration columns: gender, participation
+days and the permissions text that carries both consents.
+
+The scalar functions are the reference rules the importers have always
+used, with each keyword list compiled into one regex and the results
+memoized, since an export repeats the same few answers thousands of times.
+
+ColumnNormalizer applies the same rules a whole column at a time with
+pandas: each column is reduced to its distinct values, the keyword regexes
+run over those as vectorized string operations, and the results are
+scattered back to the rows. pandas is optional; without it, or with
+engine='python', rows go through the memoized scalar functions instead.
+Both engines give identical results (see benchmark_imports.py --check-normalization).
+"""
+
+import importlib.util
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, NamedTuple, Pattern, Sequence, Tuple
+
+from .columns import HeaderResolver
+from .metrics import timed
+
+ENGINES = ('auto', 'python', 'pandas')
+
+# Rows normalized per pandas call
+DEFAULT_CHUNK_SIZE = 5000
+
+def keyword_pattern(keywords: Sequence[str]) -> Pattern:
+    """One regex matching any of the keywords as a plain substring"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+# Checked in this order; note 'female' contains 'male', so English 'Female' has always mapped to male
+MALE_KEYWORDS = keyword_pattern(('male', 'पुरुष'))
+FEMALE_KEYWORDS = keyword_pattern(('female', 'महिला'))
+
+BOTH_DAYS_KEYWORDS = keyword_pattern(('both', 'दोनो'))
+DAY_1_KEYWORDS = keyword_pattern(('day 1', 'दिन 1'))
+DAY_2_KEYWORDS = keyword_pattern(('day 2', 'दिन 2'))
+
+PARENTAL_CONSENT_KEYWORDS = ('permission', 'permit', 'participate', 'parents')
+MEDIA_CONSENT_KEYWORDS = keyword_pattern(('media', 'promotional', 'image', 'video', 'social media'))
+
+class Normalized(NamedTuple):
+    gender: str
+    participation_days: str
+    parental_consent: bool
+    media_consent: bool
+
+@lru_cache(maxsize=1024)
+def map_gender(gender: str) -> str:
+    """Map gender from Hindi/English to database format"""
+    gender_lower = gender.lower()
+    
+    if MALE_KEYWORDS.search(gender_lower) or gender_lower == 'm':
+        return 'male'
+    elif FEMALE_KEYWORDS.search(gender_lower) or gender_lower == 'f':
+        return 'female'
+    else:
+        return 'other'
+
+@lru_cache(maxsize=1024)
+def map_participation_days(days: str) -> str:
+    """Map participation days to database format"""
+    if not days or days.strip() == '':
+        return 'both_days'
+    
+    days_lower = days.lower()
+    
+    if BOTH_DAYS_KEYWORDS.search(days_lower):
+        return 'both_days'
+    elif DAY_1_KEYWORDS.search(days_lower):
+        return 'day_1'
+    elif DAY_2_KEYWORDS.search(days_lower):
+        return 'day_2'
+    
+    return 'both_days'  # Default
+
+@lru_cache(maxsize=4096)
+def parse_permissions(permissions: str, parental_keywords: Pattern) -> Tuple[bool, bool]:
+    """Parse permissions text to extract (parental consent, media consent)"""
+    if not permissions:
+        return (False, False)
+    
+    permissions_lower = permissions.lower()
+    return (parental_keywords.search(permissions_lower) is not None,
+            MEDIA_CONSENT_KEYWORDS.search(permissions_lower) is not None)
+
+def pandas_available() -> bool:
+    return importlib.util.find_spec('pandas') is not None
+
+def resolve_engine(engine: str) -> str:
+    """'auto' becomes 'pandas' when pandas is installed, else 'python'"""
+    if engine == 'auto':
+        return 'pandas' if pandas_available() else 'python'
+    if engine == 'pandas' and not pandas_available():
+        raise ValueError("--engine pandas needs pandas: pip install pandas")
+    return engine
+
+class ColumnNormalizer:
+    """Normalizes gender, participation days and permissions for many rows at once"""
+    
+    def __init__(self, parental_keywords: Pattern, engine: str = 'auto'):
+        self.parental_keywords = parental_keywords
+        self.engine = resolve_engine(engine)
+    
+    @timed('normalize')
+    def normalize(self, genders: List[str], days: List[str], permissions: List[str]) -> List[Normalized]:
+        if self.engine == 'python':
+            return [Normalized(map_gender(gender), map_participation_days(day),
+                               *parse_permissions(permission, self.parental_keywords))
+                    for gender, day, permission in zip(genders, days, permissions)]
+        
+        genders_out = self._map_distinct(genders, self._genders)
+        days_out = self._map_distinct(days, self._days)
+        parental_out = self._map_distinct(permissions, self._parental)
+        media_out = self._map_distinct(permissions, self._media)
+        return [Normalized(*values) for values in zip(genders_out, days_out, parental_out, media_out)]
+    
+    @staticmethod
+    def _map_distinct(values: List[str], mapper) -> List:
+        """Run a vectorized mapper over the distinct values only, then expand back to every row"""
+        import numpy as np
+        import pandas as pd
+        
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+        # object dtype keeps Python's own str.lower() and re semantics
+        mapped = np.asarray(mapper(pd.Series(uniques, dtype=object)))
+        return mapped[codes].tolist()
+    
+    @staticmethod
+    def _genders(values):
+        import numpy as np
+        
+        lower = values.str.lower()
+        male = lower.str.contains(MALE_KEYWORDS, regex=True) | (lower == 'm')
+        female = lower.str.contains(FEMALE_KEYWORDS, regex=True) | (lower == 'f')
+        return np.select([male, female], ['male', 'female'], 'other')
+    
+    @staticmethod
+    def _days(values):
+        import numpy as np
+        
+        lower = values.str.lower()
+        conditions = [
+            values.str.strip() == '',
+            lower.str.contains(BOTH_DAYS_KEYWORDS, regex=True),
+            lower.str.contains(DAY_1_KEYWORDS, regex=True),
+            lower.str.contains(DAY_2_KEYWORDS, regex=True),
+        ]
+        return np.select(conditions, ['both_days', 'both_days', 'day_1', 'day_2'], 'both_days')
+    
+    def _parental(self, values):
+        return values.str.lower().str.contains(self.parental_keywords, regex=True)
+    
+    @staticmethod
+    def _media(values):
+        return values.str.lower().str.contains(MEDIA_CONSENT_KEYWORDS, regex=True)
+
+def normalized_rows(columns: HeaderResolver, rows: Iterable[Tuple[int, List[str]]],
+                    normalizer: ColumnNormalizer,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, List[str], Normalized]]:
+    """Attach the normalized fields to each row, a chunk of rows at a time"""
+    chunk: List[Tuple[int, List[str]]] = []
+    
+    def flush() -> Iterator[Tuple[int, List[str], Normalized]]:
+        normalized = normalizer.normalize([columns.get(row, 'gender') for _, row in chunk],
+                                          [columns.get(row, 'participation_days') for _, row in chunk],
+                                          [columns.get(row, 'permissions') for _, row in chunk])
+        for (row_num, row), fields in zip(chunk, normalized):
+            yield (row_num, row, fields)
+    
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield from flush()
+            chunk = []
+    if chunk:
+        yield from flush()
@@ -0,0 +1,274 @@
+"""
+Direct Postgres fast path for bulk loads.
+
+Rows are streamed into a temporary staging table with COPY FROM STDIN and
+merged into the real tables by set-based SQL, all in one transaction: a
+load either lands completely or not at all, and costs a handful of
+statements instead of a PostgREST request per batch.
+
+Needs psycopg 3 (``pip install "psycopg[binary]"``). The connection goes
+straight to Postgres, so row level security does not apply; use the
+database owner (the Supabase ``postgres`` user) or any local Postgres with
+the migrations applied.
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .metrics import count_rows, timed
+from .workers import LogFn
+
+# Written by `supabase link`; holds the session pooler URL without a password
+POOLER_URL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                               'supabase', '.temp', 'pooler-url')
+
+# Staged player columns, in COPY order: CSV position and team, then team_players fields
+PLAYER_STAGING_COLUMNS = [
+    ('row_num', 'INTEGER'),
+    ('team_name', 'TEXT'),
+    ('community', 'TEXT'),
+    ('name', 'TEXT'),
+    ('gender', 'TEXT'),
+    ('email', 'TEXT'),
+    ('date_of_birth', 'DATE'),
+    ('contact_number', 'TEXT'),
+    ('parent_contact', 'TEXT'),
+    ('participation_days', 'TEXT'),
+    ('parental_consent', 'BOOLEAN'),
+    ('media_consent', 'BOOLEAN'),
+    ('queries_comments', 'TEXT'),
+    ('standard_wfdf_certificate_url', 'TEXT'),
+    ('advance_wfdf_certificate_url', 'TEXT'),
+    ('registration_timestamp', 'TIMESTAMP WITH TIME ZONE'),
+]
+
+CHECKLIST_STAGING_COLUMNS = [
+    ('tournament_id', 'UUID'),
+    ('category', 'TEXT'),
+    ('task_name', 'TEXT'),
+    ('description', 'TEXT'),
+    ('priority', 'TEXT'),
+    ('due_date', 'DATE'),
+]
+
+def resolve_database_url(database_url: Optional[str] = None) -> str:
+    """Connection string from the argument, DATABASE_URL/SUPABASE_DB_URL, or the linked pooler URL"""
+    database_url = database_url or os.getenv('DATABASE_URL') or os.getenv('SUPABASE_DB_URL')
+    if database_url:
+        return database_url
+    
+    if os.path.exists(POOLER_URL_FILE):
+        with open(POOLER_URL_FILE, 'r', encoding='utf-8') as f:
+            pooler_url = f.read().strip()
+        if pooler_url:
+            return pooler_url
+    
+    raise ValueError("No database URL: pass --database-url, set DATABASE_URL, or run `supabase link`")
+
+def connect(database_url: str):
+    """Open a psycopg connection. The password may come from SUPABASE_DB_PASSWORD or PGPASSWORD"""
+    try:
+        import psycopg
+    except ImportError:
+        raise ValueError('--copy needs psycopg 3: pip install "psycopg[binary]"')
+    
+    options = {}
+    if os.getenv('SUPABASE_DB_PASSWORD'):
+        options['password'] = os.getenv('SUPABASE_DB_PASSWORD')
+    # No server-side prepared statements, so the transaction pooler works too
+    return psycopg.connect(database_url, prepare_threshold=None, **options)
+
+class CopyLoader:
+    """One transaction on a direct Postgres connection, committed only if the block succeeds"""
+    
+    def __init__(self, database_url: str):
+        self.conn = connect(database_url)
+    
+    def __enter__(self) -> 'CopyLoader':
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+    
+    def fetch_all(self, query: str, params: Sequence = ()) -> List[Tuple]:
+        with self.conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+    
+    def fetch_one(self, query: str, params: Sequence = ()) -> Optional[Tuple]:
+        with self.conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()
+    
+    @timed('copy')
+    def stage(self, table: str, columns: List[Tuple[str, str]], rows: Iterable[Sequence]) -> int:
+        """Create a temporary table dropped at commit and COPY the rows into it. Returns the row count"""
+        definitions = ', '.join(f"{name} {column_type}" for name, column_type in columns)
+        names = ', '.join(name for name, _ in columns)
+        count = 0
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"CREATE TEMPORARY TABLE {table} ({definitions}) ON COMMIT DROP")
+            with cursor.copy(f"COPY {table} ({names}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    count += 1
+        return count
+    
+    def fallback_user_id(self) -> str:
+        """Same attribution rule as LookupCache: the first admin, else the first profile"""
+        row = self.fetch_one(
+            "SELECT COALESCE((SELECT user_id FROM public.user_roles WHERE role = 'admin' LIMIT 1), "
+            "(SELECT id FROM public.profiles LIMIT 1))"
+        )
+        if not row or row[0] is None:
+            raise Exception("No users available")
+        return str(row[0])
+    
+    def get_or_create_tournament(self, tournament_name: str, start_date: str, log: LogFn = print) -> str:
+        row = self.fetch_one("SELECT id FROM public.tournaments WHERE name = %s LIMIT 1", (tournament_name,))
+        if row:
+            log(f"Using existing tournament: {tournament_name} ({row[0]})")
+            return str(row[0])
+        
+        row = self.fetch_one(
+            "INSERT INTO public.tournaments (name, start_date, end_date, location, status, created_by) "
+            "VALUES (%s, %s, %s, 'To be determined', 'registration_open', %s) RETURNING id",
+            (tournament_name, start_date, start_date, self.fallback_user_id())
+        )
+        log(f"Created tournament: {tournament_name} ({row[0]})")
+        return str(row[0])
+    
+    def existing_tournaments(self, tournament_ids: List[str]) -> Set[str]:
+        rows = self.fetch_all("SELECT id::text FROM public.tournaments WHERE id::text = ANY(%s)", (tournament_ids,))
+        return {row[0] for row in rows}
+    
+    def upcoming_tournaments(self, from_date: str) -> List[Dict]:
+        rows = self.fetch_all(
+            "SELECT id::text, name, start_date::text FROM public.tournaments WHERE start_date >= %s ORDER BY start_date",
+            (from_date,)
+        )
+        return [{'id': row[0], 'name': row[1], 'start_date': row[2]} for row in rows]
+    
+    @timed('merge')
+    def merge_teams(self, tournament_id: str, staging: str, log: LogFn = print) -> None:
+        """Create the staged teams missing from the tournament, community taken from each team's first row.
+        
+        Team names are matched ignoring case and surrounding spaces, like the
+        unique_team_name_per_tournament index.
+        """
+        existing = {row[0] for row in self.fetch_all(
+            "SELECT LOWER(TRIM(name)) FROM public.teams WHERE tournament_id = %s", (tournament_id,))}
+        staged = self.fetch_all(
+            f"SELECT (ARRAY_AGG(team_name ORDER BY row_num))[1], LOWER(TRIM(team_name)) FROM {staging} "
+            f"GROUP BY LOWER(TRIM(team_name)) ORDER BY MIN(row_num)")
+        
+        new_teams = [team_name for team_name, team_key in staged if team_key not in existing]
+        for team_name, team_key in staged:
+            if team_key in existing:
+                log(f"  Team exists: {team_name}")
+        if not new_teams:
+            return
+        
+        created = self.fetch_all(
+            f"""
+            INSERT INTO public.teams (tournament_id, name, captain_id, email, phone, status, community)
+            SELECT DISTINCT ON (LOWER(TRIM(s.team_name)))
+                   %s, s.team_name, %s, LOWER(REPLACE(s.team_name, ' ', '_')) || '@team.local',
+                   '0000000000', 'approved', COALESCE(NULLIF(s.community, ''), 'Unknown')
+            FROM {staging} s
+            ORDER BY LOWER(TRIM(s.team_name)), s.row_num
+            ON CONFLICT (tournament_id, LOWER(TRIM(name))) DO NOTHING
+            RETURNING name
+            """,
+            (tournament_id, self.fallback_user_id())
+        )
+        for row in created:
+            log(f"  Created team: {row[0]}")
+    
+    @timed('merge')
+    def merge_players(self, tournament_id: str, staging: str, reconcile: bool = False) -> Dict[str, Tuple[int, int]]:
+        """Insert the staged players into their teams in one statement.
+        
+        Players join their team by name ignoring case and surrounding spaces.
+        Age follows import_players_bulk(): from the date of birth, else 20.
+        With reconcile, players already on their team (same name ignoring
+        case, same date of birth) are left out. Returns {team_name: (staged, inserted)}.
+        """
+        reconcile_filter = """
+            WHERE NOT EXISTS (
+                SELECT 1 FROM public.team_players p
+                WHERE p.team_id = t.id
+                  AND LOWER(TRIM(p.name)) = LOWER(TRIM(s.name))
+                  AND p.date_of_birth IS NOT DISTINCT FROM s.date_of_birth
+            )
+        """ if reconcile else ""
+        
+        rows = self.fetch_all(
+            f"""
+            WITH inserted AS (
+                INSERT INTO public.team_players (
+                    team_id, name, age, gender, email, date_of_birth, contact_number, parent_contact,
+                    participation_days, parental_consent, media_consent, queries_comments,
+                    standard_wfdf_certificate_url, advance_wfdf_certificate_url, community,
+                    registration_timestamp, verified
+                )
+                SELECT t.id, s.name,
+                       CASE WHEN s.date_of_birth IS NOT NULL THEN public.calculate_player_age(s.date_of_birth) ELSE 20 END,
+                       s.gender, s.email, s.date_of_birth, s.contact_number, s.parent_contact,
+                       s.participation_days, s.parental_consent, s.media_consent, s.queries_comments,
+                       s.standard_wfdf_certificate_url, s.advance_wfdf_certificate_url, s.community,
+                       s.registration_timestamp, false
+                FROM {staging} s
+                JOIN public.teams t ON t.tournament_id = %s AND LOWER(TRIM(t.name)) = LOWER(TRIM(s.team_name))
+                {reconcile_filter}
+                ORDER BY s.row_num
+                RETURNING team_id
+            ),
+            inserted_counts AS (
+                SELECT team_id, COUNT(*) AS inserted FROM inserted GROUP BY team_id
+            )
+            SELECT (ARRAY_AGG(s.team_name ORDER BY s.row_num))[1], COUNT(*), COALESCE(MAX(c.inserted), 0)
+            FROM {staging} s
+            JOIN public.teams t ON t.tournament_id = %s AND LOWER(TRIM(t.name)) = LOWER(TRIM(s.team_name))
+            LEFT JOIN inserted_counts c ON c.team_id = t.id
+            GROUP BY t.id
+            """,
+            (tournament_id, tournament_id)
+        )
+        count_rows(sum(row[2] for row in rows))
+        return {row[0]: (row[1], row[2]) for row in rows}
+    
+    @timed('merge')
+    def merge_checklist_items(self, staging: str, update_existing: bool = False) -> int:
+        """Upsert the staged tasks on (tournament_id, category, task_name). Returns the rows written.
+        
+        Existing tasks are left alone unless update_existing, which refreshes
+        description, priority and due date but keeps their status.
+        """
+        conflict_action = """
+            DO UPDATE SET description = EXCLUDED.description,
+                          priority = EXCLUDED.priority,
+                          due_date = EXCLUDED.due_date
+        """ if update_existing else "DO NOTHING"
+        
+        row = self.fetch_one(
+            f"""
+            WITH written AS (
+                INSERT INTO public.tournament_checklists
+                    (tournament_id, category, task_name, description, priority, due_date, status)
+                SELECT tournament_id, category, task_name, description, priority, due_date, 'pending'
+                FROM {staging}
+                ON CONFLICT (tournament_id, category, task_name) {conflict_action}
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM written
+            """
+        )
+        count_rows(row[0])
+        return row[0]
@@ -0,0 +1,177 @@
+"""
+Streaming building blocks for the player importers.
+
+The importers are a generator chain: read_csv_rows() resolves the header
+once (see columns.py) and yields raw value lists as the file is read, the
+script turns them into PendingPlayer items, batched() groups those into
+bounded-size lists and insert_player_batch() writes each list in one
+request. Only the batches in flight are held in memory, and the
+first inserts go out before the file has been fully read.
+
+In RPC mode batched_by_key() groups players per team instead, and
+insert_player_batch_rpc() sends each team's roster to the
+import_players_bulk() database function in a single call.
+"""
+
+import csv
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Tuple, TypeVar
+
+from .columns import FieldSpec, HeaderResolver
+from .metrics import count_rows, timed, timed_iter
+from .records import PlayerRecord
+from .workers import LogFn
+
+T = TypeVar('T')
+
+class PendingPlayer(NamedTuple):
+    """A parsed CSV row waiting to be inserted into team_players"""
+    team_name: str
+    record: PlayerRecord
+    row_hash: str
+    row_num: int = 0
+    
+    @property
+    def player_name(self) -> str:
+        return self.record.name
+    
+    @property
+    def gender(self) -> str:
+        return self.record.gender
+
+def read_csv_rows(csv_path: str, fields: Dict[str, FieldSpec]) -> Tuple[HeaderResolver, Iterator[Tuple[int, List[str]]]]:
+    """Resolve the header once and return (columns, rows).
+    
+    `rows` yields (row_num, row) as the file is read, where row is the plain
+    list of values. Row numbers count the header as row 1.
+    """
+    f = open(csv_path, 'r', encoding='utf-8-sig', newline='')
+    reader = csv.reader(f)
+    columns = HeaderResolver(next(reader, []), fields)
+    
+    def rows() -> Iterator[Tuple[int, List[str]]]:
+        with f:
+            for row_num, row in enumerate(timed_iter('read_csv', reader), start=2):
+                # Skip blank lines, as csv.DictReader does
+                if row:
+                    yield (row_num, row)
+    
+    return (columns, rows())
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group items into lists of at most `size`, without reading ahead"""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def batched_by_key(items: Iterable[T], key: Callable[[T], Hashable], size: int) -> Iterator[List[T]]:
+    """Group items into per-key lists of at most `size`.
+    
+    A key's list is yielded as soon as it is full; the rest are yielded at the
+    end in the order the keys were first seen. At most one partial list per
+    key is held at a time.
+    """
+    groups: Dict[Hashable, List[T]] = {}
+    for item in items:
+        group = groups.setdefault(key(item), [])
+        group.append(item)
+        if len(group) >= size:
+            yield group
+            groups[key(item)] = []
+    for group in groups.values():
+        if group:
+            yield group
+
+@timed('insert')
+def insert_player_batch(supabase, batch: List[PendingPlayer],
+                        log: LogFn = print) -> List[PendingPlayer]:
+    """Insert a batch of parsed players in one request.
+    
+    If the multi-row insert fails, the batch is retried row by row so that a
+    single bad row only loses itself. Returns the players that were inserted.
+    """
+    if len(batch) > 1:
+        try:
+            supabase.table('team_players').insert([player.record.to_row() for player in batch]).execute()
+            for player in batch:
+                log(f"    ✅ {player.player_name} ({player.gender})")
+            return batch
+        except Exception as e:
+            log(f"    ⚠️  Batch insert of {len(batch)} players failed ({str(e)}), retrying row by row")
+    
+    inserted: List[PendingPlayer] = []
+    
+    for player in batch:
+        try:
+            supabase.table('team_players').insert(player.record.to_row()).execute()
+            inserted.append(player)
+            log(f"    ✅ {player.player_name} ({player.gender})")
+        except Exception as e:
+            log(f"    ❌ Error importing {player.player_name or 'Unknown'}: {str(e)}")
+    
+    return inserted
+
+@timed('insert_rpc')
+def insert_player_batch_rpc(supabase, batch: List[PendingPlayer],
+                            log: LogFn = print) -> List[PendingPlayer]:
+    """Insert a batch through the import_players_bulk() RPC, one call per team.
+    
+    The database validates each team's players and computes their ages in a
+    single statement, so a call either inserts the whole roster or nothing.
+    A team whose call fails falls back to insert_player_batch().
+    """
+    teams: Dict[str, List[PendingPlayer]] = {}
+    for player in batch:
+        teams.setdefault(player.record.team_id, []).append(player)
+    
+    inserted: List[PendingPlayer] = []
+    
+    for team_id, players in teams.items():
+        roster = [player.record.roster_row() for player in players]
+        try:
+            supabase.rpc('import_players_bulk', {'_team_id': team_id, '_players': roster}).execute()
+        except Exception as e:
+            log(f"    ⚠️  Bulk import of {len(players)} {players[0].team_name} players failed ({str(e)}), "
+                f"falling back to table inserts")
+            inserted.extend(insert_player_batch(supabase, players, log))
+            continue
+        
+        for player in players:
+            log(f"    ✅ {player.player_name} ({player.gender})")
+        inserted.extend(players)
+    
+    return inserted
+
+class ImportStats:
+    """Per-team success/error/skipped counters, in the order teams were first seen"""
+    
+    def __init__(self):
+        self.teams: Dict[str, Dict[str, int]] = {}
+    
+    def add(self, team_name: str, success: int = 0, errors: int = 0, skipped: int = 0) -> None:
+        counts = self.teams.setdefault(team_name, {'success': 0, 'errors': 0, 'skipped': 0})
+        counts['success'] += success
+        counts['errors'] += errors
+        counts['skipped'] += skipped
+    
+    def record_batch(self, batch: List[PendingPlayer], inserted: List[PendingPlayer]) -> None:
+        """Count a written batch against the teams its players belong to"""
+        inserted_ids = {id(player) for player in inserted}
+        count_rows(len(inserted_ids))
+        for player in batch:
+            if id(player) in inserted_ids:
+                self.add(player.team_name, success=1)
+            else:
+                self.add(player.team_name, errors=1)
+    
+    def total(self, key: str) -> int:
+        return sum(counts[key] for counts in self.teams.values())
+    
+    def print_team_summaries(self) -> None:
+        for team_name, counts in self.teams.items():
+            print(f"  {team_name}: {counts['success']} successful, {counts['errors']} errors, "
+                  f"{counts['skipped']} skipped")
@@ -0,0 +1,131 @@
+"""
+Team ratings from match history, and snake-draft pools seeded by them.
+
+auto_seed_teams() seeds by wins and point differential in the tournament
+being seeded, so a team's opponents do not count and earlier tournaments
+are ignored. Here every completed match of every tournament is replayed
+once, in the order it was played, through an Elo model:
+
+- a team's rating moves by k * (result - expected result), so beating a
+  strong team is worth more than beating a weak one
+- the move grows with the logarithm of the goal margin, damped for a
+  favourite that was expected to win big anyway
+- when a team enters a new tournament its rating is pulled back toward
+  the mean by (1 - carryover), since squads change between events
+
+Teams are matched across tournaments by name (teams rows are per
+tournament). A team without history starts at INITIAL_RATING.
+
+Seeds are dealt into pools in snake order (1-8-9-16 / 2-7-10-15 / ...), so
+every pool gets one team from each tier of the ranking.
+"""
+
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .metrics import timed
+
+INITIAL_RATING = 1500.0
+DEFAULT_K_FACTOR = 32.0
+DEFAULT_CARRYOVER = 0.75
+
+def team_key(name: str) -> str:
+    """Identity of a team across tournaments: its name, case and spacing ignored"""
+    return ' '.join(name.lower().split())
+
+class TeamRecord:
+    """A team's rating and raw results across every tournament"""
+    
+    __slots__ = ('rating', 'played', 'wins', 'point_diff', 'tournament_id')
+    
+    def __init__(self):
+        self.rating = INITIAL_RATING
+        self.played = self.wins = self.point_diff = 0
+        self.tournament_id: Optional[str] = None
+
+class EloModel:
+    """Ratings built by replaying matches in order"""
+    
+    def __init__(self, k_factor: float = DEFAULT_K_FACTOR, carryover: float = DEFAULT_CARRYOVER):
+        self.k_factor = k_factor
+        self.carryover = carryover
+        self.teams: Dict[str, TeamRecord] = {}
+    
+    def _enter(self, key: str, tournament_id: str) -> TeamRecord:
+        team = self.teams.get(key) or self.teams.setdefault(key, TeamRecord())
+        if team.tournament_id != tournament_id:
+            if team.tournament_id is not None:
+                team.rating = INITIAL_RATING + self.carryover * (team.rating - INITIAL_RATING)
+            team.tournament_id = tournament_id
+        return team
+    
+    def record(self, key_a: str, key_b: str, score_a: int, score_b: int, tournament_id: str) -> None:
+        team_a = self._enter(key_a, tournament_id)
+        team_b = self._enter(key_b, tournament_id)
+        expected_a = 1 / (1 + 10 ** ((team_b.rating - team_a.rating) / 400))
+        result_a = 1.0 if score_a > score_b else 0.0 if score_a < score_b else 0.5
+        
+        margin = abs(score_a - score_b)
+        multiplier = 1.0
+        if margin:
+            winner_lead = (team_a.rating - team_b.rating) * (1 if score_a > score_b else -1)
+            multiplier = math.log(margin + 1) * 2.2 / (winner_lead * 0.001 + 2.2)
+        
+        change = self.k_factor * multiplier * (result_a - expected_a)
+        team_a.rating += change
+        team_b.rating -= change
+        for team, goals_for, goals_against in ((team_a, score_a, score_b), (team_b, score_b, score_a)):
+            team.played += 1
+            team.wins += goals_for > goals_against
+            team.point_diff += goals_for - goals_against
+    
+    def get(self, key: str) -> TeamRecord:
+        return self.teams.get(key) or TeamRecord()
+
+@timed('ratings')
+def rate_matches(matches: Iterable[Dict], team_keys: Dict[str, str], tournament_order: Dict[str, str],
+                 k_factor: float = DEFAULT_K_FACTOR, carryover: float = DEFAULT_CARRYOVER) -> EloModel:
+    """Replay completed matches in play order: tournament start date, then scheduled time, round and id.
+    
+    team_keys maps team ids to team_key(); tournament_order maps tournament ids to their start date.
+    """
+    ordered = sorted(
+        (tournament_order.get(match['tournament_id']) or '', match['tournament_id'],
+         match['scheduled_time'] or '', match['round'] or 0, match['id'], match)
+        for match in matches
+        if match['team_a_score'] is not None and match['team_b_score'] is not None
+        and match['team_a_id'] in team_keys and match['team_b_id'] in team_keys)
+    
+    model = EloModel(k_factor, carryover)
+    for *_, match in ordered:
+        model.record(team_keys[match['team_a_id']], team_keys[match['team_b_id']],
+                     match['team_a_score'], match['team_b_score'], match['tournament_id'])
+    return model
+
+class Seed(NamedTuple):
+    team_id: str
+    name: str
+    rating: float
+    played: int
+    wins: int
+
+def seed_teams(teams: Dict[str, str], model: EloModel) -> List[Seed]:
+    """The tournament's teams ({team_id: name}) ranked by rating, then experience, then name"""
+    seeds = []
+    for team_id, name in teams.items():
+        record = model.get(team_key(name))
+        seeds.append(Seed(team_id, name, record.rating, record.played, record.wins))
+    return sorted(seeds, key=lambda seed: (-seed.rating, -seed.played, seed.name.lower()))
+
+def snake_draft(ranked: Sequence[str], pool_count: int) -> List[List[str]]:
+    """Deal ranked items into pools: left to right, then right to left, and so on"""
+    pools: List[List[str]] = [[] for _ in range(pool_count)]
+    for index, item in enumerate(ranked):
+        tier, position = divmod(index, pool_count)
+        pools[position if tier % 2 == 0 else pool_count - 1 - position].append(item)
+    return pools
+
+def pool_spread(pools: Sequence[Sequence[str]], ratings: Dict[str, float]) -> Tuple[float, List[float]]:
+    """Mean rating of each pool and the gap between the strongest and weakest pool"""
+    means = [sum(ratings[team_id] for team_id in pool) / len(pool) for pool in pools if pool]
+    return ((max(means) - min(means)) if means else 0.0, means)
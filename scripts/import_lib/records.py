@@ -0,0 +1,103 @@
+"""
+Compact records for rows on their way through the importers.
+
+Each registration row is parsed once into a PlayerRecord and each
+checklist row into a ChecklistItem. Both use __slots__, so a record has
+no per-instance __dict__: it takes about a third of the memory of the
+16-key dict the scripts used to build per player, and attribute access
+is a fixed offset instead of a hash lookup. Dedup, batching and
+validation work on the records; the wire format (the dicts PostgREST and
+the local stand-in database take) is only built by to_row() when a batch
+is written, and COPY reads the attributes directly.
+"""
+
+from operator import attrgetter
+from typing import Dict, Optional, Tuple
+
+# team_players columns a record carries, in insert order
+PLAYER_COLUMNS: Tuple[str, ...] = (
+    'team_id', 'name', 'gender', 'email', 'date_of_birth', 'contact_number', 'parent_contact',
+    'participation_days', 'parental_consent', 'media_consent', 'queries_comments',
+    'standard_wfdf_certificate_url', 'advance_wfdf_certificate_url', 'community',
+    'registration_timestamp', 'verified',
+)
+
+# tournament_checklists columns taken from the CSV
+CHECKLIST_COLUMNS: Tuple[str, ...] = ('category', 'task_name', 'description', 'priority', 'due_date')
+
+_player_values = attrgetter(*PLAYER_COLUMNS)
+_checklist_values = attrgetter(*CHECKLIST_COLUMNS)
+
+class PlayerRecord:
+    """One parsed registration row, as the team_players columns it will be inserted with"""
+    
+    __slots__ = PLAYER_COLUMNS
+    
+    def __init__(self, team_id: Optional[str], name: str, gender: str, email: str,
+                 date_of_birth: Optional[str] = None, contact_number: Optional[str] = None,
+                 parent_contact: Optional[str] = None, participation_days: str = 'both_days',
+                 parental_consent: bool = False, media_consent: bool = False,
+                 queries_comments: Optional[str] = None, standard_wfdf_certificate_url: Optional[str] = None,
+                 advance_wfdf_certificate_url: Optional[str] = None, community: Optional[str] = None,
+                 registration_timestamp: Optional[str] = None, verified: bool = False):
+        self.team_id = team_id
+        self.name = name
+        self.gender = gender
+        self.email = email
+        self.date_of_birth = date_of_birth
+        self.contact_number = contact_number
+        self.parent_contact = parent_contact
+        self.participation_days = participation_days
+        self.parental_consent = parental_consent
+        self.media_consent = media_consent
+        self.queries_comments = queries_comments
+        self.standard_wfdf_certificate_url = standard_wfdf_certificate_url
+        self.advance_wfdf_certificate_url = advance_wfdf_certificate_url
+        self.community = community
+        self.registration_timestamp = registration_timestamp
+        self.verified = verified
+    
+    def to_row(self) -> Dict:
+        """The team_players insert payload"""
+        return dict(zip(PLAYER_COLUMNS, _player_values(self)))
+    
+    def roster_row(self) -> Dict:
+        """The payload for import_players_bulk(), which takes the team once for the whole roster"""
+        row = self.to_row()
+        del row['team_id']
+        return row
+    
+    def __repr__(self) -> str:
+        return f"PlayerRecord({self.name!r}, team_id={self.team_id!r}, date_of_birth={self.date_of_birth!r})"
+
+class ChecklistItem:
+    """One checklist task from the CSV, applied to every selected tournament"""
+    
+    __slots__ = CHECKLIST_COLUMNS
+    
+    def __init__(self, category: str, task_name: str, description: Optional[str] = None,
+                 priority: str = 'medium', due_date: Optional[str] = None):
+        self.category = category
+        self.task_name = task_name
+        self.description = description
+        self.priority = priority
+        self.due_date = due_date
+    
+    @property
+    def key(self) -> Tuple[str, str]:
+        """The task's identity within a tournament, as in the unique constraint"""
+        return (self.category, self.task_name)
+    
+    def values(self) -> Tuple:
+        """Column values in CHECKLIST_COLUMNS order"""
+        return _checklist_values(self)
+    
+    def to_row(self, tournament_id: str, status: Optional[str] = None) -> Dict:
+        """The tournament_checklists upsert payload. Without status, an existing task keeps its own"""
+        row = {'tournament_id': tournament_id, **dict(zip(CHECKLIST_COLUMNS, self.values()))}
+        if status is not None:
+            row['status'] = status
+        return row
+    
+    def __repr__(self) -> str:
+        return f"ChecklistItem({self.category!r}, {self.task_name!r})"
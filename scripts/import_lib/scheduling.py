@@ -0,0 +1,267 @@
+"""
+Match scheduling: round-robin fixtures packed into (field x time slot).
+
+The app's scheduleMatches() (src/lib/bracketUtils.ts) moves to the next
+time slot after every match, so only one field is ever in use, and
+conflicts are found afterwards with check_match_conflict(), one query per
+team. Here a day is cut into slots of match + break minutes, every field
+of a slot is filled before the next slot is opened, and each match goes
+into the earliest slot where a field is free and both teams have had
+their rest. Team and field bookings are kept in IntervalIndex, so every
+conflict check is a binary search in memory.
+
+Fixtures come from the circle method per pool, interleaved round by round
+across pools, so every team plays once per round and pools progress
+together.
+"""
+
+import bisect
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .metrics import timed
+
+# Defaults of the tournament_settings columns (20250103000000_match_scheduling_system.sql)
+DEFAULT_SETTINGS = {
+    'bracket_type': 'round_robin',
+    'match_duration_minutes': 90,
+    'break_time_minutes': 10,
+    'fields': ['Field 1', 'Field 2'],
+    'start_time': '09:00:00',
+    'end_time': '18:00:00',
+    'pool_count': 4,
+    'pool_size': 4,
+}
+
+# Bracket types whose matches are all known before play starts
+SCHEDULABLE_BRACKETS = ('round_robin', 'pools')
+
+# Days the packer looks ahead before giving up on a fixture
+MAX_DAYS = 60
+
+def parse_clock(value: str) -> time:
+    """'09:00' or '09:00:00' from a TIME column"""
+    return time.fromisoformat(value if value.count(':') == 2 else f"{value}:00")
+
+def pool_name(index: int) -> str:
+    """Pool names as the app writes them: Pool A, Pool B, ..."""
+    return f"Pool {chr(65 + index)}"
+
+class ScheduleSettings(NamedTuple):
+    """A tournament_settings row, with the column defaults filled in"""
+    bracket_type: str
+    match_minutes: int
+    break_minutes: int
+    fields: Tuple[str, ...]
+    start_time: time
+    end_time: time
+    pool_count: int
+    pool_size: int
+    
+    @classmethod
+    def from_row(cls, row: Optional[Dict]) -> 'ScheduleSettings':
+        values = dict(DEFAULT_SETTINGS)
+        values.update({key: value for key, value in (row or {}).items() if value is not None})
+        return cls(values['bracket_type'], int(values['match_duration_minutes']), int(values['break_time_minutes']),
+                   tuple(values['fields']), parse_clock(str(values['start_time'])),
+                   parse_clock(str(values['end_time'])), int(values['pool_count']), int(values['pool_size']))
+    
+    @property
+    def slot_minutes(self) -> int:
+        return self.match_minutes + self.break_minutes
+
+class Fixture(NamedTuple):
+    """One pairing to schedule; match_id is set when it reuses an existing matches row"""
+    team_a_id: str
+    team_b_id: str
+    pool: Optional[str]
+    round: int
+    match_id: Optional[str] = None
+
+class Placement(NamedTuple):
+    """Where a fixture was put: its slot, field and start in minutes from the first day's midnight"""
+    fixture: Fixture
+    slot: int
+    field: str
+    start: int
+
+def round_robin_rounds(team_ids: Sequence[str]) -> List[List[Tuple[str, str]]]:
+    """Circle method: n-1 rounds (n with an odd count) in which every team plays at most once"""
+    teams: List[Optional[str]] = list(team_ids)
+    if len(teams) < 2:
+        return []
+    if len(teams) % 2:
+        teams.append(None)  # Bye
+    
+    rounds = []
+    half = len(teams) // 2
+    for _ in range(len(teams) - 1):
+        pairs = [(teams[i], teams[-1 - i]) for i in range(half)]
+        rounds.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        # Keep the first team fixed and rotate the rest
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+def pool_fixtures(pools: Dict[Optional[str], List[str]]) -> List[Fixture]:
+    """Round-robin fixtures of every pool, ordered round by round across the pools"""
+    rounds_by_pool = {pool: round_robin_rounds(team_ids) for pool, team_ids in pools.items()}
+    fixtures = []
+    for round_index in range(max((len(rounds) for rounds in rounds_by_pool.values()), default=0)):
+        for pool, rounds in rounds_by_pool.items():
+            if round_index < len(rounds):
+                fixtures.extend(Fixture(a, b, pool, round_index + 1) for a, b in rounds[round_index])
+    return fixtures
+
+def split_into_pools(team_ids: Sequence[str], settings: ScheduleSettings) -> Dict[Optional[str], List[str]]:
+    """Pools for a tournament without stored pool assignments, dealt like generatePools() does"""
+    if settings.bracket_type == 'round_robin' or settings.pool_count <= 1:
+        return {None: list(team_ids)}
+    
+    pools: Dict[Optional[str], List[str]] = {pool_name(index): [] for index in range(settings.pool_count)}
+    names = list(pools)
+    for index, team_id in enumerate(team_ids):
+        pools[names[index % len(names)]].append(team_id)
+    return pools
+
+class IntervalIndex:
+    """Busy time per key (a team or a field) as sorted, merged [start, end) intervals in minutes"""
+    
+    def __init__(self):
+        self._starts: Dict[Hashable, List[int]] = {}
+        self._ends: Dict[Hashable, List[int]] = {}
+    
+    def add(self, key: Hashable, start: int, end: int) -> None:
+        starts = self._starts.setdefault(key, [])
+        ends = self._ends.setdefault(key, [])
+        # Merge with every interval the new one overlaps or touches
+        low = bisect.bisect_left(ends, start)
+        high = bisect.bisect_right(starts, end)
+        if low < high:
+            start = min(start, starts[low])
+            end = max(end, ends[high - 1])
+        starts[low:high] = [start]
+        ends[low:high] = [end]
+    
+    def overlaps(self, key: Hashable, start: int, end: int) -> bool:
+        """Whether [start, end) intersects anything booked for the key"""
+        starts = self._starts.get(key)
+        if not starts:
+            return False
+        index = bisect.bisect_left(starts, end) - 1
+        return index >= 0 and self._ends[key][index] > start
+
+class SlotGrid:
+    """The time slots of a tournament: slots_per_day per day from start_time, one day after another"""
+    
+    def __init__(self, settings: ScheduleSettings, first_day: date, tz: tzinfo):
+        self.settings = settings
+        self.first_day = first_day
+        self.tz = tz
+        self.day_start = settings.start_time.hour * 60 + settings.start_time.minute
+        day_end = settings.end_time.hour * 60 + settings.end_time.minute
+        if day_end - self.day_start < settings.match_minutes:
+            raise ValueError(f"No match fits between {settings.start_time} and {settings.end_time}")
+        # Every match has to finish by end_time; the break after the last one may run over
+        self.slots_per_day = (day_end - self.day_start - settings.match_minutes) // settings.slot_minutes + 1
+        self.origin = datetime.combine(first_day, time())
+    
+    def start(self, slot: int) -> int:
+        day, offset = divmod(slot, self.slots_per_day)
+        return day * 24 * 60 + self.day_start + offset * self.settings.slot_minutes
+    
+    def day(self, slot: int) -> date:
+        return self.first_day + timedelta(days=slot // self.slots_per_day)
+    
+    def to_datetime(self, minutes: int) -> datetime:
+        # Wall-clock arithmetic, so a day keeps its start_time across a DST change
+        return (self.origin + timedelta(minutes=minutes)).replace(tzinfo=self.tz)
+    
+    def to_minutes(self, value: str) -> int:
+        """Minutes from the first day's midnight for a scheduled_time read back from the database"""
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(self.tz).replace(tzinfo=None)
+        return int((moment - self.origin).total_seconds() // 60)
+
+class MatchPacker:
+    """Greedy packing of fixtures into the earliest free (slot, field) that respects team rest"""
+    
+    def __init__(self, grid: SlotGrid, rest_minutes: int = 0):
+        self.grid = grid
+        self.settings = grid.settings
+        self.rest_minutes = rest_minutes
+        self.teams = IntervalIndex()
+        self.fields = IntervalIndex()
+        self._used: Dict[int, List[str]] = {}
+        self._next_slot: Dict[str, int] = {}
+        self._first_open = 0
+    
+    def block(self, team_ids: Iterable[str], field: Optional[str], start: int) -> None:
+        """Book a match that is already on the schedule and stays where it is"""
+        end = start + self.settings.match_minutes
+        for team_id in team_ids:
+            self.teams.add(team_id, start, end)
+        if field:
+            self.fields.add(field, start, start + self.settings.slot_minutes)
+    
+    def _free_field(self, slot: int, start: int) -> Optional[str]:
+        used = self._used.get(slot, ())
+        for field in self.settings.fields:
+            if field not in used and not self.fields.overlaps(field, start, start + self.settings.slot_minutes):
+                return field
+        return None
+    
+    def _teams_rested(self, fixture: Fixture, start: int) -> bool:
+        low = start - self.rest_minutes
+        high = start + self.settings.match_minutes + self.rest_minutes
+        return not (self.teams.overlaps(fixture.team_a_id, low, high)
+                    or self.teams.overlaps(fixture.team_b_id, low, high))
+    
+    def place(self, fixture: Fixture) -> Placement:
+        slot = max(self._first_open, self._next_slot.get(fixture.team_a_id, 0),
+                   self._next_slot.get(fixture.team_b_id, 0))
+        last_slot = MAX_DAYS * self.grid.slots_per_day
+        while slot < last_slot:
+            start = self.grid.start(slot)
+            field = self._free_field(slot, start)
+            if field is not None and self._teams_rested(fixture, start):
+                self._used.setdefault(slot, []).append(field)
+                self.block((fixture.team_a_id, fixture.team_b_id), None, start)
+                self._next_slot[fixture.team_a_id] = self._next_slot[fixture.team_b_id] = slot + 1
+                while len(self._used.get(self._first_open, ())) >= len(self.settings.fields):
+                    self._first_open += 1
+                return Placement(fixture, slot, field, start)
+            slot += 1
+        raise ValueError(f"No slot within {MAX_DAYS} days for {fixture.team_a_id} vs {fixture.team_b_id}")
+    
+    @timed('schedule')
+    def pack(self, fixtures: Iterable[Fixture]) -> List[Placement]:
+        return [self.place(fixture) for fixture in fixtures]
+
+class Booking(NamedTuple):
+    """A scheduled match as read from the matches table"""
+    match_id: str
+    team_a_id: str
+    team_b_id: str
+    field: Optional[str]
+    start: int
+
+def find_conflicts(bookings: Sequence[Booking], match_minutes: int) -> List[Tuple[Booking, Booking, str]]:
+    """Pairs of matches that share a team or a field at the same time, found in one sorted sweep"""
+    conflicts = []
+    active: Dict[Hashable, List[Booking]] = {}
+    for booking in sorted(bookings, key=lambda booking: booking.start):
+        keys = [('team', booking.team_a_id), ('team', booking.team_b_id)]
+        if booking.field:
+            keys.append(('field', booking.field))
+        seen = set()
+        for key in keys:
+            # Drop matches on this key that have finished by the time this one starts
+            running = [other for other in active.get(key, []) if other.start + match_minutes > booking.start]
+            for other in running:
+                if other.match_id not in seen:
+                    seen.add(other.match_id)
+                    conflicts.append((other, booking, key[0]))
+            running.append(booking)
+            active[key] = running
+    return conflicts
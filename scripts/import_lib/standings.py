@@ -0,0 +1,72 @@
+"""
+Pool standings totals, computed in one pass over the completed matches.
+
+pool_standings_snapshot (20250122000000_pool_standings_snapshot.sql) is
+kept current by triggers as scores come in. After a bulk import of
+matches, or to check the snapshot has not drifted, rebuild_standings.py
+recomputes it here: the completed matches are read page by page and each
+one adds to both teams' totals, then every pool assignment gets its
+team's totals. The rules match the triggers: a NULL score makes no win,
+loss or draw and adds no goals, and a team carries the same totals in
+every pool it is assigned to.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .metrics import timed
+
+STANDINGS_COLUMNS = ('wins', 'losses', 'draws', 'goals_for', 'goals_against')
+
+# Primary key of pool_standings_snapshot
+STANDINGS_KEY = 'pool_id,team_id'
+
+class Totals:
+    """One team's results across its completed matches"""
+    
+    __slots__ = STANDINGS_COLUMNS
+    
+    def __init__(self):
+        self.wins = self.losses = self.draws = self.goals_for = self.goals_against = 0
+    
+    def add(self, goals_for: Optional[int], goals_against: Optional[int]) -> None:
+        if goals_for is not None and goals_against is not None:
+            if goals_for > goals_against:
+                self.wins += 1
+            elif goals_for < goals_against:
+                self.losses += 1
+            else:
+                self.draws += 1
+        self.goals_for += goals_for or 0
+        self.goals_against += goals_against or 0
+    
+    def values(self) -> Tuple[int, ...]:
+        return (self.wins, self.losses, self.draws, self.goals_for, self.goals_against)
+
+@timed('standings')
+def team_totals(matches: Iterable[Dict]) -> Dict[str, Totals]:
+    """Fold completed matches into per-team totals"""
+    totals: Dict[str, Totals] = {}
+    for match in matches:
+        team_a = totals.get(match['team_a_id']) or totals.setdefault(match['team_a_id'], Totals())
+        team_b = totals.get(match['team_b_id']) or totals.setdefault(match['team_b_id'], Totals())
+        team_a.add(match['team_a_score'], match['team_b_score'])
+        team_b.add(match['team_b_score'], match['team_a_score'])
+    return totals
+
+def standings_rows(assignments: Iterable[Dict], pool_tournaments: Dict[str, str],
+                   totals: Dict[str, Totals]) -> List[Dict]:
+    """The pool_standings_snapshot upsert payload, one row per pool assignment"""
+    updated_at = datetime.now(timezone.utc).isoformat()
+    empty = Totals()
+    rows = []
+    for assignment in assignments:
+        team = totals.get(assignment['team_id'], empty)
+        rows.append({
+            'pool_id': assignment['pool_id'],
+            'team_id': assignment['team_id'],
+            'tournament_id': pool_tournaments[assignment['pool_id']],
+            **dict(zip(STANDINGS_COLUMNS, team.values())),
+            'updated_at': updated_at,
+        })
+    return rows
@@ -0,0 +1,92 @@
+"""
+Attendance streaks, recomputed in one date-ordered pass.
+
+update_attendance_streak() (20250108000000_attendance_streak_tracker.sql)
+advances a child's streak one attendance row at a time, in whatever order
+the rows are written. After import_attendance_bulk() has loaded rows with
+the trigger switched off, import_attendance.py recomputes the streaks of
+the affected children here instead: their attendance is sorted once by
+(child, session date, session time) and folded with the trigger's rules:
+
+- present on the same day as, or the day after, the last session
+  continues the streak; any other present day starts a new one
+- absent ends the streak (current_streak 0, no start date)
+- longest_streak is the longest streak seen, and a badge is earned for
+  every milestone it reaches
+
+Attendance of a session that no longer exists is skipped, as the trigger
+skips it.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .metrics import timed
+
+# (streak length, badge_type) as awarded by check_milestone_badges()
+MILESTONE_BADGES: Tuple[Tuple[int, str], ...] = ((5, 'bronze'), (10, 'silver'), (20, 'gold'), (50, 'platinum'))
+
+# (session date, session time) by session id
+SessionTimes = Dict[str, Tuple[date, str]]
+
+class Streak:
+    """One child's attendance_streaks row"""
+    
+    __slots__ = ('current', 'longest', 'started', 'last_date')
+    
+    def __init__(self):
+        self.current = self.longest = 0
+        self.started: Optional[date] = None
+        self.last_date: Optional[date] = None
+    
+    def mark(self, session_date: date, present: bool) -> None:
+        if present:
+            last_date = self.last_date
+            if last_date is None or session_date == last_date or session_date == last_date + timedelta(days=1):
+                self.current += 1
+                if self.started is None:
+                    self.started = session_date
+            else:
+                self.current = 1
+                self.started = session_date
+            self.longest = max(self.longest, self.current)
+        else:
+            self.current = 0
+            self.started = None
+        self.last_date = session_date
+    
+    def badges(self) -> List[Tuple[int, str]]:
+        return [(milestone, badge) for milestone, badge in MILESTONE_BADGES if self.longest >= milestone]
+
+def session_times(sessions: Iterable[Dict]) -> SessionTimes:
+    return {session['id']: (date.fromisoformat(session['date']), session['time']) for session in sessions}
+
+@timed('streaks')
+def compute_streaks(attendance: Iterable[Dict], sessions: SessionTimes) -> Dict[str, Streak]:
+    """Fold attendance rows (child_id, session_id, present) into each child's streak"""
+    ordered = sorted(
+        (row['child_id'], *sessions[row['session_id']], row['session_id'], row['present'])
+        for row in attendance if row['session_id'] in sessions)
+    
+    streaks: Dict[str, Streak] = {}
+    for child_id, session_date, _, _, present in ordered:
+        streak = streaks.get(child_id) or streaks.setdefault(child_id, Streak())
+        streak.mark(session_date, present)
+    return streaks
+
+def streak_rows(streaks: Dict[str, Streak]) -> List[Dict]:
+    """The attendance_streaks upsert payload, one row per child"""
+    updated_at = datetime.now(timezone.utc).isoformat()
+    return [{
+        'child_id': child_id,
+        'current_streak': streak.current,
+        'longest_streak': streak.longest,
+        'last_session_date': streak.last_date.isoformat() if streak.last_date else None,
+        'streak_started_date': streak.started.isoformat() if streak.started else None,
+        'updated_at': updated_at,
+    } for child_id, streak in streaks.items()]
+
+def badge_rows(streaks: Dict[str, Streak]) -> List[Dict]:
+    """attendance_badges rows for every milestone reached; existing badges are kept as they are"""
+    return [{'child_id': child_id, 'badge_type': badge, 'milestone_sessions': milestone}
+            for child_id, streak in streaks.items() for milestone, badge in streak.badges()]
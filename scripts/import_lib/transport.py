@@ -0,0 +1,95 @@
+"""
+httpx transport that retries rate-limited and failed PostgREST requests.
+
+Imported by create_import_client() only when a script connects, so that
+--help and --validate-only runs never load httpx. See client.py for the
+retry policy.
+"""
+
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from . import metrics
+from .client import DEFAULT_MAX_RETRIES, AdaptiveLimiter, backoff_delay
+from .workers import LogFn, log_line
+
+# The server turned the request away without processing it
+THROTTLE_STATUSES = {429, 503}
+# The request may or may not have been applied
+SERVER_ERROR_STATUSES = {500, 502, 504, 520, 521, 522, 523, 524}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+def is_replay_safe(request: httpx.Request) -> bool:
+    """Whether sending the request twice leaves the same rows as sending it once"""
+    return (request.method in IDEMPOTENT_METHODS or
+            'resolution=' in request.headers.get('Prefer', ''))
+
+def request_size(request: httpx.Request) -> int:
+    return int(request.headers.get('Content-Length') or 0)
+
+class RetryTransport(httpx.BaseTransport):
+    """Pooled keep-alive transport that retries 429/5xx responses under an AIMD concurrency limit"""
+    
+    def __init__(self, max_concurrency: int = 1, max_retries: int = DEFAULT_MAX_RETRIES,
+                 log: LogFn = log_line, transport: Optional[httpx.BaseTransport] = None):
+        self.max_retries = max_retries
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.log = log
+        self.retries = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._transport = transport or httpx.HTTPTransport(
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        )
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            started = self.limiter.acquire()
+            throttled = False
+            try:
+                response = self._transport.handle_request(request)
+                if metrics.recording():
+                    # Read the body here so the latency covers the whole response
+                    response.read()
+                    metrics.record_request(str(response.status_code), time.monotonic() - started,
+                                           request_size(request), len(response.content))
+            except httpx.TransportError as e:
+                self.limiter.release(started, throttled=False)
+                metrics.record_request(type(e).__name__, time.monotonic() - started, request_size(request), 0)
+                # A connection that was never made cannot have applied the request
+                if attempt >= self.max_retries or not (isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                                                       or is_replay_safe(request)):
+                    raise
+                retry_reason, retry_after = type(e).__name__, None
+            else:
+                status = response.status_code
+                throttled = status in THROTTLE_STATUSES
+                self.limiter.release(started, throttled)
+                retryable = throttled or (status in SERVER_ERROR_STATUSES and is_replay_safe(request))
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                retry_reason, retry_after = f"HTTP {status}", response.headers.get('Retry-After')
+                response.read()
+                response.close()
+            
+            delay = backoff_delay(attempt, retry_after)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+                self.throttled += throttled
+            self.log(f"    🔁 {request.method} {request.url.path}: {retry_reason}, "
+                     f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+    
+    def close(self) -> None:
+        self._transport.close()
+    
+    def report(self, log: LogFn = print) -> None:
+        """Print how often requests were retried and where the concurrency limit ended up"""
+        if self.retries:
+            log(f"\n🔁 {self.retries} request retries ({self.throttled} rate limited), "
+                f"concurrency limit {int(self.limiter.limit)}/{self.limiter.maximum}")
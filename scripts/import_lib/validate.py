@@ -0,0 +1,120 @@
+"""
+Offline check of a registration CSV, run before an import connects.
+
+check_player_csv() puts the whole file through the importer's own row
+parsing with no database involved: the header must have the required
+columns, and every row is parsed, dates and all. The scripts run it
+before they import supabase or open a connection, so a wrong file or a
+bad column fails in a fraction of a second, and --validate-only stops
+there.
+
+Delta imports only check the rows they will import: with a watermark,
+rows registered at or before it are dropped by RegistrationCutoff before
+any parsing, as the import itself does.
+"""
+
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .columns import PLAYER_FIELDS, HeaderResolver
+from .dates import DATE_FORMATS, TIMESTAMP_FORMATS, DateParser
+from .journal import RegistrationCutoff
+from .lookups import team_name_key
+from .metrics import timed
+from .normalize import ColumnNormalizer, normalized_rows
+from .pipeline import read_csv_rows
+from .workers import LogFn
+
+class CsvCheck:
+    """What an offline pass over a registration CSV found"""
+    
+    def __init__(self):
+        self.rows = 0
+        # Rows left out as registered at or before the watermark
+        self.skipped = 0
+        # Players per team, by team_name_key()
+        self.teams: Dict[str, int] = {}
+        self.rows_without_team: List[int] = []
+        self.errors: List[Tuple[int, str]] = []
+        self.dates = DateParser(DATE_FORMATS)
+        self.timestamps = DateParser(TIMESTAMP_FORMATS)
+    
+    @property
+    def players(self) -> int:
+        return sum(self.teams.values())
+    
+    @property
+    def ok(self) -> bool:
+        """No row would be skipped or fail, and every date could be read"""
+        return not (self.rows_without_team or self.errors or self.dates.failures or self.timestamps.failures)
+    
+    def report(self, log: LogFn = print, details: bool = False, limit: int = 20) -> None:
+        """One summary line; with details, every problem found as well"""
+        log(f"🔎 Checked {self.rows} rows: {self.players} players in {len(self.teams)} teams, "
+            f"{len(self.errors)} rows with errors, {len(self.rows_without_team)} rows without a team"
+            + (f" ({self.skipped} older rows skipped)" if self.skipped else ""))
+        if not details:
+            return
+        
+        if self.rows_without_team:
+            log(f"\n⚠️  Rows without a team name: {', '.join(str(row_num) for row_num in self.rows_without_team[:limit])}"
+                + (" ..." if len(self.rows_without_team) > limit else ""))
+        if self.errors:
+            log(f"\n❌ {len(self.errors)} rows could not be parsed:")
+            for row_num, message in self.errors[:limit]:
+                log(f"    Row {row_num}: {message}")
+            if len(self.errors) > limit:
+                log(f"    ... and {len(self.errors) - limit} more")
+        self.dates.report('date of birth', log)
+        self.timestamps.report('Timestamp', log)
+
+def open_player_csv(csv_path: str, required: Sequence[str]) -> Tuple[HeaderResolver, Iterator[Tuple[int, List[str]]]]:
+    """read_csv_rows() for PLAYER_FIELDS, raising ValueError if the file is missing or lacks a required column"""
+    if not os.path.isfile(csv_path):
+        raise ValueError(f"CSV file not found: {csv_path}")
+    
+    columns, rows = read_csv_rows(csv_path, PLAYER_FIELDS)
+    missing = columns.missing(required)
+    if missing:
+        raise ValueError(f"CSV has no column for: {', '.join(missing)}")
+    return (columns, rows)
+
+@timed('validate')
+def check_player_rows(columns: HeaderResolver, rows: Iterable[Tuple[int, List[str]]], parse_row: Callable,
+                      normalizer: ColumnNormalizer) -> CsvCheck:
+    """Parse the rows with parse_row, the importer's parse_player_row(), without a database"""
+    check = CsvCheck()
+    for row_num, row, normalized in normalized_rows(columns, rows, normalizer):
+        check.rows += 1
+        team_name = columns.get(row, 'team_name').strip()
+        if not team_name:
+            check.rows_without_team.append(row_num)
+            continue
+        
+        try:
+            parse_row(row_num, row, columns, None, columns.get(row, 'community').strip(),
+                      check.dates, check.timestamps, normalized)
+        except Exception as e:
+            check.errors.append((row_num, str(e)))
+            continue
+        team = team_name_key(team_name)
+        check.teams[team] = check.teams.get(team, 0) + 1
+    
+    return check
+
+def check_player_csv(csv_path: str, required: Sequence[str], parse_row: Callable,
+                     normalizer: ColumnNormalizer, since: Optional[str] = None) -> CsvCheck:
+    """Check every row of the CSV, or with since only the rows registered after it.
+    
+    Raises ValueError if the file is missing or its header lacks a required column.
+    """
+    columns, rows = open_player_csv(csv_path, required)
+    cutoff = None
+    if since:
+        cutoff = RegistrationCutoff(since)
+        rows = cutoff.filter(columns, rows)
+    
+    check = check_player_rows(columns, rows, parse_row, normalizer)
+    if cutoff is not None:
+        check.skipped = cutoff.skipped
+    return check
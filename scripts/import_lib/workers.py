@@ -0,0 +1,79 @@
+"""
+Bounded worker pool for writing insert batches concurrently.
+
+Inserts are network-bound and independent of each other, so batches can
+be written from parallel threads. At most `workers * 2` batches are in
+flight at once, which keeps memory flat however long the input stream is.
+
+Output is buffered per batch and printed as one block when the batch
+finishes, so lines from different batches never interleave. Results come
+back in submission order, which keeps the totals deterministic regardless
+of completion order.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, List, TypeVar
+
+B = TypeVar('B')
+T = TypeVar('T')
+
+# Receives a line of progress output
+LogFn = Callable[[str], None]
+
+_print_lock = threading.Lock()
+
+def log_line(line: str = '') -> None:
+    """Print a line without interleaving with batches flushed by workers"""
+    with _print_lock:
+        print(line, flush=True)
+
+class BufferedLog:
+    """Collects a batch's progress lines until the batch is finished"""
+    
+    def __init__(self):
+        self.lines: List[str] = []
+    
+    def __call__(self, line: str = '') -> None:
+        self.lines.append(line)
+    
+    def flush(self) -> None:
+        if self.lines:
+            log_line('\n'.join(self.lines))
+        self.lines = []
+
+def run_batches(batches: Iterable[B],
+                process_batch: Callable[[B, LogFn], T],
+                workers: int = 1) -> Iterator[T]:
+    """Run process_batch(batch, log) for every batch, yielding results in order.
+    
+    With workers == 1 batches run one after another and log straight to
+    stdout. Otherwise up to `workers` batches run at once and each batch's
+    output is printed as a single block when it completes. `batches` is
+    consumed lazily, so it can be a generator over a file being read.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield process_batch(batch, log_line)
+        return
+    
+    def run(batch: B) -> T:
+        log = BufferedLog()
+        try:
+            return process_batch(batch, log)
+        finally:
+            log.flush()
+    
+    # concurrent.futures pulls in logging; single-worker runs never need it
+    from concurrent.futures import ThreadPoolExecutor
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight: Deque = deque()
+        
+        for batch in batches:
+            in_flight.append(executor.submit(run, batch))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        
+        while in_flight:
+            yield in_flight.popleft().result()
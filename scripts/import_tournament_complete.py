@@ -3,340 +3,660 @@
 Complete Tournament CSV Import Script
 Automatically creates tournament, teams, and imports all players from CSV
 
+The CSV is streamed: rows are parsed as they are read and inserted in
+bounded-size batches, so memory stays flat regardless of file size.
+With --rpc each team's roster is sent to the import_players_bulk()
+database function in one call instead.
+With --copy the rows are streamed over a direct Postgres connection into
+a staging table with COPY and merged in a single transaction.
+With --manifest or --csv-dir several files are imported in one run, each
+into its own tournament: files are parsed in a process pool and written
+through one shared, rate-limited client, with a combined summary at the end.
+
 Usage:
     python scripts/import_tournament_complete.py --csv "path/to/file.csv"
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --batch-size 200 --workers 8
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --resume --reconcile
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --rpc
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --copy --database-url postgresql://postgres@localhost:54322/postgres
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --dry-run
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --validate-only
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --target sqlite:///rehearsal.db
+    python scripts/import_tournament_complete.py --manifest season.csv --workers 4
+    python scripts/import_tournament_complete.py --csv-dir registrations/ --tournament-date 15/02/2025 --processes 4
+    python scripts/import_tournament_complete.py --csv "path/to/file.csv" --profile --metrics-json metrics.json --cprofile import.prof
 
 Requirements:
     pip install supabase python-dotenv
+    pip install "psycopg[binary]"  # only for --copy
+    pip install pandas  # optional, column-wise normalization
 """
 
 import argparse
-import csv
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
-from supabase import create_client, Client
-from dotenv import load_dotenv
-import uuid
+from functools import partial
+from operator import attrgetter
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
-# Load environment variables
-load_dotenv()
+from import_lib.backends import open_local_backend
+from import_lib.batch import BatchResult, ImportJob, jobs_from_directory, map_in_processes, print_batch_summary, read_manifest
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.columns import PLAYER_FIELDS, HeaderResolver
+from import_lib.dedup import DEDUP_MODES, DuplicateFilter, load_existing_identities
+from import_lib.dates import DATE_FORMATS, TIMESTAMP_FORMATS, DateParser
+from import_lib.journal import ImportJournal, PlayerKey, load_existing_player_keys, player_key, row_key
+from import_lib import metrics
+from import_lib.lookups import LookupCache
+from import_lib.normalize import (ENGINES, PARENTAL_CONSENT_KEYWORDS, ColumnNormalizer, Normalized, keyword_pattern,
+                                  map_gender, map_participation_days, normalized_rows, parse_permissions,
+                                  resolve_engine)
+from import_lib.pgcopy import PLAYER_STAGING_COLUMNS, CopyLoader, resolve_database_url
+from import_lib.pipeline import (ImportStats, PendingPlayer, batched, batched_by_key, insert_player_batch,
+                                 insert_player_batch_rpc, read_csv_rows)
+from import_lib.records import PlayerRecord
+from import_lib.validate import check_player_csv
+from import_lib.workers import BufferedLog, LogFn, log_line, run_batches
 
-def parse_date(date_str: str) -> Optional[str]:
-    """Parse date from DD/MM/YYYY or DD-MM-YYYY format to YYYY-MM-DD"""
-    if not date_str or date_str.strip() == '':
-        return None
-    
-    date_str = date_str.strip()
-    
-    # Try DD/MM/YYYY
-    for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%Y-%m-%d']:
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Players sent per multi-row insert request
+DEFAULT_BATCH_SIZE = 100
+
+# A bare "yes" in the permissions answer also counts as parental consent
+PARENTAL_CONSENT = keyword_pattern(PARENTAL_CONSENT_KEYWORDS + ('yes',))
+
+# Reads a record's values for the staging columns after row_num, team_name and community
+STAGED_FIELDS = attrgetter(*(name for name, _ in PLAYER_STAGING_COLUMNS[3:]))
+
+@metrics.timed('parse_row')
+def parse_player_row(row_num: int, row: List[str], columns: HeaderResolver, team_id: str, community: str,
+                     dates: DateParser, timestamps: DateParser,
+                     normalized: Optional[Normalized] = None) -> PlayerRecord:
+    """Turn a CSV row into the PlayerRecord to insert into team_players.
+    
+    normalized carries gender, participation days and consents already
+    computed column-wise; without it they are derived from the row here.
+    """
+    if normalized is None:
+        normalized = Normalized(map_gender(columns.get(row, 'gender')),
+                                map_participation_days(columns.get(row, 'participation_days')),
+                                *parse_permissions(columns.get(row, 'permissions'), PARENTAL_CONSENT))
+    
+    player_name = columns.get(row, 'player_name').strip()
+    gender = normalized.gender
+    dob = dates.parse(columns.get(row, 'date_of_birth'), row_num)
+    participation_days = normalized.participation_days
+    queries = columns.get(row, 'queries').strip() or None
+    standard_cert = columns.get(row, 'standard_certificate').strip() or None
+    advance_cert = columns.get(row, 'advance_certificate').strip() or None
+    contact = columns.get(row, 'contact_number').strip() or None
+    parent_contact = columns.get(row, 'parent_contact').strip() or None
+    reg_timestamp = timestamps.parse_timestamp(columns.get(row, 'timestamp'), row_num)
+    parental_consent, media_consent = normalized.parental_consent, normalized.media_consent
+    
+    return PlayerRecord(
+        team_id=team_id,
+        name=player_name,
+        gender=gender,
+        email=f"{player_name.lower().replace(' ', '_')}@temp.local",
+        date_of_birth=dob,
+        contact_number=contact,
+        parent_contact=parent_contact,
+        participation_days=participation_days,
+        parental_consent=parental_consent,
+        media_consent=media_consent,
+        queries_comments=queries,
+        standard_wfdf_certificate_url=standard_cert if standard_cert and standard_cert != 'Google Drive Links' else None,
+        advance_wfdf_certificate_url=advance_cert if advance_cert and advance_cert != 'Google Drive Links' else None,
+        community=community or None,
+        registration_timestamp=reg_timestamp,
+        verified=False
+    )
+
+def iter_pending_players(columns: HeaderResolver, rows: Iterator[Tuple[int, List[str], Normalized]],
+                         lookups: LookupCache, tournament_id: str, stats: ImportStats,
+                         dates: DateParser, timestamps: DateParser,
+                         journal: Optional[ImportJournal] = None,
+                         existing_players: Optional[Set[PlayerKey]] = None) -> Iterator[PendingPlayer]:
+    """Stream the CSV as parsed players, creating each team the first time it appears.
+    
+    Rows without a team name, rows recorded in the journal and players already
+    on their team are counted in stats and not yielded.
+    """
+    # Community of each team comes from its first player
+    team_communities: Dict[str, str] = {}
+    team_ids: Dict[str, Optional[str]] = {}
+    
+    for row_num, row, normalized in rows:
+        team_name = columns.get(row, 'team_name').strip()
+        
+        if not team_name:
+            log_line(f"Warning: Skipping row {row_num} with no team name")
+            continue
+        
+        if team_name not in team_ids:
+            stats.add(team_name)
+            community = columns.get(row, 'community').strip()
+            team_communities[team_name] = community
+            try:
+                team_ids[team_name] = lookups.get_or_create_team(tournament_id, team_name, community, log_line)
+            except Exception as e:
+                log_line(f"  ❌ Error creating team {team_name}: {e}")
+                team_ids[team_name] = None
+        
+        team_id = team_ids[team_name]
+        if not team_id:
+            stats.add(team_name, errors=1)
+            continue
+        
+        row_hash = row_key(tournament_id, row)
+        if journal is not None and journal.is_done(row_hash):
+            stats.add(team_name, skipped=1)
+            continue
+        
         try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.strftime('%Y-%m-%d')
-        except ValueError:
+            record = parse_player_row(row_num, row, columns, team_id, team_communities[team_name],
+                                      dates, timestamps, normalized)
+        except Exception as e:
+            stats.add(team_name, errors=1)
+            log_line(f"    ❌ Error importing row {row_num}: {str(e)}")
             continue
-    
-    print(f"Warning: Could not parse date: {date_str}")
-    return None
+        
+        if existing_players is not None and player_key(team_id, record.name, record.date_of_birth) in existing_players:
+            stats.add(team_name, skipped=1)
+            log_line(f"    ↷ {record.name} already imported")
+            if journal is not None:
+                journal.mark_done([row_hash])
+            continue
+        
+        yield PendingPlayer(team_name, record, row_hash, row_num)
 
-def map_gender(gender: str) -> str:
-    """Map gender from Hindi/English to database format"""
-    gender_lower = gender.lower()
-    
-    if 'male' in gender_lower or 'पुरुष' in gender or gender_lower == 'm':
-        return 'male'
-    elif 'female' in gender_lower or 'महिला' in gender or gender_lower == 'f':
-        return 'female'
+def write_pending_players(supabase: 'Client', pending: Iterator[PendingPlayer], stats: ImportStats,
+                          batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1, use_rpc: bool = False,
+                          journal: Optional[ImportJournal] = None) -> None:
+    """Insert the players in batches, up to `workers` at a time, recording written rows in the journal"""
+    if use_rpc:
+        batches = batched_by_key(pending, lambda player: player.team_name, batch_size)
+        insert_batch = insert_player_batch_rpc
     else:
-        return 'other'
-
-def map_participation_days(days: str) -> Optional[str]:
-    """Map participation days to database format"""
-    if not days or days.strip() == '':
-        return 'both_days'
-    
-    days_lower = days.lower()
+        batches = batched(pending, batch_size)
+        insert_batch = insert_player_batch
     
-    if 'both' in days_lower or 'दोनो' in days:
-        return 'both_days'
-    elif 'day 1' in days_lower or 'दिन 1' in days:
-        return 'day_1'
-    elif 'day 2' in days_lower or 'दिन 2' in days:
-        return 'day_2'
+    def write_batch(batch: List[PendingPlayer], log: LogFn) -> Tuple[List[PendingPlayer], List[PendingPlayer]]:
+        return (batch, insert_batch(supabase, batch, log))
     
-    return 'both_days'  # Default
+    try:
+        for batch, inserted in run_batches(batches, write_batch, workers):
+            stats.record_batch(batch, inserted)
+            if journal is not None:
+                journal.mark_done(player.row_hash for player in inserted)
+    finally:
+        if journal is not None:
+            journal.close()
 
-def parse_permissions(permissions: str) -> tuple[bool, bool]:
-    """Parse permissions text to extract parental and media consent"""
-    if not permissions:
-        return (False, False)
-    
-    permissions_lower = permissions.lower()
-    
-    # Check for parental consent
-    has_parental_consent = (
-        'permission' in permissions_lower or
-        'permit' in permissions_lower or
-        'participate' in permissions_lower or
-        'parents' in permissions_lower or
-        'yes' in permissions_lower
-    )
+def import_csv_data(csv_path: str, supabase: 'Client', tournament_name: str = "UDAAN 2025", tournament_date: str = None,
+                    batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1,
+                    journal_path: Optional[str] = None, reconcile: bool = False, use_rpc: bool = False,
+                    dedup: Optional[str] = None, engine: str = 'auto'):
+    """Stream CSV data into Supabase.
+    
+    Rows are parsed as the file is read and written in batches of batch_size,
+    up to `workers` batches at a time. With journal_path, completed rows are
+    checkpointed to a local SQLite journal and skipped on rerun. With
+    reconcile, players already on the tournament's teams are fetched in bulk
+    and skipped. With use_rpc, players are grouped per team and each group
+    of up to batch_size is written by one import_players_bulk() call. With
+    dedup ('flag' or 'skip'), likely duplicates within the file and of
+    players already on the teams are reported, or skipped, before writing.
+    engine picks how gender, participation days and consents are normalized
+    (see import_lib/normalize.py).
+    """
+    
+    # Map columns to fields once from the header
+    columns, rows = read_csv_rows(csv_path, PLAYER_FIELDS)
+    missing = columns.missing(('team_name', 'player_name'))
+    if missing:
+        raise Exception(f"CSV has no column for: {', '.join(missing)}")
+    
+    # Get or create tournament, then load all of its teams in one query
+    lookups = LookupCache(supabase)
+    start_date = DateParser().parse(tournament_date) if tournament_date else datetime.now().strftime('%Y-%m-%d')
+    tournament_id = lookups.get_or_create_tournament(tournament_name, start_date)
+    teams = lookups.load_teams(tournament_id)
+    
+    journal = ImportJournal(journal_path, tournament_id) if journal_path else None
+    if journal is not None:
+        print(f"📒 Journal {journal_path}: {len(journal)} rows already imported")
+    
+    existing_players = None
+    if reconcile:
+        existing_players = load_existing_player_keys(supabase, list(teams.values()))
+        print(f"🔎 Found {len(existing_players)} players already in the database")
+    
+    print()
+    
+    # Parse, batch and insert as the file is read
+    stats = ImportStats()
+    dates = DateParser(DATE_FORMATS)
+    timestamps = DateParser(TIMESTAMP_FORMATS)
+    normalizer = ColumnNormalizer(PARENTAL_CONSENT, engine)
+    pending = iter_pending_players(columns, normalized_rows(columns, rows, normalizer), lookups, tournament_id,
+                                   stats, dates, timestamps,
+                                   journal, existing_players)
+    
+    duplicates = None
+    if dedup:
+        duplicates = DuplicateFilter(dedup, load_existing_identities(supabase, teams))
+        pending = duplicates.filter(pending, stats, log_line)
+    write_pending_players(supabase, pending, stats, batch_size, workers, use_rpc, journal)
     
-    # Check for media consent
-    has_media_consent = (
-        'media' in permissions_lower or
-        'promotional' in permissions_lower or
-        'image' in permissions_lower or
-        'video' in permissions_lower or
-        'social media' in permissions_lower
-    )
-    
-    return (has_parental_consent, has_media_consent)
+    print(f"\n{'='*60}")
+    print(f"🎉 IMPORT COMPLETE!")
+    print(f"{'='*60}")
+    print(f"\n📊 {len(stats.teams)} teams:")
+    stats.print_team_summaries()
+    print(f"\nTotal Success: {stats.total('success')} players")
+    print(f"Total Errors: {stats.total('errors')} players")
+    print(f"Total Skipped (already imported): {stats.total('skipped')} players")
+    print(f"Tournament ID: {tournament_id}")
+    dates.report('date of birth')
+    timestamps.report('Timestamp')
+    if duplicates is not None:
+        duplicates.report()
+    print(f"\n✅ Check your Supabase dashboard to verify the data!")
 
-def get_or_create_tournament(supabase: Client, tournament_name: str, tournament_date: str) -> str:
-    """Get existing tournament or create a new one"""
-    
-    # Try to find existing tournament
-    result = supabase.table('tournaments').select('id').eq('name', tournament_name).execute()
-    
-    if result.data and len(result.data) > 0:
-        tournament_id = result.data[0]['id']
-        print(f"Using existing tournament: {tournament_name} ({tournament_id})")
-        return tournament_id
-    
-    # Create new tournament - we need a user to be created_by
-    # Get any admin from user_roles table
-    admin_result = supabase.table('user_roles').select('user_id').eq('role', 'admin').limit(1).execute()
-    
-    if admin_result.data and len(admin_result.data) > 0:
-        created_by = admin_result.data[0]['user_id']
-    else:
-        # Try to get any existing user
-        any_user_result = supabase.table('profiles').select('id').limit(1).execute()
+def iter_staged_players(columns: HeaderResolver, rows: Iterator[Tuple[int, List[str], Normalized]], stats: ImportStats,
+                        dates: DateParser, timestamps: DateParser) -> Iterator[Tuple]:
+    """Stream the CSV as rows for the COPY staging table (see PLAYER_STAGING_COLUMNS)"""
+    # Community of each team comes from its first player
+    team_communities: Dict[str, str] = {}
+    # Spelling of each team's name in its first row, by name ignoring case (as teams are unique)
+    team_names: Dict[str, str] = {}
+    
+    for row_num, row, normalized in rows:
+        team_name = columns.get(row, 'team_name').strip()
         
-        if any_user_result.data and len(any_user_result.data) > 0:
-            created_by = any_user_result.data[0]['id']
-            print("WARNING: No admin user found. Using first available user.")
-        else:
-            print("ERROR: No users found in database. Please create a user profile first.")
-            raise Exception("No users available")
-    
-    # Parse tournament date
-    start_date = parse_date(tournament_date) if tournament_date else datetime.now().strftime('%Y-%m-%d')
-    end_date = start_date  # Same day tournament
-    
-    # Create tournament
-    tournament_data = {
-        'name': tournament_name,
-        'start_date': start_date,
-        'end_date': end_date,
-        'location': 'To be determined',
-        'status': 'registration_open',
-        'created_by': created_by
-    }
-    
-    result = supabase.table('tournaments').insert(tournament_data).execute()
-    
-    if result.data:
-        tournament_id = result.data[0]['id']
-        print(f"Created tournament: {tournament_name} ({tournament_id})")
-        return tournament_id
-    else:
-        raise Exception("Failed to create tournament")
-
-def get_or_create_team(supabase: Client, tournament_id: str, team_name: str, community: str) -> str:
-    """Get existing team or create a new one"""
-    
-    # Try to find existing team
-    result = supabase.table('teams').select('id').eq('name', team_name).eq('tournament_id', tournament_id).execute()
-    
-    if result.data and len(result.data) > 0:
-        team_id = result.data[0]['id']
-        print(f"  Team exists: {team_name}")
-        return team_id
-    
-    # Get or create a captain user
-    # Get any existing user to use as captain
-    any_user = supabase.table('profiles').select('id').limit(1).execute()
-    if any_user.data and len(any_user.data) > 0:
-        captain_id = any_user.data[0]['id']
-    else:
-        print("ERROR: No users found. Cannot create teams without a user.")
-        raise Exception("No users available")
-    
-    # Create team
-    team_data = {
-        'tournament_id': tournament_id,
-        'name': team_name,
-        'captain_id': captain_id,
-        'email': f'{team_name.lower().replace(" ", "_")}@team.local',
-        'phone': '0000000000',
-        'status': 'approved',
-        'community': community or 'Unknown'
-    }
-    
-    result = supabase.table('teams').insert(team_data).execute()
-    
-    if result.data:
-        team_id = result.data[0]['id']
-        print(f"  Created team: {team_name}")
-        return team_id
-    else:
-        raise Exception(f"Failed to create team: {team_name}")
+        if not team_name:
+            log_line(f"Warning: Skipping row {row_num} with no team name")
+            continue
+        
+        team_name = team_names.setdefault(team_name.lower(), team_name)
+        if team_name not in team_communities:
+            stats.add(team_name)
+            team_communities[team_name] = columns.get(row, 'community').strip()
+        
+        try:
+            record = parse_player_row(row_num, row, columns, None, team_communities[team_name],
+                                      dates, timestamps, normalized)
+        except Exception as e:
+            stats.add(team_name, errors=1)
+            log_line(f"    ❌ Error importing row {row_num}: {str(e)}")
+            continue
+        
+        yield (row_num, team_name, team_communities[team_name]) + STAGED_FIELDS(record)
 
-def import_csv_data(csv_path: str, supabase: Client, tournament_name: str = "UDAAN 2025", tournament_date: str = None):
-    """Import CSV data into Supabase"""
+def import_csv_copy(csv_path: str, database_url: str, tournament_name: str = "UDAAN 2025",
+                    tournament_date: str = None, reconcile: bool = False, engine: str = 'auto'):
+    """Load the CSV straight into Postgres in one transaction.
+    
+    Players are streamed into a temporary staging table with COPY, then
+    teams and team_players are filled from it by set-based inserts. Any
+    failure rolls the whole load back, tournament and teams included.
+    """
+    
+    # Map columns to fields once from the header
+    columns, rows = read_csv_rows(csv_path, PLAYER_FIELDS)
+    missing = columns.missing(('team_name', 'player_name'))
+    if missing:
+        raise Exception(f"CSV has no column for: {', '.join(missing)}")
+    
+    stats = ImportStats()
+    dates = DateParser(DATE_FORMATS)
+    timestamps = DateParser(TIMESTAMP_FORMATS)
+    normalizer = ColumnNormalizer(PARENTAL_CONSENT, engine)
+    start_date = DateParser().parse(tournament_date) if tournament_date else datetime.now().strftime('%Y-%m-%d')
+    
+    with CopyLoader(database_url) as loader:
+        tournament_id = loader.get_or_create_tournament(tournament_name, start_date)
+        
+        staged = loader.stage('import_players_staging', PLAYER_STAGING_COLUMNS,
+                              iter_staged_players(columns, normalized_rows(columns, rows, normalizer),
+                                                  stats, dates, timestamps))
+        print(f"\n📥 Staged {staged} players with COPY\n")
+        
+        loader.merge_teams(tournament_id, 'import_players_staging', log_line)
+        for team_name, (team_staged, inserted) in loader.merge_players(
+                tournament_id, 'import_players_staging', reconcile).items():
+            stats.add(team_name, success=inserted, skipped=team_staged - inserted)
     
-    # First, read all rows to group by team
-    teams_data: Dict[str, List[Dict]] = {}
+    print(f"\n{'='*60}")
+    print(f"🎉 IMPORT COMPLETE!")
+    print(f"{'='*60}")
+    print(f"\n📊 {len(stats.teams)} teams:")
+    stats.print_team_summaries()
+    print(f"\nTotal Success: {stats.total('success')} players")
+    print(f"Total Errors: {stats.total('errors')} players")
+    print(f"Total Skipped (already imported): {stats.total('skipped')} players")
+    print(f"Tournament ID: {tournament_id}")
+    dates.report('date of birth')
+    timestamps.report('Timestamp')
+    print(f"\n✅ Committed in a single transaction")
+
+class ParsedPlayer(NamedTuple):
+    """A CSV row parsed by parse_csv_file(); error is set if the row could not be parsed"""
+    row_num: int
+    row: List[str]
+    team_name: str
+    record: Optional[PlayerRecord] = None
+    error: Optional[str] = None
+
+class ParsedFile(NamedTuple):
+    """One batch file, parsed and normalized in a worker process and ready to be written"""
+    job: ImportJob
+    communities: Dict[str, str]
+    players: List[ParsedPlayer]
+    log_lines: List[str]
+    unparsed_dates: int = 0
+    error: Optional[str] = None
+
+def parse_csv_file(job: ImportJob, engine: str = 'auto') -> ParsedFile:
+    """Parse a whole batch file without touching the database; runs in a worker process"""
+    log = BufferedLog()
+    dates = DateParser(DATE_FORMATS)
+    timestamps = DateParser(TIMESTAMP_FORMATS)
+    # Community of each team comes from its first player
+    communities: Dict[str, str] = {}
+    players: List[ParsedPlayer] = []
     
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
+    try:
+        columns, rows = read_csv_rows(job.csv_path, PLAYER_FIELDS)
+        missing = columns.missing(('team_name', 'player_name'))
+        if missing:
+            raise Exception(f"CSV has no column for: {', '.join(missing)}")
         
-        for row in reader:
-            # Try different possible column names
-            team_name = (row.get('Team Name (टीम का नाम):', '') or 
-                        row.get('Team Name', '') or 
-                        row.get('टीम का नाम:', '')).strip()
+        normalizer = ColumnNormalizer(PARENTAL_CONSENT, engine)
+        for row_num, row, normalized in normalized_rows(columns, rows, normalizer):
+            team_name = columns.get(row, 'team_name').strip()
             
             if not team_name:
-                print(f"Warning: Skipping row with no team name")
+                log(f"Warning: Skipping row {row_num} with no team name")
                 continue
             
-            if team_name not in teams_data:
-                teams_data[team_name] = []
+            if team_name not in communities:
+                communities[team_name] = columns.get(row, 'community').strip()
             
-            teams_data[team_name].append(row)
-    
-    print(f"\n📊 Found {len(teams_data)} teams with {sum(len(players) for players in teams_data.values())} players\n")
-    
-    # Get or create tournament
-    tournament_id = get_or_create_tournament(supabase, tournament_name, tournament_date)
-    
-    # Process each team
-    total_success = 0
-    total_errors = 0
+            try:
+                record = parse_player_row(row_num, row, columns, None, communities[team_name],
+                                          dates, timestamps, normalized)
+            except Exception as e:
+                log(f"    ❌ Error importing row {row_num}: {str(e)}")
+                players.append(ParsedPlayer(row_num, row, team_name, error=str(e)))
+                continue
+            
+            players.append(ParsedPlayer(row_num, row, team_name, record))
+    except Exception as e:
+        return ParsedFile(job, {}, [], log.lines, error=str(e))
     
-    for team_name, players in teams_data.items():
-        print(f"\n{'='*60}")
-        print(f"Processing team: {team_name}")
-        print(f"{'='*60}")
+    dates.report('date of birth', log)
+    timestamps.report('Timestamp', log)
+    return ParsedFile(job, communities, players, log.lines, len(dates.failures) + len(timestamps.failures))
+
+def iter_parsed_players(parsed: ParsedFile, lookups: LookupCache, tournament_id: str, stats: ImportStats,
+                        journal: Optional[ImportJournal] = None,
+                        existing_players: Optional[Set[PlayerKey]] = None) -> Iterator[PendingPlayer]:
+    """Same as iter_pending_players(), for a file that was already parsed by parse_csv_file()"""
+    team_ids: Dict[str, Optional[str]] = {}
+    
+    for player in parsed.players:
+        team_name = player.team_name
         
-        # Get community from first player
-        first_player = players[0]
-        community = (first_player.get('Community (समुदाय):', '') or 
-                    first_player.get('Community', '') or 
-                    first_player.get('समुदाय:', '')).strip()
+        if team_name not in team_ids:
+            stats.add(team_name)
+            try:
+                team_ids[team_name] = lookups.get_or_create_team(tournament_id, team_name,
+                                                                 parsed.communities[team_name], log_line)
+            except Exception as e:
+                log_line(f"  ❌ Error creating team {team_name}: {e}")
+                team_ids[team_name] = None
         
-        # Get or create team
-        try:
-            team_id = get_or_create_team(supabase, tournament_id, team_name, community)
-        except Exception as e:
-            print(f"  ❌ Error creating team: {e}")
+        team_id = team_ids[team_name]
+        if not team_id or player.error is not None:
+            stats.add(team_name, errors=1)
             continue
         
-        # Import players
-        success_count = 0
-        error_count = 0
+        row_hash = row_key(tournament_id, player.row)
+        if journal is not None and journal.is_done(row_hash):
+            stats.add(team_name, skipped=1)
+            continue
         
-        for player_row in players:
-            try:
-                # Try different possible column names for each field
-                player_name = (player_row.get('Player Full Name ( खिलाड़ी पूरा का नाम):', '') or 
-                              player_row.get('Player Full Name', '') or 
-                              player_row.get('खिलाड़ी पूरा का नाम:', '')).strip()
-                
-                gender = map_gender(player_row.get('Gender (लिंग):', '') or player_row.get('Gender', ''))
-                dob = parse_date(player_row.get('Date of Birth (DOB) (जन्म तिथि):', '') or 
-                                player_row.get('Date of Birth', '') or
-                                player_row.get('DOB', ''))
-                
-                participation_days = map_participation_days(
-                    player_row.get('Participating on which day?(किस दिन भाग ले रहे हैं?)', '') or
-                    player_row.get('Participating day', '')
-                )
-                
-                permissions = player_row.get('Permissions (अनुमतियाँ):', '') or player_row.get('Permissions', '')
-                queries = (player_row.get('Any Queries or Comments (कोई प्रश्न या टिप्पणी):', '') or
-                          player_row.get('Queries', '')).strip() or None
-                
-                standard_cert = (player_row.get('Standard WFDF Accreditation Certificate', '').strip() or None)
-                advance_cert = (player_row.get('Advance WFDF Accreditation Certificate', '').strip() or None)
-                contact = (player_row.get('Contact Number (संपर्क नंबर):', '').strip() or None)
-                parent_contact = (player_row.get('Parents Contact Number (संपर्क नंबर):', '').strip() or None)
-                timestamp = player_row.get('Timestamp', '').strip()
-                
-                parental_consent, media_consent = parse_permissions(permissions)
-                
-                # Parse timestamp if provided
-                reg_timestamp = None
-                if timestamp:
-                    try:
-                        reg_timestamp = datetime.strptime(timestamp.split()[0], '%m/%d/%Y').isoformat() if timestamp else None
-                    except:
-                        try:
-                            reg_timestamp = datetime.strptime(timestamp.split()[0], '%d/%m/%Y').isoformat()
-                        except:
-                            reg_timestamp = None
-                
-                player_data = {
-                    'team_id': team_id,
-                    'name': player_name,
-                    'gender': gender,
-                    'email': f"{player_name.lower().replace(' ', '_')}@temp.local",
-                    'date_of_birth': dob,
-                    'contact_number': contact,
-                    'parent_contact': parent_contact,
-                    'participation_days': participation_days,
-                    'parental_consent': parental_consent,
-                    'media_consent': media_consent,
-                    'queries_comments': queries,
-                    'standard_wfdf_certificate_url': standard_cert if standard_cert and standard_cert != 'Google Drive Links' else None,
-                    'advance_wfdf_certificate_url': advance_cert if advance_cert and advance_cert != 'Google Drive Links' else None,
-                    'community': community or None,
-                    'registration_timestamp': reg_timestamp,
-                    'verified': False
-                }
-                
-                # Insert player
-                result = supabase.table('team_players').insert(player_data).execute()
-                success_count += 1
-                total_success += 1
-                
-                print(f"    ✅ {player_name} ({gender})")
-                
-            except Exception as e:
-                error_count += 1
-                total_errors += 1
-                player_name = player_row.get('Player Full Name ( खिलाड़ी पूरा का नाम):', 'Unknown')
-                print(f"    ❌ Error importing {player_name}: {str(e)}")
+        record = player.record
+        if existing_players is not None and player_key(team_id, record.name, record.date_of_birth) in existing_players:
+            stats.add(team_name, skipped=1)
+            log_line(f"    ↷ {record.name} already imported")
+            if journal is not None:
+                journal.mark_done([row_hash])
+            continue
+        
+        record.team_id = team_id
+        yield PendingPlayer(team_name, record, row_hash, player.row_num)
+
+def import_parsed_file(parsed: ParsedFile, supabase: 'Client', lookups: LookupCache,
+                       batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1, resume: bool = False,
+                       reconcile: bool = False, use_rpc: bool = False, dedup: Optional[str] = None) -> BatchResult:
+    """Write one parsed batch file to its tournament, creating the tournament and teams as needed"""
+    job = parsed.job
+    stats = ImportStats()
+    if parsed.error is not None:
+        return BatchResult(job, None, stats, error=parsed.error)
+    
+    start_date = DateParser().parse(job.tournament_date) if job.tournament_date else datetime.now().strftime('%Y-%m-%d')
+    tournament_id = lookups.get_or_create_tournament(job.tournament_name, start_date)
+    teams = lookups.load_teams(tournament_id)
+    
+    existing_players = load_existing_player_keys(supabase, list(teams.values())) if reconcile else None
+    duplicates = DuplicateFilter(dedup, load_existing_identities(supabase, teams)) if dedup else None
+    journal = ImportJournal(f"{job.csv_path}.journal.sqlite", tournament_id) if resume else None
+    if journal is not None:
+        print(f"📒 Journal {job.csv_path}.journal.sqlite: {len(journal)} rows already imported")
+    
+    pending = iter_parsed_players(parsed, lookups, tournament_id, stats, journal, existing_players)
+    if duplicates is not None:
+        pending = duplicates.filter(pending, stats, log_line)
+    write_pending_players(supabase, pending, stats, batch_size, workers, use_rpc, journal)
+    
+    print(f"\n📊 {job.tournament_name}: {len(stats.teams)} teams")
+    stats.print_team_summaries()
+    if duplicates is not None:
+        duplicates.report()
+    return BatchResult(job, tournament_id, stats, parsed.unparsed_dates)
+
+def import_batch(jobs: List[ImportJob], supabase: 'Client', batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1,
+                 processes: int = 1, resume: bool = False, reconcile: bool = False, use_rpc: bool = False,
+                 dedup: Optional[str] = None, engine: str = 'auto') -> List[BatchResult]:
+    """Import several CSV files, each into its own tournament.
+    
+    Files are parsed and normalized by up to `processes` worker processes
+    while earlier files are being written. Writes go through the one client,
+    file by file in job order, up to `workers` batches at a time. A file that
+    fails is reported and the rest of the batch carries on. With resume,
+    each file gets its own journal next to it (<csv>.journal.sqlite).
+    """
+    lookups = LookupCache(supabase)
+    results: List[BatchResult] = []
+    
+    for parsed in map_in_processes(partial(parse_csv_file, engine=engine), jobs, processes):
+        print(f"\n{'='*60}")
+        print(f"📄 {parsed.job.csv_path} → {parsed.job.tournament_name}")
+        print(f"{'='*60}")
+        for line in parsed.log_lines:
+            print(line)
         
-        print(f"\n  Team Summary: {success_count} successful, {error_count} errors")
+        try:
+            result = import_parsed_file(parsed, supabase, lookups, batch_size, workers, resume,
+                                        reconcile, use_rpc, dedup)
+        except Exception as e:
+            result = BatchResult(parsed.job, None, ImportStats(), error=str(e))
+        if result.error is not None:
+            print(f"❌ Could not import {parsed.job.csv_path}: {result.error}")
+        results.append(result)
     
-    print(f"\n{'='*60}")
-    print(f"🎉 IMPORT COMPLETE!")
-    print(f"{'='*60}")
-    print(f"Total Success: {total_success} players")
-    print(f"Total Errors: {total_errors} players")
-    print(f"Tournament ID: {tournament_id}")
-    print(f"\n✅ Check your Supabase dashboard to verify the data!")
+    print_batch_summary(results)
+    return results
+
+def validate_batch(jobs: List[ImportJob], processes: int = 1, engine: str = 'auto') -> bool:
+    """Parse every file of a batch without connecting and report what would be imported"""
+    ok = True
+    for parsed in map_in_processes(partial(parse_csv_file, engine=engine), jobs, processes):
+        print(f"\n📄 {parsed.job.csv_path} → {parsed.job.tournament_name}")
+        for line in parsed.log_lines:
+            print(line)
+        if parsed.error is not None:
+            print(f"❌ {parsed.error}")
+            ok = False
+            continue
+        
+        errors = sum(1 for player in parsed.players if player.error is not None)
+        print(f"🔎 {len(parsed.players) - errors} players in {len(parsed.communities)} teams, {errors} rows with errors")
+        ok = ok and not errors and not parsed.unparsed_dates
+    return ok
 
 def main():
     parser = argparse.ArgumentParser(description='Complete tournament import: CSV → Database')
-    parser.add_argument('--csv', required=True, help='Path to CSV file')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help='Path to CSV file')
+    source.add_argument('--manifest',
+                        help='Import several files: a CSV manifest with csv, tournament_name and tournament_date columns')
+    source.add_argument('--csv-dir',
+                        help='Import every CSV file in a directory, each into a tournament named after the file')
     parser.add_argument('--tournament-name', default='UDAAN 2025', help='Tournament name')
-    parser.add_argument('--tournament-date', help='Tournament date (DD/MM/YYYY)')
+    parser.add_argument('--tournament-date',
+                        help='Tournament date (DD/MM/YYYY); with --manifest or --csv-dir, the default for every file')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes parsing files in parallel with --manifest or --csv-dir '
+                             '(default: one per CPU)')
     parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
     parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Players per insert request (default: {DEFAULT_BATCH_SIZE}, 1 = row by row)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of insert batches to write in parallel (default: 1)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Checkpoint completed rows to a local journal and skip them on rerun')
+    parser.add_argument('--journal', help='Journal file for --resume (default: <csv>.journal.sqlite)')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='Skip players already present on the tournament\'s teams')
+    parser.add_argument('--rpc', action='store_true',
+                        help='Send each team\'s roster in one import_players_bulk() call '
+                             '(needs migration 20250120000000_import_players_bulk.sql)')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='Normalize gender, participation days and consents row by row (python) or '
+                             'column-wise with pandas (default: auto, pandas when installed)')
+    parser.add_argument('--dedup', choices=DEDUP_MODES,
+                        help='Check for likely duplicate players before writing: flag them, or skip all but the first')
+    parser.add_argument('--copy', action='store_true',
+                        help='Load with COPY over a direct Postgres connection in a single transaction '
+                             '(needs psycopg; ignores --batch-size and --workers)')
+    parser.add_argument('--database-url',
+                        help='Postgres URL for --copy (or use DATABASE_URL env var, default: supabase/.temp/pooler-url)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Load into an in-memory stand-in database instead of Supabase and print the insert plan')
+    parser.add_argument('--target',
+                        help='Load into a local stand-in database file instead of Supabase (sqlite:///path/to/file.db)')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Check the whole CSV (or every batch file) and report problems without connecting')
+    metrics.add_arguments(parser)
     
     args = parser.parse_args()
+    metrics.enable('import_tournament_complete', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.batch_size < 1:
+        print("❌ Error: --batch-size must be at least 1")
+        return 1
+    
+    if args.workers < 1:
+        print("❌ Error: --workers must be at least 1")
+        return 1
+    
+    if args.processes < 1:
+        print("❌ Error: --processes must be at least 1")
+        return 1
+    
+    jobs = None
+    if args.manifest or args.csv_dir:
+        conflicting = [flag for flag, used in (('--copy', args.copy), ('--journal', args.journal)) if used]
+        if conflicting:
+            print(f"❌ Error: --manifest and --csv-dir cannot be combined with {', '.join(conflicting)}")
+            return 1
+        
+        try:
+            resolve_engine(args.engine)
+            if args.manifest:
+                jobs = read_manifest(args.manifest, args.tournament_date)
+            else:
+                jobs = jobs_from_directory(args.csv_dir, args.tournament_date)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: {str(e)}")
+            return 1
+        
+        if args.validate_only:
+            return 0 if validate_batch(jobs, min(args.processes, len(jobs)), args.engine) else 1
+    else:
+        # The whole CSV is checked offline before anything is imported or connected
+        try:
+            check = check_player_csv(args.csv, ('team_name', 'player_name'), parse_player_row,
+                                     ColumnNormalizer(PARENTAL_CONSENT, args.engine))
+        except ValueError as e:
+            print(f"❌ Error: {str(e)}")
+            return 1
+        check.report(details=args.validate_only)
+        if args.validate_only:
+            return 0 if check.ok else 1
+        if not check.players:
+            print("❌ Error: no importable players in the CSV")
+            return 1
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    if args.copy:
+        conflicting = [flag for flag, used in (('--rpc', args.rpc), ('--resume', args.resume), ('--dedup', args.dedup),
+                                               ('--dry-run', args.dry_run), ('--target', args.target)) if used]
+        if conflicting:
+            print(f"❌ Error: --copy cannot be combined with {', '.join(conflicting)}")
+            return 1
+        
+        try:
+            import_csv_copy(args.csv, resolve_database_url(args.database_url), args.tournament_name,
+                            args.tournament_date, args.reconcile, args.engine)
+            return 0
+        except ValueError as e:
+            print(f"❌ Error: {str(e)}")
+            return 1
+        except Exception as e:
+            print(f"❌ Fatal error, nothing was written: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return 1
+    
+    # Dry runs and rehearsals write to a local stand-in database
+    local = None
+    if args.dry_run or args.target:
+        try:
+            local = open_local_backend(args.target, args.dry_run)
+        except ValueError as e:
+            print(f"❌ Error: {str(e)}")
+            return 1
     
     # Get Supabase credentials - use service role key to bypass RLS
     url = args.supabase_url or os.getenv('SUPABASE_URL')
     key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
     
-    if not url or not key:
+    if local is None and (not url or not key):
         print("❌ Error: Supabase credentials not provided")
         print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
         print("or pass as arguments: --supabase-url and --supabase-key")
@@ -345,17 +665,35 @@ def main():
         return 1
     
     # Create Supabase client
-    supabase: Client = create_client(url, key)
+    transport = None
+    if local is not None:
+        supabase: Client = local
+    else:
+        supabase, transport = create_import_client(url, key, args.workers, args.max_retries)
     
     # Import data
     try:
-        import_csv_data(args.csv, supabase, args.tournament_name, args.tournament_date)
+        if jobs is not None:
+            results = import_batch(jobs, supabase, args.batch_size, args.workers, min(args.processes, len(jobs)),
+                                   args.resume and not args.dry_run, args.reconcile, args.rpc, args.dedup, args.engine)
+            return 1 if any(result.error is not None for result in results) else 0
+        
+        # A dry run must not mark rows as done for the real import
+        journal_path = (args.journal or f"{args.csv}.journal.sqlite") if args.resume and not args.dry_run else None
+        import_csv_data(args.csv, supabase, args.tournament_name, args.tournament_date,
+                        args.batch_size, args.workers, journal_path, args.reconcile, args.rpc,
+                        args.dedup, args.engine)
         return 0
     except Exception as e:
         print(f"❌ Fatal error: {str(e)}")
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if transport is not None:
+            transport.report()
+        if local is not None:
+            local.print_plan()
 
 if __name__ == '__main__':
     exit(main())
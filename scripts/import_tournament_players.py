@@ -3,228 +3,351 @@
 Tournament Player CSV Import Script
 Imports player registration data from CSV into Supabase database
 
+The CSV is streamed: rows are parsed as they are read and inserted in
+bounded-size batches, so memory stays flat regardless of file size.
+With --since-last only registrations newer than the latest one already
+imported are parsed, so re-importing a cumulative export costs time in
+proportion to the new rows.
+
 Usage:
     python scripts/import_tournament_players.py --csv path/to/data.csv --tournament-id UUID
+    python scripts/import_tournament_players.py --csv path/to/data.csv --tournament-id UUID --batch-size 200 --workers 8
+    python scripts/import_tournament_players.py --csv path/to/data.csv --tournament-id UUID --dry-run
+    python scripts/import_tournament_players.py --csv path/to/data.csv --tournament-id UUID --since-last
+    python scripts/import_tournament_players.py --csv path/to/data.csv --tournament-id UUID --profile
+    python scripts/import_tournament_players.py --csv path/to/data.csv --tournament-id UUID --validate-only
 
 Requirements:
-    pip install supabase python-dotenv pandas
+    pip install supabase python-dotenv
+    pip install pandas  # optional, column-wise normalization
 """
 
 import argparse
-import csv
 import os
-from datetime import datetime
-from typing import Dict, List, Optional
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import re
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
-# Load environment variables
-load_dotenv()
+from import_lib.backends import open_local_backend
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.columns import PLAYER_FIELDS, HeaderResolver
+from import_lib.dedup import DEDUP_MODES, DuplicateFilter, load_existing_identities
+from import_lib.dates import DATE_FORMATS, TIMESTAMP_FORMATS, DateParser, timestamp_key
+from import_lib.journal import RegistrationCutoff, load_registration_watermark
+from import_lib import metrics
+from import_lib.lookups import LookupCache
+from import_lib.normalize import (ENGINES, PARENTAL_CONSENT_KEYWORDS, ColumnNormalizer, Normalized, keyword_pattern,
+                                  map_gender, map_participation_days, normalized_rows, parse_permissions)
+from import_lib.pipeline import ImportStats, PendingPlayer, batched, insert_player_batch, read_csv_rows
+from import_lib.records import PlayerRecord
+from import_lib.validate import CsvCheck, check_player_csv, open_player_csv
+from import_lib.workers import LogFn, log_line, run_batches
 
-def parse_date(date_str: str) -> Optional[str]:
-    """Parse date from DD/MM/YYYY or DD-MM-YYYY format to YYYY-MM-DD"""
-    if not date_str or date_str.strip() == '':
-        return None
-    
-    date_str = date_str.strip()
-    
-    # Try DD/MM/YYYY
-    for fmt in ['%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y', '%Y-%m-%d']:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    
-    print(f"Warning: Could not parse date: {date_str}")
-    return None
+if TYPE_CHECKING:
+    from supabase import Client
 
-def map_gender(gender: str) -> str:
-    """Map gender from Hindi/English to database format"""
-    gender_lower = gender.lower()
-    
-    if 'male' in gender_lower or 'पुरुष' in gender or gender_lower == 'm':
-        return 'male'
-    elif 'female' in gender_lower or 'महिला' in gender or gender_lower == 'f':
-        return 'female'
-    else:
-        return 'other'
+# Players sent per multi-row insert request
+DEFAULT_BATCH_SIZE = 100
 
-def map_participation_days(days: str) -> Optional[str]:
-    """Map participation days to database format"""
-    if not days or days.strip() == '':
-        return 'both_days'
-    
-    days_lower = days.lower()
-    
-    if 'both' in days_lower or 'दोनो' in days:
-        return 'both_days'
-    elif 'day 1' in days_lower or 'दिन 1' in days:
-        return 'day_1'
-    elif 'day 2' in days_lower or 'दिन 2' in days:
-        return 'day_2'
-    
-    return 'both_days'  # Default
+# Columns a row needs to be imported at all
+REQUIRED_COLUMNS = ('team_name', 'player_name')
+
+# Unlike import_tournament_complete.py, a bare "yes" is not read as parental consent
+PARENTAL_CONSENT = keyword_pattern(PARENTAL_CONSENT_KEYWORDS)
 
-def parse_permissions(permissions: str) -> tuple[bool, bool]:
-    """Parse permissions text to extract parental and media consent"""
-    if not permissions:
-        return (False, False)
+@metrics.timed('parse_row')
+def parse_player_row(row_num: int, row: List[str], columns: HeaderResolver, team_id: str, community: str,
+                     dates: DateParser, timestamps: DateParser,
+                     normalized: Optional[Normalized] = None) -> PlayerRecord:
+    """Turn a CSV row into the PlayerRecord to insert into team_players.
     
-    permissions_lower = permissions.lower()
+    normalized carries gender, participation days and consents already
+    computed column-wise; without it they are derived from the row here.
+    """
+    if normalized is None:
+        normalized = Normalized(map_gender(columns.get(row, 'gender')),
+                                map_participation_days(columns.get(row, 'participation_days')),
+                                *parse_permissions(columns.get(row, 'permissions'), PARENTAL_CONSENT))
     
-    # Check for parental consent
-    has_parental_consent = (
-        'permission' in permissions_lower or
-        'permit' in permissions_lower or
-        'participate' in permissions_lower or
-        'parents' in permissions_lower
-    )
+    player_name = columns.get(row, 'player_name').strip()
+    gender = normalized.gender
+    dob = dates.parse(columns.get(row, 'date_of_birth'), row_num)
+    participation_days = normalized.participation_days
+    queries = columns.get(row, 'queries').strip() or None
+    standard_cert = columns.get(row, 'standard_certificate').strip() or None
+    advance_cert = columns.get(row, 'advance_certificate').strip() or None
+    contact = columns.get(row, 'contact_number').strip() or None
+    parent_contact = columns.get(row, 'parent_contact').strip() or None
+    reg_timestamp = timestamps.parse_timestamp(columns.get(row, 'timestamp'), row_num)
+    parental_consent, media_consent = normalized.parental_consent, normalized.media_consent
     
-    # Check for media consent
-    has_media_consent = (
-        'media' in permissions_lower or
-        'promotional' in permissions_lower or
-        'image' in permissions_lower or
-        'video' in permissions_lower or
-        'social media' in permissions_lower
+    return PlayerRecord(
+        team_id=team_id,
+        name=player_name,
+        gender=gender,
+        email=f"{player_name.lower().replace(' ', '_')}@temp.local",
+        date_of_birth=dob,
+        contact_number=contact,
+        parent_contact=parent_contact,
+        participation_days=participation_days,
+        parental_consent=parental_consent,
+        media_consent=media_consent,
+        queries_comments=queries,
+        standard_wfdf_certificate_url=standard_cert if standard_cert and standard_cert != 'Google Drive Links' else None,
+        advance_wfdf_certificate_url=advance_cert if advance_cert and advance_cert != 'Google Drive Links' else None,
+        community=community,
+        registration_timestamp=reg_timestamp,
+        verified=False
     )
-    
-    return (has_parental_consent, has_media_consent)
 
-def import_csv_data(csv_path: str, tournament_id: str, supabase: Client):
-    """Import CSV data into Supabase"""
+def iter_pending_players(columns: HeaderResolver, rows: Iterator[Tuple[int, List[str], Normalized]],
+                         lookups: LookupCache, tournament_id: str, stats: ImportStats,
+                         dates: DateParser, timestamps: DateParser) -> Iterator[PendingPlayer]:
+    """Stream the CSV as parsed players of existing teams.
     
-    # First, read all rows to group by team
-    teams_data: Dict[str, List[Dict]] = {}
+    Rows for teams that do not exist yet are counted as skipped; teams must be
+    created manually first.
+    """
+    # Community of each team comes from its first player
+    team_communities: Dict[str, str] = {}
     
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            team_name = row.get('Team Name (टीम का नाम):', '').strip()
-            if not team_name:
-                print(f"Warning: Skipping row with no team name")
-                continue
-            
-            if team_name not in teams_data:
-                teams_data[team_name] = []
-            
-            teams_data[team_name].append(row)
-    
-    print(f"Found {len(teams_data)} teams with {sum(len(players) for players in teams_data.values())} players")
-    
-    # Process each team
-    for team_name, players in teams_data.items():
-        print(f"\nProcessing team: {team_name}")
+    for row_num, row, normalized in rows:
+        team_name = columns.get(row, 'team_name').strip()
+        if not team_name:
+            log_line(f"Warning: Skipping row {row_num} with no team name")
+            continue
         
-        # Get or create team
-        community = players[0].get('Community (समुदाय):', '').strip()
+        team_id = lookups.get_team_id(tournament_id, team_name)
         
-        # Check if team already exists
-        team_response = supabase.table('teams').select('id').eq('name', team_name).eq('tournament_id', tournament_id).execute()
+        if team_name not in team_communities:
+            stats.add(team_name)
+            team_communities[team_name] = columns.get(row, 'community').strip()
+            if team_id:
+                log_line(f"  Team already exists: {team_name} ({team_id})")
+            else:
+                # Note: creating a team needs a captain_id, which requires a profile to exist
+                log_line(f"  WARNING: Team does not exist. Please create team '{team_name}' manually first.")
+                log_line(f"  Skipping players for this team.")
         
-        if team_response.data:
-            team_id = team_response.data[0]['id']
-            print(f"  Team already exists: {team_id}")
-        else:
-            # Get the first player's details to create captain info
-            first_player = players[0]
-            
-            # Create team
-            # Note: You'll need to provide captain_id - this requires a profile to exist
-            print(f"  WARNING: Team does not exist. Please create team '{team_name}' manually first.")
-            print(f"  Skipping players for this team.")
+        if not team_id:
+            stats.add(team_name, skipped=1)
             continue
         
-        # Import players
-        success_count = 0
-        error_count = 0
-        
-        for player_row in players:
-            try:
-                player_name = player_row.get('Player Full Name ( खिलाड़ी पूरा का नाम):', '').strip()
-                gender = map_gender(player_row.get('Gender (लिंग):', ''))
-                dob = parse_date(player_row.get('Date of Birth (DOB) (जन्म तिथि):', ''))
-                participation_days = map_participation_days(player_row.get('Participating on which day?(किस दिन भाग ले रहे हैं?)', ''))
-                permissions = player_row.get('Permissions (अनुमतियाँ):', '')
-                queries = player_row.get('Any Queries or Comments (कोई प्रश्न या टिप्पणी):', '').strip() or None
-                standard_cert = player_row.get('Standard WFDF Accreditation Certificate', '').strip() or None
-                advance_cert = player_row.get('Advance WFDF Accreditation Certificate', '').strip() or None
-                contact = player_row.get('Contact Number (संपर्क नंबर):', '').strip() or None
-                parent_contact = player_row.get('Parents Contact Number (संपर्क नंबर):', '').strip() or None
-                timestamp = player_row.get('Timestamp', '').strip()
-                
-                parental_consent, media_consent = parse_permissions(permissions)
-                
-                # Parse timestamp if provided
-                reg_timestamp = None
-                if timestamp:
-                    try:
-                        reg_timestamp = datetime.strptime(timestamp.split()[0], '%m/%d/%Y').isoformat() if timestamp else None
-                    except:
-                        reg_timestamp = None
-                
-                player_data = {
-                    'team_id': team_id,
-                    'name': player_name,
-                    'gender': gender,
-                    'email': f"{player_name.lower().replace(' ', '_')}@temp.local",
-                    'date_of_birth': dob,
-                    'contact_number': contact,
-                    'parent_contact': parent_contact,
-                    'participation_days': participation_days,
-                    'parental_consent': parental_consent,
-                    'media_consent': media_consent,
-                    'queries_comments': queries,
-                    'standard_wfdf_certificate_url': standard_cert if standard_cert and standard_cert != 'Google Drive Links' else None,
-                    'advance_wfdf_certificate_url': advance_cert if advance_cert and advance_cert != 'Google Drive Links' else None,
-                    'community': community,
-                    'registration_timestamp': reg_timestamp,
-                    'verified': False
-                }
-                
-                # Insert player
-                result = supabase.table('team_players').insert(player_data).execute()
-                success_count += 1
-                print(f"    ✓ {player_name}")
-                
-            except Exception as e:
-                error_count += 1
-                print(f"    ✗ Error importing {player_row.get('Player Full Name ( खिलाड़ी पूरा का नाम):', 'Unknown')}: {str(e)}")
+        try:
+            record = parse_player_row(row_num, row, columns, team_id, team_communities[team_name],
+                                      dates, timestamps, normalized)
+        except Exception as e:
+            stats.add(team_name, errors=1)
+            log_line(f"    ✗ Error importing row {row_num}: {str(e)}")
+            continue
         
-        print(f"  Completed: {success_count} successful, {error_count} errors")
+        yield PendingPlayer(team_name, record, '', row_num)
+
+def check_rows(csv_path: str, since: Optional[str], engine: str, details: bool = False) -> CsvCheck:
+    """Offline check of the rows registered after since, or of every row without it"""
+    check = check_player_csv(csv_path, REQUIRED_COLUMNS, parse_player_row, ColumnNormalizer(PARENTAL_CONSENT, engine),
+                             since)
+    check.report(details=details)
+    return check
+
+def import_csv_data(csv_path: str, tournament_id: str, supabase: 'Client',
+                    batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1, dedup: Optional[str] = None,
+                    since: Optional[str] = None, since_last: bool = False, engine: str = 'auto'):
+    """Stream CSV data into Supabase, inserting players in batches as the file is read.
+    
+    With dedup ('flag' or 'skip'), likely duplicates within the file and of
+    players already on the teams are reported, or skipped, before writing.
+    With since (an ISO timestamp) or since_last (the latest registration
+    imported so far), rows registered at or before it are skipped unparsed.
+    engine picks how gender, participation days and consents are normalized
+    (see import_lib/normalize.py).
+    """
+    
+    # Load all of the tournament's teams in one query
+    lookups = LookupCache(supabase)
+    teams = lookups.load_teams(tournament_id)
+    
+    # Cumulative exports: only look at registrations newer than the watermark
+    cutoff = None
+    if since_last:
+        since = load_registration_watermark(supabase, list(teams.values()))
+        if since is None:
+            print("No previously imported registrations found, importing every row")
+        # main() could only check the header before the watermark was known
+        check = check_rows(csv_path, since, engine)
+        if since and not check.rows:
+            print(f"No registrations after {since} to import")
+            return
+        if not check.players:
+            raise Exception("no importable players in the CSV")
     
-    print("\nImport complete!")
+    # Map columns to fields once from the header
+    columns, rows = read_csv_rows(csv_path, PLAYER_FIELDS)
+    missing = columns.missing(REQUIRED_COLUMNS)
+    if missing:
+        raise Exception(f"CSV has no column for: {', '.join(missing)}")
+    
+    if since:
+        print(f"Importing registrations after {since}")
+        cutoff = RegistrationCutoff(since)
+        rows = cutoff.filter(columns, rows)
+    
+    # Parse, batch and insert as the file is read
+    stats = ImportStats()
+    dates = DateParser(DATE_FORMATS)
+    timestamps = DateParser(TIMESTAMP_FORMATS)
+    normalizer = ColumnNormalizer(PARENTAL_CONSENT, engine)
+    pending = iter_pending_players(columns, normalized_rows(columns, rows, normalizer), lookups, tournament_id,
+                                   stats, dates, timestamps)
+    
+    duplicates = None
+    if dedup:
+        duplicates = DuplicateFilter(dedup, load_existing_identities(supabase, teams))
+        pending = duplicates.filter(pending, stats, log_line)
+    
+    batches = batched(pending, batch_size)
+    
+    def write_batch(batch: List[PendingPlayer], log: LogFn) -> Tuple[List[PendingPlayer], List[PendingPlayer]]:
+        return (batch, insert_player_batch(supabase, batch, log))
+    
+    for batch, inserted in run_batches(batches, write_batch, workers):
+        stats.record_batch(batch, inserted)
+    
+    print(f"\nFound {len(stats.teams)} teams:")
+    stats.print_team_summaries()
+    print(f"\nImport complete! {stats.total('success')} successful, {stats.total('errors')} errors, "
+          f"{stats.total('skipped')} skipped")
+    if cutoff is not None:
+        cutoff.report()
+    dates.report('date of birth')
+    timestamps.report('Timestamp')
+    if duplicates is not None:
+        duplicates.report()
 
 def main():
     parser = argparse.ArgumentParser(description='Import tournament player data from CSV')
     parser.add_argument('--csv', required=True, help='Path to CSV file')
-    parser.add_argument('--tournament-id', required=True, help='Tournament UUID')
+    parser.add_argument('--tournament-id', help='Tournament UUID (not needed with --validate-only)')
     parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
     parser.add_argument('--supabase-key', help='Supabase anon key (or use SUPABASE_ANON_KEY env var)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Players per insert request (default: {DEFAULT_BATCH_SIZE}, 1 = row by row)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of insert batches to write in parallel (default: 1)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--engine', choices=ENGINES, default='auto',
+                        help='Normalize gender, participation days and consents row by row (python) or '
+                             'column-wise with pandas (default: auto, pandas when installed)')
+    parser.add_argument('--dedup', choices=DEDUP_MODES,
+                        help='Check for likely duplicate players before writing: flag them, or skip all but the first')
+    since = parser.add_mutually_exclusive_group()
+    since.add_argument('--since-last', action='store_true',
+                       help='Only import rows registered after the latest registration already imported '
+                            'for this tournament (for cumulative Google Forms exports)')
+    since.add_argument('--since', metavar='TIMESTAMP',
+                       help='Only import rows registered after this time (YYYY-MM-DD HH:MM:SS)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Load into an in-memory stand-in database with placeholder teams and print the insert plan')
+    parser.add_argument('--target',
+                        help='Load into a local stand-in database file instead of Supabase (sqlite:///path/to/file.db)')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Check the whole CSV and report problems without connecting to the database')
+    metrics.add_arguments(parser)
     
     args = parser.parse_args()
+    if not args.tournament_id and not args.validate_only:
+        parser.error('the following arguments are required: --tournament-id')
+    metrics.enable('import_tournament_players', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.batch_size < 1:
+        print("Error: --batch-size must be at least 1")
+        return 1
+    
+    if args.workers < 1:
+        print("Error: --workers must be at least 1")
+        return 1
+    
+    since = None
+    if args.since:
+        # ISO as printed by a previous run, or the M/D/YYYY form of the export's Timestamp column
+        if re.match(r'\d{4}-\d{2}-\d{2}', args.since.strip()):
+            since = timestamp_key(args.since)
+        else:
+            since = DateParser(TIMESTAMP_FORMATS).parse_timestamp(args.since)
+        if not since:
+            print(f"Error: could not read --since {args.since!r}, expected YYYY-MM-DD HH:MM:SS")
+            return 1
+    
+    # The CSV is checked offline before anything is imported or connected. With --since only
+    # the rows after it are parsed; --since-last needs the database for its watermark, so
+    # only the header is checked here and import_csv_data() checks the rows after it.
+    try:
+        if args.since_last and not args.validate_only:
+            open_player_csv(args.csv, REQUIRED_COLUMNS)
+            check = None
+        else:
+            check = check_rows(args.csv, since, args.engine, details=args.validate_only)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        return 1
+    if args.validate_only:
+        return 0 if check.ok else 1
+    if check is not None and since and not check.rows:
+        print(f"No registrations after {since} to import")
+        return 0
+    if check is not None and not check.players:
+        print("Error: no importable players in the CSV")
+        return 1
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    # Dry runs and rehearsals write to a local stand-in database
+    local = None
+    if args.dry_run or args.target:
+        try:
+            local = open_local_backend(args.target, args.dry_run)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return 1
     
     # Get Supabase credentials
     url = args.supabase_url or os.getenv('SUPABASE_URL')
     key = args.supabase_key or os.getenv('SUPABASE_ANON_KEY')
     
-    if not url or not key:
+    if local is None and (not url or not key):
         print("Error: Supabase credentials not provided")
         print("Set SUPABASE_URL and SUPABASE_ANON_KEY environment variables or pass as arguments")
         return 1
     
     # Create Supabase client
-    supabase: Client = create_client(url, key)
+    transport = None
+    if local is not None:
+        supabase: Client = local
+    else:
+        supabase, transport = create_import_client(url, key, args.workers, args.max_retries)
     
     # Import data
     try:
-        import_csv_data(args.csv, args.tournament_id, supabase)
+        if local is not None and not args.target:
+            # An empty stand-in has none of the teams this script expects to exist
+            columns, rows = read_csv_rows(args.csv, PLAYER_FIELDS)
+            created = local.seed_placeholders(args.tournament_id,
+                                              (columns.get(row, 'team_name').strip() for _, row in rows))
+            print(f"Dry run: using a placeholder tournament with {created} placeholder teams\n")
+        
+        import_csv_data(args.csv, args.tournament_id, supabase, args.batch_size, args.workers, args.dedup,
+                        since, args.since_last, args.engine)
         return 0
     except Exception as e:
         print(f"Fatal error: {str(e)}")
         return 1
+    finally:
+        if transport is not None:
+            transport.report()
+        if local is not None:
+            local.print_plan()
 
 if __name__ == '__main__':
     exit(main())
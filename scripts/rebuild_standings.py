@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Rebuild Pool Standings
+
+Scores keep pool_standings_snapshot up to date through database triggers, one match
+at a time. After bulk-loading matches (or restoring data) this script recomputes the
+snapshot of the selected tournaments in one pass over their completed matches and
+writes it back with chunked upserts. --check-only compares the stored snapshot with
+the recomputed totals and reports every row that differs, without writing.
+
+Usage:
+    python scripts/rebuild_standings.py --tournament-id "<tournament-uuid>"
+    python scripts/rebuild_standings.py --tournament-id "<uuid-1>" "<uuid-2>" --check-only
+    python scripts/rebuild_standings.py --all
+    python scripts/rebuild_standings.py --all --rpc
+
+Requirements:
+    pip install supabase python-dotenv
+"""
+
+import argparse
+import os
+from typing import Dict, List, Optional, Tuple
+
+from import_lib.backends import open_local_backend
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.journal import select_all
+from import_lib import metrics
+from import_lib.standings import STANDINGS_COLUMNS, STANDINGS_KEY, standings_rows, team_totals
+
+@metrics.timed('lookups')
+def load_pools(supabase, tournament_ids: Optional[List[str]]) -> Dict[str, str]:
+    """Pools of the tournaments (of every tournament with None). Returns {pool_id: tournament_id}"""
+    if tournament_ids is None:
+        pools = select_all(supabase, 'tournament_pools', 'id, tournament_id', 'id')
+    else:
+        pools = select_all(supabase, 'tournament_pools', 'id, tournament_id', 'id', 'tournament_id', tournament_ids)
+    return {pool['id']: pool['tournament_id'] for pool in pools}
+
+def completed_matches(supabase, tournament_ids: Optional[List[str]]):
+    columns = 'team_a_id, team_b_id, team_a_score, team_b_score'
+    if tournament_ids is None:
+        return select_all(supabase, 'matches', columns, 'id', status='completed')
+    return select_all(supabase, 'matches', columns, 'id', 'tournament_id', tournament_ids, status='completed')
+
+def pool_filter(tournament_ids: Optional[List[str]], pool_tournaments: Dict[str, str]) -> Tuple:
+    """select_all() arguments restricting a per-pool table to the selected pools; none when every tournament is"""
+    return () if tournament_ids is None else ('pool_id', list(pool_tournaments))
+
+def diff_snapshot(supabase, rows: List[Dict], pools: Tuple) -> List[Tuple[Dict, Optional[Dict]]]:
+    """Recomputed rows that the stored snapshot is missing or disagrees with, paired with the stored row"""
+    stored = {(row['pool_id'], row['team_id']): row for row in select_all(
+        supabase, 'pool_standings_snapshot', 'pool_id, team_id, ' + ', '.join(STANDINGS_COLUMNS),
+        'pool_id, team_id', *pools)}
+    differences = []
+    for row in rows:
+        current = stored.get((row['pool_id'], row['team_id']))
+        if current is None or any(current[name] != row[name] for name in STANDINGS_COLUMNS):
+            differences.append((row, current))
+    return differences
+
+def rebuild_standings(supabase, tournament_ids: Optional[List[str]], chunk_size: int = 500,
+                      check_only: bool = False) -> bool:
+    pool_tournaments = load_pools(supabase, tournament_ids)
+    if not pool_tournaments:
+        print("⚠️  No pools found, nothing to rebuild")
+        return True
+    
+    with metrics.stage('read_matches'):
+        totals = team_totals(completed_matches(supabase, tournament_ids))
+    assignments = select_all(supabase, 'team_pool_assignments', 'pool_id, team_id', 'id',
+                             *pool_filter(tournament_ids, pool_tournaments))
+    rows = standings_rows(assignments, pool_tournaments, totals)
+    print(f"📊 {len(rows)} standings rows in {len(pool_tournaments)} pools from the results of {len(totals)} teams")
+    
+    if check_only:
+        differences = diff_snapshot(supabase, rows, pool_filter(tournament_ids, pool_tournaments))
+        for row, current in differences:
+            expected = ' '.join(f"{name}={row[name]}" for name in STANDINGS_COLUMNS)
+            found = 'missing' if current is None else ' '.join(f"{name}={current[name]}" for name in STANDINGS_COLUMNS)
+            print(f"  ❌ pool {row['pool_id']} team {row['team_id']}: expected {expected}, stored {found}")
+        print(f"\n{'✅ Snapshot is up to date' if not differences else f'❌ {len(differences)} rows differ'}")
+        return not differences
+    
+    written = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        with metrics.stage('upsert'):
+            result = supabase.table('pool_standings_snapshot').upsert(chunk, on_conflict=STANDINGS_KEY).execute()
+        written += len(result.data or [])
+        metrics.count_rows(len(result.data or []))
+    print(f"✅ Rebuilt {written} standings rows")
+    return True
+
+def rebuild_standings_rpc(supabase, tournament_ids: Optional[List[str]]) -> bool:
+    """Let rebuild_pool_standings() recompute in the database, one call per tournament (or one for all)"""
+    written = 0
+    for tournament_id in tournament_ids or [None]:
+        with metrics.stage('rebuild_rpc'):
+            result = supabase.rpc('rebuild_pool_standings', {'_tournament_id': tournament_id}).execute()
+        written += result.data or 0
+    metrics.count_rows(written)
+    print(f"✅ Rebuilt {written} standings rows with rebuild_pool_standings()")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute pool_standings_snapshot from completed matches')
+    selector = parser.add_mutually_exclusive_group(required=True)
+    selector.add_argument('--tournament-id', dest='tournament_ids', nargs='+', metavar='TOURNAMENT_ID',
+                          help='One or more tournament UUIDs')
+    selector.add_argument('--all', action='store_true', help='Every tournament')
+    parser.add_argument('--check-only', action='store_true',
+                        help='Report rows where the stored snapshot differs from the matches, write nothing')
+    parser.add_argument('--rpc', action='store_true',
+                        help='Recompute inside the database with rebuild_pool_standings() instead')
+    parser.add_argument('--chunk-size', type=int, default=500,
+                        help='Standings rows per upsert request (default: 500)')
+    parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
+    parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Run against an in-memory stand-in database and print the write plan')
+    parser.add_argument('--target',
+                        help='Use a local stand-in database file instead of Supabase (sqlite:///path/to/file.db)')
+    metrics.add_arguments(parser)
+    
+    args = parser.parse_args()
+    metrics.enable('rebuild_standings', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.chunk_size < 1:
+        print("❌ --chunk-size must be at least 1")
+        return 1
+    if args.rpc and args.check_only:
+        print("❌ --rpc cannot be combined with --check-only")
+        return 1
+    tournament_ids = None if args.all else list(dict.fromkeys(args.tournament_ids))
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    local = None
+    transport = None
+    if args.dry_run or args.target:
+        if args.rpc:
+            print("❌ --rpc needs a Supabase database")
+            return 1
+        try:
+            local = open_local_backend(args.target, args.dry_run)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            return 1
+        supabase = local
+    else:
+        url = args.supabase_url or os.getenv('SUPABASE_URL')
+        key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+        if not url or not key:
+            print("❌ Supabase credentials not provided")
+            print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
+            print("or pass as arguments: --supabase-url and --supabase-key")
+            return 1
+        supabase, transport = create_import_client(url, key, max_retries=args.max_retries)
+    
+    try:
+        if args.rpc:
+            success = rebuild_standings_rpc(supabase, tournament_ids)
+        else:
+            success = rebuild_standings(supabase, tournament_ids, args.chunk_size, args.check_only)
+        return 0 if success else 1
+    except Exception as e:
+        print(f"\n❌ Fatal error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        if transport is not None:
+            transport.report()
+        if local is not None:
+            local.print_plan()
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Schedule Tournament Pool Play
+
+This script generates the round-robin matches of a tournament and packs them into
+time slots across every field, then writes the whole schedule with a single upsert.
+Teams, pools, tournament_settings and the existing matches are read once up front;
+conflicts are checked in memory (see import_lib/scheduling.py).
+
+Pools come from tournament_pools / team_pool_assignments when the tournament has them,
+otherwise teams are dealt into settings.pool_count pools ('pools') or play one
+round robin ('round_robin'). Matches already on the schedule keep their time and field
+unless --reschedule is given; played and in-progress matches never move.
+
+Usage:
+    python scripts/schedule_tournament.py --tournament-id "<tournament-uuid>"
+    python scripts/schedule_tournament.py --tournament-id "<tournament-uuid>" --rest-minutes 30 --timezone Asia/Kolkata
+    python scripts/schedule_tournament.py --tournament-id "<tournament-uuid>" --reschedule --start-date 2025-02-15
+    python scripts/schedule_tournament.py --tournament-id "<tournament-uuid>" --check-only
+    python scripts/schedule_tournament.py --tournament-id "<tournament-uuid>" --dry-run
+
+Requirements:
+    pip install supabase python-dotenv
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, tzinfo
+from typing import Dict, List, Optional, Tuple
+
+from import_lib.backends import open_local_backend
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib import metrics
+from import_lib.lookups import LookupCache
+from import_lib.scheduling import (SCHEDULABLE_BRACKETS, Booking, Fixture, MatchPacker, Placement, ScheduleSettings,
+                                   SlotGrid, find_conflicts, pool_fixtures, split_into_pools)
+
+# Unplayed matches that --reschedule may move: 'scheduled' from this script and the
+# planning schema, 'upcoming' from the app's match scheduler. Every other match that
+# is not cancelled (in_progress, live, completed, ...) stays where it is.
+RESCHEDULABLE_STATUSES = ('scheduled', 'upcoming')
+
+def resolve_timezone(name: Optional[str]) -> tzinfo:
+    """The named zone, or this machine's local time zone like the app's scheduler uses"""
+    if not name:
+        return datetime.now().astimezone().tzinfo
+    from zoneinfo import ZoneInfo
+    return ZoneInfo(name)
+
+@metrics.timed('lookups')
+def load_settings(supabase, tournament_id: str) -> ScheduleSettings:
+    result = supabase.table('tournament_settings').select('*').eq('tournament_id', tournament_id).execute()
+    row = dict(result.data[0]) if result.data else None
+    if row and isinstance(row.get('fields'), str):
+        row['fields'] = json.loads(row['fields'])
+    return ScheduleSettings.from_row(row)
+
+@metrics.timed('lookups')
+def load_teams(supabase, tournament_id: str) -> Dict[str, str]:
+    """Every team that has not been rejected, in name order. Returns {team_id: name}"""
+    result = supabase.table('teams').select('id, name, status').eq('tournament_id', tournament_id).execute()
+    teams = sorted((team for team in result.data or [] if team['status'] != 'rejected'), key=lambda team: team['name'])
+    return {team['id']: team['name'] for team in teams}
+
+@metrics.timed('lookups')
+def load_pools(supabase, tournament_id: str, team_ids: Dict[str, str]) -> Dict[Optional[str], List[str]]:
+    """Pool play pools stored for the tournament, teams in seed order. Empty if there are none"""
+    result = (supabase.table('tournament_pools')
+              .select('id, pool_name, pool_type')
+              .eq('tournament_id', tournament_id)
+              .execute())
+    pools = {pool['id']: pool['pool_name'] for pool in sorted(result.data or [], key=lambda pool: pool['pool_type'])
+             if pool['pool_type'].startswith('pool_')}
+    if not pools:
+        return {}
+    
+    result = (supabase.table('team_pool_assignments')
+              .select('pool_id, team_id, seed_number')
+              .in_('pool_id', list(pools))
+              .execute())
+    assignments = sorted(result.data or [], key=lambda row: (row['seed_number'] is None, row['seed_number'] or 0))
+    teams: Dict[Optional[str], List[str]] = {name: [] for name in pools.values()}
+    for assignment in assignments:
+        if assignment['team_id'] in team_ids:
+            teams[pools[assignment['pool_id']]].append(assignment['team_id'])
+    return teams
+
+@metrics.timed('lookups')
+def load_matches(supabase, tournament_id: str) -> List[Dict]:
+    result = (supabase.table('matches')
+              .select('id, team_a_id, team_b_id, scheduled_time, field, pool, round, status')
+              .eq('tournament_id', tournament_id)
+              .execute())
+    return result.data or []
+
+def pair_key(team_a_id: str, team_b_id: str) -> Tuple[str, str]:
+    return (team_a_id, team_b_id) if team_a_id < team_b_id else (team_b_id, team_a_id)
+
+def plan_fixtures(fixtures: List[Fixture], existing: List[Dict], packer: MatchPacker, grid: SlotGrid,
+                  reschedule: bool) -> Tuple[List[Fixture], int]:
+    """Drop pairings already on the schedule and book the matches that stay put.
+    
+    With reschedule, unplayed matches of the pool fixtures are scheduled again
+    under their own id. Every other match that is not cancelled blocks its
+    teams and field. Returns (fixtures to place, matches kept).
+    """
+    by_pair: Dict[Tuple[str, str], Dict] = {}
+    for match in existing:
+        by_pair.setdefault(pair_key(match['team_a_id'], match['team_b_id']), match)
+    
+    to_place = []
+    replaced = set()
+    for fixture in fixtures:
+        match = by_pair.get(pair_key(fixture.team_a_id, fixture.team_b_id))
+        if match is None:
+            to_place.append(fixture)
+        elif reschedule and match['status'] in RESCHEDULABLE_STATUSES:
+            to_place.append(fixture._replace(match_id=match['id']))
+            replaced.add(match['id'])
+    
+    kept = 0
+    for match in existing:
+        if match['status'] == 'cancelled' or not match['scheduled_time'] or match['id'] in replaced:
+            continue
+        packer.block((match['team_a_id'], match['team_b_id']), match['field'],
+                     grid.to_minutes(match['scheduled_time']))
+        kept += 1
+    return to_place, kept
+
+def match_rows(tournament_id: str, placements: List[Placement], grid: SlotGrid,
+               statuses: Dict[str, str]) -> List[Dict]:
+    """The matches upsert payload; new matches get their id here so the whole schedule is one upsert.
+    
+    Rescheduled matches keep their status ({match_id: status}), new ones are 'scheduled'.
+    """
+    return [{
+        'id': placement.fixture.match_id or str(uuid.uuid4()),
+        'tournament_id': tournament_id,
+        'team_a_id': placement.fixture.team_a_id,
+        'team_b_id': placement.fixture.team_b_id,
+        'scheduled_time': grid.to_datetime(placement.start).isoformat(),
+        'field': placement.field,
+        'pool': placement.fixture.pool,
+        'round': placement.fixture.round,
+        'status': statuses.get(placement.fixture.match_id, 'scheduled'),
+    } for placement in placements]
+
+def print_schedule(placements: List[Placement], grid: SlotGrid, team_names: Dict[str, str]) -> None:
+    """One line per time slot with every field's match"""
+    slots: Dict[int, List[Placement]] = {}
+    for placement in sorted(placements, key=lambda placement: (placement.slot, placement.field)):
+        slots.setdefault(placement.slot, []).append(placement)
+    
+    for slot, in_slot in slots.items():
+        when = grid.to_datetime(grid.start(slot)).strftime('%a %d %b %H:%M')
+        games = ' | '.join(f"{placement.field}: {team_names[placement.fixture.team_a_id]} vs "
+                           f"{team_names[placement.fixture.team_b_id]}" for placement in in_slot)
+        print(f"  {when}  {games}")
+
+def check_schedule(existing: List[Dict], settings: ScheduleSettings, grid: SlotGrid,
+                   team_names: Dict[str, str]) -> int:
+    """Report teams or fields booked twice at once. Returns the number of conflicts"""
+    bookings = [Booking(match['id'], match['team_a_id'], match['team_b_id'], match['field'],
+                        grid.to_minutes(match['scheduled_time']))
+                for match in existing if match['scheduled_time'] and match['status'] != 'cancelled']
+    conflicts = find_conflicts(bookings, settings.match_minutes)
+    
+    print(f"🔎 Checked {len(bookings)} scheduled matches: {len(conflicts)} conflicts")
+    for first, second, kind in conflicts:
+        when = grid.to_datetime(second.start).strftime('%a %d %b %H:%M')
+        print(f"  ❌ {when} {kind} double-booked: "
+              f"{team_names.get(first.team_a_id, first.team_a_id)} vs {team_names.get(first.team_b_id, first.team_b_id)}"
+              f" ({first.field}) and "
+              f"{team_names.get(second.team_a_id, second.team_a_id)} vs {team_names.get(second.team_b_id, second.team_b_id)}"
+              f" ({second.field})")
+    return len(conflicts)
+
+def schedule_tournament(supabase, tournament_id: str, start_date: Optional[str], rest_minutes: int,
+                        reschedule: bool, check_only: bool, tz: tzinfo) -> bool:
+    tournament = LookupCache(supabase).load_tournaments([tournament_id]).get(tournament_id)
+    if tournament is None:
+        print(f"❌ Tournament not found: {tournament_id}")
+        return False
+    
+    settings = load_settings(supabase, tournament_id)
+    team_names = load_teams(supabase, tournament_id)
+    existing = load_matches(supabase, tournament_id)
+    first_day = date.fromisoformat(start_date or str(tournament['start_date'])[:10])
+    grid = SlotGrid(settings, first_day, tz)
+    
+    print(f"🏆 {tournament['name']}: {len(team_names)} teams, {len(existing)} matches on the schedule")
+    print(f"   {settings.bracket_type}, {len(settings.fields)} fields, {settings.match_minutes}+{settings.break_minutes} "
+          f"min slots from {settings.start_time:%H:%M}, {grid.slots_per_day} slots a day\n")
+    
+    if check_only:
+        return check_schedule(existing, settings, grid, team_names) == 0
+    
+    if settings.bracket_type not in SCHEDULABLE_BRACKETS:
+        print(f"❌ Only {' and '.join(SCHEDULABLE_BRACKETS)} brackets can be scheduled ahead of play "
+              f"(this tournament uses {settings.bracket_type})")
+        return False
+    if not settings.fields:
+        print("❌ tournament_settings lists no fields")
+        return False
+    
+    started = time.perf_counter()
+    pools = load_pools(supabase, tournament_id, team_names) or split_into_pools(list(team_names), settings)
+    packer = MatchPacker(grid, rest_minutes)
+    fixtures, kept = plan_fixtures(pool_fixtures(pools), existing, packer, grid, reschedule)
+    placements = packer.pack(fixtures)
+    elapsed = time.perf_counter() - started
+    
+    if not placements:
+        print(f"✅ Nothing to schedule ({kept} matches already on the schedule)")
+        return True
+    
+    print_schedule(placements, grid, team_names)
+    slots = {placement.slot for placement in placements}
+    last = max(placements, key=lambda placement: placement.start)
+    print(f"\n📅 {len(placements)} matches in {len(slots)} slots on {len(settings.fields)} fields "
+          f"({len(placements) / (len(slots) * len(settings.fields)):.0%} of field time used), "
+          f"last match {grid.to_datetime(last.start):%a %d %b %H:%M}, packed in {elapsed * 1000:.1f} ms")
+    if kept:
+        print(f"   {kept} matches already on the schedule were kept where they are")
+    
+    rows = match_rows(tournament_id, placements, grid, {match['id']: match['status'] for match in existing})
+    with metrics.stage('upsert'):
+        result = supabase.table('matches').upsert(rows, on_conflict='id').execute()
+    metrics.count_rows(len(result.data or []))
+    print(f"\n✅ Wrote {len(rows)} matches in one upsert")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate and pack the pool play schedule of a tournament')
+    parser.add_argument('--tournament-id', required=True, help='Tournament UUID')
+    parser.add_argument('--start-date', help='First day of play, YYYY-MM-DD (default: the tournament start date)')
+    parser.add_argument('--rest-minutes', type=int, default=0,
+                        help='Minimum minutes between two matches of a team, on top of the break (default: 0)')
+    parser.add_argument('--timezone',
+                        help='Time zone of start_time/end_time, e.g. Asia/Kolkata (default: this machine\'s)')
+    parser.add_argument('--reschedule', action='store_true',
+                        help='Move matches that are scheduled but not started instead of keeping them')
+    parser.add_argument('--check-only', action='store_true',
+                        help='Report teams or fields double-booked by the current schedule and write nothing')
+    parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
+    parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Schedule into an in-memory stand-in database with placeholder teams and print the write plan')
+    parser.add_argument('--placeholder-teams', type=int, default=16,
+                        help='Teams the --dry-run placeholder tournament gets (default: 16)')
+    parser.add_argument('--target',
+                        help='Use a local stand-in database file instead of Supabase (sqlite:///path/to/file.db)')
+    metrics.add_arguments(parser)
+    
+    args = parser.parse_args()
+    metrics.enable('schedule_tournament', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.rest_minutes < 0:
+        print("❌ --rest-minutes cannot be negative")
+        return 1
+    try:
+        tz = resolve_timezone(args.timezone)
+        if args.start_date:
+            date.fromisoformat(args.start_date)
+    except Exception as e:
+        print(f"❌ {str(e)}")
+        return 1
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    local = None
+    transport = None
+    if args.dry_run or args.target:
+        try:
+            local = open_local_backend(args.target, args.dry_run)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            return 1
+        if not args.target:
+            local.seed_placeholders(args.tournament_id,
+                                    [f"Team {number}" for number in range(1, args.placeholder_teams + 1)])
+        supabase = local
+    else:
+        url = args.supabase_url or os.getenv('SUPABASE_URL')
+        key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+        if not url or not key:
+            print("❌ Supabase credentials not provided")
+            print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
+            print("or pass as arguments: --supabase-url and --supabase-key")
+            return 1
+        supabase, transport = create_import_client(url, key, max_retries=args.max_retries)
+    
+    try:
+        success = schedule_tournament(supabase, args.tournament_id, args.start_date, args.rest_minutes,
+                                      args.reschedule, args.check_only, tz)
+        return 0 if success else 1
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return 1
+    except Exception as e:
+        print(f"\n❌ Fatal error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        if transport is not None:
+            transport.report()
+        if local is not None:
+            local.print_plan()
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Seed Tournament Pools from Rated Match History
+
+This script rates every team from the completed matches of all tournaments (an Elo
+model, see import_lib/ratings.py), ranks the approved teams of one tournament by
+rating and deals them into its pools in snake order. Matches, teams and tournaments
+are each read once; the assignments and each pool's seed_order are written back with
+a single seed_pools_bulk() call, replacing the tournament's previous pool assignments.
+
+Pools come from the tournament's pool play pools (pool_a .. pool_d). A tournament
+without any gets --pools of them (default: tournament_settings.pool_count).
+
+Usage:
+    python scripts/seed_tournament.py --tournament-id "<tournament-uuid>"
+    python scripts/seed_tournament.py --tournament-id "<tournament-uuid>" --preview
+    python scripts/seed_tournament.py --tournament-id "<tournament-uuid>" --pools 4 --k-factor 24 --carryover 0.5
+    python scripts/seed_tournament.py --tournament-id "<tournament-uuid>" --dry-run
+
+Requirements:
+    pip install supabase python-dotenv
+"""
+
+import argparse
+import os
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from import_lib.backends import open_local_backend
+from import_lib.client import DEFAULT_MAX_RETRIES, create_import_client
+from import_lib.journal import select_all
+from import_lib import metrics
+from import_lib.ratings import (DEFAULT_CARRYOVER, DEFAULT_K_FACTOR, EloModel, Seed, pool_spread, rate_matches,
+                                seed_teams, snake_draft, team_key)
+from import_lib.scheduling import DEFAULT_SETTINGS, pool_name
+
+# tournament_pools.pool_type allows four pool play pools
+POOL_TYPES = ('pool_a', 'pool_b', 'pool_c', 'pool_d')
+
+@metrics.timed('lookups')
+def load_teams(supabase, tournament_id: str) -> Dict[str, str]:
+    """Approved teams of the tournament, the ones auto_seed_teams() seeds. Returns {team_id: name}"""
+    result = supabase.table('teams').select('id, name').eq('tournament_id', tournament_id).eq('status', 'approved').execute()
+    return {team['id']: team['name'] for team in result.data or []}
+
+@metrics.timed('lookups')
+def load_pools(supabase, tournament_id: str) -> List[Tuple[str, str]]:
+    """The tournament's pool play pools as (id, pool_name), in pool_type order"""
+    result = supabase.table('tournament_pools').select('id, pool_name, pool_type').eq('tournament_id', tournament_id).execute()
+    pools = sorted((pool for pool in result.data or [] if pool['pool_type'] in POOL_TYPES),
+                   key=lambda pool: pool['pool_type'])
+    return [(pool['id'], pool['pool_name']) for pool in pools]
+
+def default_pool_count(supabase, tournament_id: str) -> int:
+    result = supabase.table('tournament_settings').select('pool_count').eq('tournament_id', tournament_id).execute()
+    return (result.data[0]['pool_count'] if result.data else None) or DEFAULT_SETTINGS['pool_count']
+
+def new_pools(count: int) -> List[Dict]:
+    """Pools for a tournament that has none, created by seed_pools_bulk() together with the assignments"""
+    return [{'id': str(uuid.uuid4()), 'pool_name': pool_name(index), 'pool_type': POOL_TYPES[index]}
+            for index in range(count)]
+
+def rate_history(supabase, k_factor: float, carryover: float) -> EloModel:
+    """Ratings from the completed matches of every tournament"""
+    with metrics.stage('read_history'):
+        tournament_order = {row['id']: row['start_date'] for row in select_all(supabase, 'tournaments', 'id, start_date', 'id')}
+        team_keys = {row['id']: team_key(row['name']) for row in select_all(supabase, 'teams', 'id, name', 'id')}
+        matches = list(select_all(supabase, 'matches',
+                                  'id, tournament_id, team_a_id, team_b_id, team_a_score, team_b_score, scheduled_time, round',
+                                  'id', status='completed'))
+    model = rate_matches(matches, team_keys, tournament_order, k_factor, carryover)
+    print(f"📈 Rated {len(model.teams)} teams from {len(matches)} completed matches in {len(tournament_order)} tournaments")
+    return model
+
+def print_pools(pools: List[Tuple[Optional[str], str]], drawn: List[List[str]], seeds: List[Seed]) -> None:
+    by_id = {seed.team_id: (rank, seed) for rank, seed in enumerate(seeds, start=1)}
+    for (_, name), team_ids in zip(pools, drawn):
+        print(f"\n  {name}")
+        for position, team_id in enumerate(team_ids, start=1):
+            rank, seed = by_id[team_id]
+            print(f"    {position}. {seed.name} (#{rank}, {seed.rating:.0f}, {seed.wins}/{seed.played} won)")
+
+def seed_tournament(supabase, tournament_id: str, pool_count: Optional[int], k_factor: float, carryover: float,
+                    preview: bool = False) -> bool:
+    teams = load_teams(supabase, tournament_id)
+    if len(teams) < 2:
+        print(f"❌ Tournament has {len(teams)} approved teams, need at least 2")
+        return False
+    
+    pools = load_pools(supabase, tournament_id)
+    if pools and pool_count and pool_count != len(pools):
+        print(f"❌ Tournament already has {len(pools)} pools, --pools {pool_count} does not match")
+        return False
+    count = len(pools) or min(pool_count or default_pool_count(supabase, tournament_id), len(POOL_TYPES), len(teams))
+    
+    model = rate_history(supabase, k_factor, carryover)
+    seeds = seed_teams(teams, model)
+    drawn = snake_draft([seed.team_id for seed in seeds], count)
+    
+    # Same draw from raw win counts, for comparison
+    ratings = {seed.team_id: seed.rating for seed in seeds}
+    by_wins = sorted(seeds, key=lambda seed: (-seed.wins, -model.get(team_key(seed.name)).point_diff, seed.name.lower()))
+    spread, means = pool_spread(drawn, ratings)
+    win_spread, _ = pool_spread(snake_draft([seed.team_id for seed in by_wins], count), ratings)
+    
+    print_pools(pools or [(None, pool_name(index)) for index in range(count)], drawn, seeds)
+    print(f"\n⚖️  Pool mean ratings {', '.join(f'{mean:.0f}' for mean in means)}: "
+          f"spread {spread:.0f} (seeding by win count: {win_spread:.0f})")
+    if preview:
+        print("\n👀 Preview only, nothing written")
+        return True
+    
+    created = [] if pools else new_pools(count)
+    if created:
+        pools = [(pool['id'], pool['pool_name']) for pool in created]
+    assignments = [{'pool_id': pool_id, 'team_id': team_id, 'seed_number': position}
+                   for (pool_id, _), team_ids in zip(pools, drawn)
+                   for position, team_id in enumerate(team_ids, start=1)]
+    with metrics.stage('seed_rpc'):
+        result = supabase.rpc('seed_pools_bulk', {'_tournament_id': tournament_id, '_assignments': assignments,
+                                                  '_new_pools': created}).execute()
+    metrics.count_rows(result.data or 0)
+    if created:
+        print(f"\n🆕 Created {len(created)} pools")
+    print(f"\n✅ Seeded {result.data or 0} teams into {count} pools")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed tournament pools by team ratings from past match results')
+    parser.add_argument('--tournament-id', required=True, help='Tournament UUID')
+    parser.add_argument('--pools', type=int,
+                        help='Pools to create when the tournament has none (default: tournament_settings.pool_count)')
+    parser.add_argument('--k-factor', type=float, default=DEFAULT_K_FACTOR,
+                        help=f'Elo K factor: how far one result moves a rating (default: {DEFAULT_K_FACTOR:g})')
+    parser.add_argument('--carryover', type=float, default=DEFAULT_CARRYOVER,
+                        help=f'Share of a rating kept from one tournament to the next (default: {DEFAULT_CARRYOVER:g})')
+    parser.add_argument('--preview', action='store_true', help='Print the seeds and pools without writing them')
+    parser.add_argument('--supabase-url', help='Supabase URL (or use SUPABASE_URL env var)')
+    parser.add_argument('--supabase-key', help='Supabase service role key (or use SUPABASE_SERVICE_ROLE_KEY env var)')
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help=f'Retries for rate-limited (429) or failed (5xx) requests (default: {DEFAULT_MAX_RETRIES})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Seed an in-memory stand-in database with placeholder teams and print the write plan')
+    parser.add_argument('--placeholder-teams', type=int, default=16,
+                        help='Teams the --dry-run placeholder tournament gets (default: 16)')
+    parser.add_argument('--target',
+                        help='Use a local stand-in database file instead of Supabase (sqlite:///path/to/file.db)')
+    metrics.add_arguments(parser)
+    
+    args = parser.parse_args()
+    metrics.enable('seed_tournament', args.profile, args.metrics_json, args.cprofile)
+    
+    if args.pools is not None and not 1 <= args.pools <= len(POOL_TYPES):
+        print(f"❌ --pools must be between 1 and {len(POOL_TYPES)}")
+        return 1
+    if not 0 <= args.carryover <= 1:
+        print("❌ --carryover must be between 0 and 1")
+        return 1
+    
+    # Load environment variables
+    from dotenv import load_dotenv
+    load_dotenv()
+    
+    local = None
+    transport = None
+    if args.dry_run or args.target:
+        try:
+            local = open_local_backend(args.target, args.dry_run)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            return 1
+        if args.dry_run:
+            local.seed_placeholders(args.tournament_id,
+                                    [f"Team {number}" for number in range(1, args.placeholder_teams + 1)])
+        supabase = local
+    else:
+        url = args.supabase_url or os.getenv('SUPABASE_URL')
+        key = args.supabase_key or os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_ANON_KEY')
+        if not url or not key:
+            print("❌ Supabase credentials not provided")
+            print("\nSet SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
+            print("or pass as arguments: --supabase-url and --supabase-key")
+            return 1
+        supabase, transport = create_import_client(url, key, max_retries=args.max_retries)
+    
+    try:
+        success = seed_tournament(supabase, args.tournament_id, args.pools, args.k_factor, args.carryover,
+                                  args.preview)
+        return 0 if success else 1
+    except Exception as e:
+        print(f"\n❌ Fatal error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        if transport is not None:
+            transport.report()
+        if local is not None:
+            local.print_plan()
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,113 @@
+-- Set-based companion to import_player_data()
+-- Imports a whole team roster in one call: the players are validated and
+-- inserted by a single statement, so age calculation and checks run once
+-- for the set and a team costs one round-trip instead of one per player.
+
+-- Function to import many players into one team from a JSON array
+-- Each element uses team_players column names (name, gender, date_of_birth,
+-- contact_number, parent_contact, participation_days, parental_consent,
+-- media_consent, queries_comments, standard_wfdf_certificate_url,
+-- advance_wfdf_certificate_url, community, registration_timestamp, email).
+-- Keys that are missing fall back to the same defaults as import_player_data().
+CREATE OR REPLACE FUNCTION public.import_players_bulk(
+  _team_id UUID,
+  _players JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_invalid RECORD;
+  v_inserted INTEGER;
+BEGIN
+  IF jsonb_typeof(_players) IS DISTINCT FROM 'array' THEN
+    RAISE EXCEPTION 'import_players_bulk: _players must be a JSON array';
+  END IF;
+
+  -- Validate the whole set before writing any of it, reporting the first bad player
+  SELECT p.ordinal, p.player->>'name' AS name,
+         CASE
+           WHEN COALESCE(TRIM(p.player->>'name'), '') = '' THEN 'missing name'
+           WHEN COALESCE(p.player->>'gender', '') NOT IN ('male', 'female', 'other') THEN 'invalid gender'
+           ELSE 'invalid participation_days'
+         END AS reason
+  INTO v_invalid
+  FROM jsonb_array_elements(_players) WITH ORDINALITY AS p(player, ordinal)
+  WHERE COALESCE(TRIM(p.player->>'name'), '') = ''
+     OR COALESCE(p.player->>'gender', '') NOT IN ('male', 'female', 'other')
+     OR COALESCE(p.player->>'participation_days', 'both_days') NOT IN ('both_days', 'day_1', 'day_2')
+  ORDER BY p.ordinal
+  LIMIT 1;
+
+  IF FOUND THEN
+    RAISE EXCEPTION 'import_players_bulk: player % (%) has %',
+      v_invalid.ordinal, COALESCE(v_invalid.name, 'no name'), v_invalid.reason;
+  END IF;
+
+  INSERT INTO public.team_players (
+    team_id,
+    name,
+    age,
+    gender,
+    email,
+    date_of_birth,
+    contact_number,
+    parent_contact,
+    participation_days,
+    parental_consent,
+    media_consent,
+    queries_comments,
+    standard_wfdf_certificate_url,
+    advance_wfdf_certificate_url,
+    community,
+    registration_timestamp,
+    verified
+  )
+  SELECT
+    _team_id,
+    p.name,
+    -- Same rule as import_player_data(): age from DOB, otherwise 20
+    CASE WHEN p.date_of_birth IS NOT NULL THEN public.calculate_player_age(p.date_of_birth) ELSE 20 END,
+    p.gender,
+    COALESCE(p.email, LOWER(REPLACE(p.name, ' ', '_')) || '@temp.ultimate.local'),
+    p.date_of_birth,
+    p.contact_number,
+    p.parent_contact,
+    COALESCE(p.participation_days, 'both_days'),
+    COALESCE(p.parental_consent, false),
+    COALESCE(p.media_consent, false),
+    p.queries_comments,
+    p.standard_wfdf_certificate_url,
+    p.advance_wfdf_certificate_url,
+    p.community,
+    COALESCE(p.registration_timestamp, NOW()),
+    false
+  FROM jsonb_to_recordset(_players) AS p(
+    name TEXT,
+    gender TEXT,
+    email TEXT,
+    date_of_birth DATE,
+    contact_number TEXT,
+    parent_contact TEXT,
+    participation_days TEXT,
+    parental_consent BOOLEAN,
+    media_consent BOOLEAN,
+    queries_comments TEXT,
+    standard_wfdf_certificate_url TEXT,
+    advance_wfdf_certificate_url TEXT,
+    community TEXT,
+    registration_timestamp TIMESTAMP WITH TIME ZONE
+  );
+
+  GET DIAGNOSTICS v_inserted = ROW_COUNT;
+  RETURN v_inserted;
+END;
+$$;
+
+-- Runs with the caller's rights, so team_players RLS still decides who may
+-- add players to which team (the import scripts use the service role key)
+GRANT EXECUTE ON FUNCTION public.import_players_bulk(UUID, JSONB) TO authenticated;
+
+COMMENT ON FUNCTION public.import_players_bulk(UUID, JSONB) IS 'Bulk import of a team roster from a JSON array of team_players rows; returns the number of players inserted';
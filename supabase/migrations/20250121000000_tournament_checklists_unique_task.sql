@@ -0,0 +1,30 @@
+-- Make checklist imports idempotent
+-- import_checklist_items.py upserts on (tournament_id, category, task_name), which needs
+-- a unique constraint. Re-running an import used to duplicate every task, so existing
+-- duplicates are removed first, keeping the copy with the most progress.
+
+-- Remove duplicate tasks, keeping completed/in-progress copies over pending ones,
+-- then the most recently updated
+DELETE FROM public.tournament_checklists
+WHERE id IN (
+  SELECT id
+  FROM (
+    SELECT id,
+           ROW_NUMBER() OVER (
+             PARTITION BY tournament_id, category, task_name
+             ORDER BY
+               CASE status WHEN 'completed' THEN 0 WHEN 'in_progress' THEN 1 WHEN 'pending' THEN 2 ELSE 3 END,
+               updated_at DESC,
+               created_at
+           ) AS copy_number
+    FROM public.tournament_checklists
+  ) ranked
+  WHERE ranked.copy_number > 1
+);
+
+ALTER TABLE public.tournament_checklists
+DROP CONSTRAINT IF EXISTS tournament_checklists_tournament_category_task_key;
+
+ALTER TABLE public.tournament_checklists
+ADD CONSTRAINT tournament_checklists_tournament_category_task_key
+UNIQUE (tournament_id, category, task_name);
@@ -0,0 +1,230 @@
+-- Incrementally maintained pool standings
+-- The pool_standings view computed wins, losses, draws, goals_for and goals_against
+-- with five correlated subqueries over every match, re-run for every team on every
+-- leaderboard refresh. pool_standings_snapshot holds the totals instead: a trigger on
+-- matches applies each completed result (and takes back a result that is corrected or
+-- reopened) to the two teams' rows, so a score submission updates a couple of rows by
+-- index. pool_standings keeps its columns and order but becomes a read of the snapshot.
+-- rebuild_pool_standings() (and scripts/rebuild_standings.py) recompute it in one pass
+-- over matches, e.g. after a bulk import.
+--
+-- As before, a team's totals count every completed match it played in the tournament,
+-- the same in each pool it is assigned to.
+
+CREATE TABLE IF NOT EXISTS public.pool_standings_snapshot (
+  pool_id UUID NOT NULL REFERENCES public.tournament_pools(id) ON DELETE CASCADE,
+  team_id UUID NOT NULL REFERENCES public.teams(id) ON DELETE CASCADE,
+  tournament_id UUID NOT NULL REFERENCES public.tournaments(id) ON DELETE CASCADE,
+  wins INTEGER NOT NULL DEFAULT 0,
+  losses INTEGER NOT NULL DEFAULT 0,
+  draws INTEGER NOT NULL DEFAULT 0,
+  goals_for INTEGER NOT NULL DEFAULT 0,
+  goals_against INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL,
+  PRIMARY KEY (pool_id, team_id)
+);
+
+-- Match triggers find a team's rows by team_id; leaderboards read a pool in rank order
+CREATE INDEX IF NOT EXISTS idx_pool_standings_snapshot_team_id ON public.pool_standings_snapshot(team_id);
+CREATE INDEX IF NOT EXISTS idx_pool_standings_snapshot_rank
+  ON public.pool_standings_snapshot(pool_id, wins DESC, (goals_for - goals_against) DESC);
+CREATE INDEX IF NOT EXISTS idx_pool_standings_snapshot_tournament_id ON public.pool_standings_snapshot(tournament_id);
+
+ALTER TABLE public.pool_standings_snapshot ENABLE ROW LEVEL SECURITY;
+
+-- Written only by the triggers below and by service-role rebuilds
+DROP POLICY IF EXISTS "Anyone can view pool standings" ON public.pool_standings_snapshot;
+CREATE POLICY "Anyone can view pool standings"
+  ON public.pool_standings_snapshot FOR SELECT
+  USING (true);
+
+-- An earlier version of this migration applied results through a separate SECURITY
+-- DEFINER helper, which PostgREST exposed as an RPC
+DROP FUNCTION IF EXISTS public.apply_match_to_standings(UUID, UUID, INTEGER, INTEGER, INTEGER);
+
+-- Take back the old result of a completed match and add the new one, on both teams' rows.
+-- NULL scores count as in the old view: no win, loss or draw, and no goals.
+CREATE OR REPLACE FUNCTION public.update_pool_standings_from_match()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_take_back BOOLEAN := TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'completed';
+  v_apply BOOLEAN := TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'completed';
+BEGIN
+  IF NOT (v_take_back OR v_apply) THEN
+    RETURN NULL;
+  END IF;
+
+  -- One change per team, so a team on both sides of a corrected result is updated once
+  UPDATE public.pool_standings_snapshot s
+  SET wins = s.wins + d.wins,
+      losses = s.losses + d.losses,
+      draws = s.draws + d.draws,
+      goals_for = s.goals_for + d.goals_for,
+      goals_against = s.goals_against + d.goals_against,
+      updated_at = NOW()
+  FROM (
+    SELECT r.team_id,
+           SUM(r.sign * (CASE WHEN r.goals_for > r.goals_against THEN 1 ELSE 0 END)) AS wins,
+           SUM(r.sign * (CASE WHEN r.goals_for < r.goals_against THEN 1 ELSE 0 END)) AS losses,
+           SUM(r.sign * (CASE WHEN r.goals_for = r.goals_against THEN 1 ELSE 0 END)) AS draws,
+           SUM(r.sign * COALESCE(r.goals_for, 0)) AS goals_for,
+           SUM(r.sign * COALESCE(r.goals_against, 0)) AS goals_against
+    FROM (
+      SELECT OLD.team_a_id, OLD.team_a_score, OLD.team_b_score, -1 WHERE v_take_back
+      UNION ALL
+      SELECT OLD.team_b_id, OLD.team_b_score, OLD.team_a_score, -1 WHERE v_take_back
+      UNION ALL
+      SELECT NEW.team_a_id, NEW.team_a_score, NEW.team_b_score, 1 WHERE v_apply
+      UNION ALL
+      SELECT NEW.team_b_id, NEW.team_b_score, NEW.team_a_score, 1 WHERE v_apply
+    ) AS r(team_id, goals_for, goals_against, sign)
+    GROUP BY r.team_id
+  ) d
+  WHERE s.team_id = d.team_id;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS matches_pool_standings ON public.matches;
+CREATE TRIGGER matches_pool_standings
+  AFTER INSERT OR DELETE OR UPDATE OF status, team_a_id, team_b_id, team_a_score, team_b_score
+  ON public.matches
+  FOR EACH ROW
+  EXECUTE FUNCTION public.update_pool_standings_from_match();
+
+-- Totals of every team that has played a completed match, one pass over matches
+CREATE OR REPLACE FUNCTION public.team_match_totals(_tournament_id UUID DEFAULT NULL)
+RETURNS TABLE (
+  team_id UUID,
+  wins INTEGER,
+  losses INTEGER,
+  draws INTEGER,
+  goals_for INTEGER,
+  goals_against INTEGER
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT r.team_id,
+         COUNT(*) FILTER (WHERE r.goals_for > r.goals_against)::INTEGER,
+         COUNT(*) FILTER (WHERE r.goals_for < r.goals_against)::INTEGER,
+         COUNT(*) FILTER (WHERE r.goals_for = r.goals_against)::INTEGER,
+         COALESCE(SUM(r.goals_for), 0)::INTEGER,
+         COALESCE(SUM(r.goals_against), 0)::INTEGER
+  FROM public.matches m
+  CROSS JOIN LATERAL (VALUES (m.team_a_id, m.team_a_score, m.team_b_score),
+                             (m.team_b_id, m.team_b_score, m.team_a_score)) AS r(team_id, goals_for, goals_against)
+  WHERE m.status = 'completed'
+    AND (_tournament_id IS NULL OR m.tournament_id = _tournament_id)
+  GROUP BY r.team_id;
+$$;
+
+-- Recompute the snapshot of one tournament (or all of them) from matches.
+-- Returns the number of standings rows written.
+CREATE OR REPLACE FUNCTION public.rebuild_pool_standings(_tournament_id UUID DEFAULT NULL)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_written INTEGER;
+BEGIN
+  DELETE FROM public.pool_standings_snapshot
+  WHERE _tournament_id IS NULL OR tournament_id = _tournament_id;
+
+  INSERT INTO public.pool_standings_snapshot (pool_id, team_id, tournament_id, wins, losses, draws, goals_for, goals_against)
+  SELECT tpa.pool_id, tpa.team_id, tp.tournament_id,
+         COALESCE(t.wins, 0), COALESCE(t.losses, 0), COALESCE(t.draws, 0),
+         COALESCE(t.goals_for, 0), COALESCE(t.goals_against, 0)
+  FROM public.team_pool_assignments tpa
+  INNER JOIN public.tournament_pools tp ON tp.id = tpa.pool_id
+  LEFT JOIN public.team_match_totals(_tournament_id) t ON t.team_id = tpa.team_id
+  WHERE _tournament_id IS NULL OR tp.tournament_id = _tournament_id;
+
+  GET DIAGNOSTICS v_written = ROW_COUNT;
+  RETURN v_written;
+END;
+$$;
+
+-- A full rebuild is for maintenance scripts only: not callable through the API by
+-- anon or signed-in users (Supabase grants EXECUTE on public functions to both)
+REVOKE EXECUTE ON FUNCTION public.rebuild_pool_standings(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_pool_standings(UUID) TO service_role;
+
+-- Keep one snapshot row per pool assignment; a new assignment starts from the team's current totals
+CREATE OR REPLACE FUNCTION public.update_pool_standings_from_assignment()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM public.pool_standings_snapshot
+    WHERE pool_id = OLD.pool_id AND team_id = OLD.team_id;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO public.pool_standings_snapshot (pool_id, team_id, tournament_id, wins, losses, draws, goals_for, goals_against)
+    SELECT NEW.pool_id, NEW.team_id, tp.tournament_id,
+           COUNT(*) FILTER (WHERE r.goals_for > r.goals_against),
+           COUNT(*) FILTER (WHERE r.goals_for < r.goals_against),
+           COUNT(*) FILTER (WHERE r.goals_for = r.goals_against),
+           COALESCE(SUM(r.goals_for), 0),
+           COALESCE(SUM(r.goals_against), 0)
+    FROM public.tournament_pools tp
+    LEFT JOIN (
+      SELECT m.team_a_score AS goals_for, m.team_b_score AS goals_against
+      FROM public.matches m WHERE m.team_a_id = NEW.team_id AND m.status = 'completed'
+      UNION ALL
+      SELECT m.team_b_score, m.team_a_score
+      FROM public.matches m WHERE m.team_b_id = NEW.team_id AND m.status = 'completed'
+    ) r ON true
+    WHERE tp.id = NEW.pool_id
+    GROUP BY tp.tournament_id
+    ON CONFLICT (pool_id, team_id) DO NOTHING;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS team_pool_assignments_pool_standings ON public.team_pool_assignments;
+CREATE TRIGGER team_pool_assignments_pool_standings
+  AFTER INSERT OR DELETE OR UPDATE OF pool_id, team_id
+  ON public.team_pool_assignments
+  FOR EACH ROW
+  EXECUTE FUNCTION public.update_pool_standings_from_assignment();
+
+-- Backfill
+SELECT public.rebuild_pool_standings();
+
+-- Same columns, types and order as before, now a join on primary keys
+CREATE OR REPLACE VIEW public.pool_standings AS
+SELECT
+  s.pool_id,
+  tp.pool_name,
+  s.tournament_id,
+  s.team_id,
+  tg.name AS team_name,
+  tpa.seed_number,
+  s.wins::BIGINT AS wins,
+  s.losses::BIGINT AS losses,
+  s.draws::BIGINT AS draws,
+  s.goals_for::BIGINT AS goals_for,
+  s.goals_against::BIGINT AS goals_against
+FROM public.pool_standings_snapshot s
+INNER JOIN public.tournament_pools tp ON tp.id = s.pool_id
+INNER JOIN public.team_pool_assignments tpa ON tpa.pool_id = s.pool_id AND tpa.team_id = s.team_id
+INNER JOIN public.teams tg ON tg.id = s.team_id
+ORDER BY s.pool_id, s.wins DESC, (s.goals_for - s.goals_against) DESC;
+
+GRANT SELECT ON public.pool_standings TO authenticated;
+GRANT SELECT ON public.pool_standings_snapshot TO authenticated;
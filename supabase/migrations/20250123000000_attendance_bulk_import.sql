@@ -0,0 +1,73 @@
+-- Bulk attendance import with deferred streak work
+-- Every attendance row fires update_streak_trigger (update_attendance_streak(): a
+-- session lookup, an upsert and a read and update of attendance_streaks) and
+-- check_absence_trigger. Loading a term of historical attendance that way costs several
+-- queries per row, and streaks come out wrong when the rows do not arrive in date order.
+-- import_attendance_bulk() writes a whole batch with one statement while both per-row
+-- triggers stand down; scripts/import_attendance.py then recomputes the streaks of the
+-- affected children in one date-ordered pass and writes them back in a batch.
+--
+-- The triggers only stand down inside import_attendance_bulk(): the setting is local to
+-- its transaction and switched off again before it returns. Attendance marked in the
+-- app is unaffected. Historical rows do not raise absence alerts.
+
+DROP TRIGGER IF EXISTS update_streak_trigger ON public.attendance;
+CREATE TRIGGER update_streak_trigger
+  AFTER INSERT OR UPDATE ON public.attendance
+  FOR EACH ROW
+  WHEN (COALESCE(current_setting('app.bulk_attendance_import', true), '') <> 'on')
+  EXECUTE FUNCTION public.trigger_update_streak();
+
+DROP TRIGGER IF EXISTS check_absence_trigger ON public.attendance;
+CREATE TRIGGER check_absence_trigger
+  AFTER INSERT OR UPDATE ON public.attendance
+  FOR EACH ROW
+  WHEN (COALESCE(current_setting('app.bulk_attendance_import', true), '') <> 'on')
+  EXECUTE FUNCTION public.trigger_check_absences();
+
+-- Function to insert or update many attendance rows from a JSON array
+-- Each element has session_id, child_id, present and optionally marked_at.
+-- A (session_id, child_id) pair may appear only once per call; an existing
+-- row for the pair is overwritten. Returns the number of rows written.
+CREATE OR REPLACE FUNCTION public.import_attendance_bulk(
+  _rows JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_written INTEGER;
+BEGIN
+  IF jsonb_typeof(_rows) IS DISTINCT FROM 'array' THEN
+    RAISE EXCEPTION 'import_attendance_bulk: _rows must be a JSON array';
+  END IF;
+
+  PERFORM set_config('app.bulk_attendance_import', 'on', true);
+
+  INSERT INTO public.attendance (session_id, child_id, present, marked_at, synced)
+  SELECT r.session_id, r.child_id, r.present, COALESCE(r.marked_at, NOW()), true
+  FROM jsonb_to_recordset(_rows) AS r(
+    session_id UUID,
+    child_id UUID,
+    present BOOLEAN,
+    marked_at TIMESTAMP WITH TIME ZONE
+  )
+  ON CONFLICT (session_id, child_id) DO UPDATE
+  SET present = EXCLUDED.present,
+      marked_at = EXCLUDED.marked_at,
+      synced = true;
+
+  GET DIAGNOSTICS v_written = ROW_COUNT;
+
+  PERFORM set_config('app.bulk_attendance_import', 'off', true);
+  RETURN v_written;
+END;
+$$;
+
+-- Runs with the caller's rights, so attendance RLS still decides who may
+-- mark attendance (the import script uses the service role key)
+GRANT EXECUTE ON FUNCTION public.import_attendance_bulk(JSONB) TO authenticated;
+
+COMMENT ON FUNCTION public.import_attendance_bulk(JSONB) IS 'Bulk insert or update of attendance rows from a JSON array, without the per-row streak and absence triggers; returns the number of rows written';
@@ -0,0 +1,85 @@
+-- Set-based pool seeding
+-- auto_seed_teams() orders one pool's teams by wins and point differential in the
+-- tournament itself and inserts their assignments one row at a time. seed_pools_bulk()
+-- takes the seeded assignments of every pool of a tournament (computed by
+-- scripts/seed_tournament.py from rated results across tournaments) and replaces the
+-- tournament's pool play assignments and seed_order with one statement each, in one
+-- transaction. Pools the tournament does not have yet are created in the same
+-- transaction, so a failed seeding leaves no empty pools behind.
+
+-- Replaced by the three-argument version below
+DROP FUNCTION IF EXISTS public.seed_pools_bulk(UUID, JSONB);
+
+-- Function to replace the pool play assignments of a tournament from a JSON array
+-- Each element has pool_id, team_id and seed_number (1 = top seed of the pool).
+-- Every pool must be a pool play pool (pool_a .. pool_d) of the tournament, or one of
+-- _new_pools (id, pool_name, pool_type), which are created first.
+-- Returns the number of assignments written.
+CREATE OR REPLACE FUNCTION public.seed_pools_bulk(
+  _tournament_id UUID,
+  _assignments JSONB,
+  _new_pools JSONB DEFAULT '[]'::JSONB
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  v_invalid UUID;
+  v_written INTEGER;
+BEGIN
+  IF jsonb_typeof(_assignments) IS DISTINCT FROM 'array' THEN
+    RAISE EXCEPTION 'seed_pools_bulk: _assignments must be a JSON array';
+  END IF;
+  IF jsonb_typeof(_new_pools) IS DISTINCT FROM 'array' THEN
+    RAISE EXCEPTION 'seed_pools_bulk: _new_pools must be a JSON array';
+  END IF;
+
+  INSERT INTO public.tournament_pools (id, tournament_id, pool_name, pool_type, status)
+  SELECT p.id, _tournament_id, p.pool_name, p.pool_type, 'draft'
+  FROM jsonb_to_recordset(_new_pools) AS p(id UUID, pool_name TEXT, pool_type TEXT);
+
+  SELECT a.pool_id INTO v_invalid
+  FROM jsonb_to_recordset(_assignments) AS a(pool_id UUID)
+  LEFT JOIN public.tournament_pools tp
+    ON tp.id = a.pool_id AND tp.tournament_id = _tournament_id AND tp.pool_type LIKE 'pool\_%'
+  WHERE tp.id IS NULL
+  LIMIT 1;
+
+  IF FOUND THEN
+    RAISE EXCEPTION 'seed_pools_bulk: pool % is not a pool play pool of tournament %', v_invalid, _tournament_id;
+  END IF;
+
+  DELETE FROM public.team_pool_assignments tpa
+  USING public.tournament_pools tp
+  WHERE tp.id = tpa.pool_id
+    AND tp.tournament_id = _tournament_id
+    AND tp.pool_type LIKE 'pool\_%';
+
+  INSERT INTO public.team_pool_assignments (pool_id, team_id, seed_number)
+  SELECT a.pool_id, a.team_id, a.seed_number
+  FROM jsonb_to_recordset(_assignments) AS a(pool_id UUID, team_id UUID, seed_number INTEGER);
+
+  GET DIAGNOSTICS v_written = ROW_COUNT;
+
+  -- Team ids of each pool in seed order, as the seeding UI stores them
+  UPDATE public.tournament_pools tp
+  SET seed_order = s.seed_order,
+      updated_at = NOW()
+  FROM (
+    SELECT a.pool_id, jsonb_agg(a.team_id ORDER BY a.seed_number) AS seed_order
+    FROM jsonb_to_recordset(_assignments) AS a(pool_id UUID, team_id UUID, seed_number INTEGER)
+    GROUP BY a.pool_id
+  ) s
+  WHERE tp.id = s.pool_id;
+
+  RETURN v_written;
+END;
+$$;
+
+-- Runs with the caller's rights, so the pool RLS policies still decide who may seed
+-- which tournament (the seeding script uses the service role key)
+GRANT EXECUTE ON FUNCTION public.seed_pools_bulk(UUID, JSONB, JSONB) TO authenticated;
+
+COMMENT ON FUNCTION public.seed_pools_bulk(UUID, JSONB, JSONB) IS 'Create the given new pools, then replace the pool play assignments and seed_order of a tournament from a JSON array of (pool_id, team_id, seed_number); returns the number of assignments written';